@@ -5,6 +5,8 @@ from sqlalchemy import pool
 
 from alembic import context
 from app.models.user_model import Base
+import app.models.session_model  # noqa: F401  registers user_sessions on Base.metadata
+import app.models.token_revocation_model  # noqa: F401  registers token_revocations on Base.metadata
 from settings.config import Settings
 
 
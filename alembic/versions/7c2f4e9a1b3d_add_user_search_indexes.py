@@ -0,0 +1,49 @@
+"""add user search indexes
+
+Revision ID: 7c2f4e9a1b3d
+Revises: 25d814bc83ed
+Create Date: 2026-10-19 09:12:31.402115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2f4e9a1b3d'
+down_revision: Union[str, None] = '25d814bc83ed'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Trigram operator classes back the substring (ILIKE '%q%') search.
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index('ix_users_created_at', 'users', ['created_at'], unique=False)
+    op.create_index('ix_users_role_created_at', 'users', ['role', 'created_at'], unique=False)
+    op.create_index('ix_users_locked_created_at', 'users', ['created_at'], unique=False,
+                    postgresql_where=sa.text('is_locked'))
+    op.create_index('ix_users_email_lower_prefix', 'users', [sa.text('lower(email) text_pattern_ops')], unique=False)
+    op.create_index('ix_users_nickname_lower_prefix', 'users', [sa.text('lower(nickname) text_pattern_ops')], unique=False)
+    op.create_index('ix_users_email_trgm', 'users', ['email'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'})
+    op.create_index('ix_users_nickname_trgm', 'users', ['nickname'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'nickname': 'gin_trgm_ops'})
+    op.create_index('ix_users_first_name_trgm', 'users', ['first_name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'first_name': 'gin_trgm_ops'})
+    op.create_index('ix_users_last_name_trgm', 'users', ['last_name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'last_name': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_last_name_trgm', table_name='users')
+    op.drop_index('ix_users_first_name_trgm', table_name='users')
+    op.drop_index('ix_users_nickname_trgm', table_name='users')
+    op.drop_index('ix_users_email_trgm', table_name='users')
+    op.drop_index('ix_users_nickname_lower_prefix', table_name='users')
+    op.drop_index('ix_users_email_lower_prefix', table_name='users')
+    op.drop_index('ix_users_locked_created_at', table_name='users')
+    op.drop_index('ix_users_role_created_at', table_name='users')
+    op.drop_index('ix_users_created_at', table_name='users')
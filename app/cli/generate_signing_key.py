@@ -0,0 +1,46 @@
+"""
+Generate a JWT signing key into the key directory for RS256 or EdDSA tokens.
+
+    python -m app.cli.generate_signing_key
+    python -m app.cli.generate_signing_key --algorithm EdDSA --kid 2026-10-19
+
+With the default naming the new key sorts last and becomes the active signing key
+on the next restart; older keys keep verifying until they are removed.
+"""
+import argparse
+import os
+from datetime import datetime, timezone
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+from app.dependencies import get_settings
+
+
+def generate(algorithm: str):
+    if algorithm == "EdDSA":
+        return ed25519.Ed25519PrivateKey.generate()
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default=settings.jwt_key_dir)
+    parser.add_argument("--algorithm", choices=["RS256", "EdDSA"],
+                        default=settings.jwt_algorithm if settings.jwt_algorithm in ("RS256", "EdDSA") else "RS256")
+    parser.add_argument("--kid", default=None, help="Key id (default: the current UTC timestamp)")
+    args = parser.parse_args()
+    kid = args.kid or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    os.makedirs(args.dir, exist_ok=True)
+    path = os.path.join(args.dir, f"{kid}.pem")
+    pem = generate(args.algorithm).private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(pem)
+    print(path)
+
+
+if __name__ == "__main__":
+    main()
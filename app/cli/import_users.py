@@ -0,0 +1,50 @@
+"""
+Bulk-import users from a CSV or NDJSON file without going through the HTTP API.
+
+    python -m app.cli.import_users users.csv
+    python -m app.cli.import_users users.ndjson --no-email
+
+Prints the import report as JSON; the exit status is non-zero if any row failed.
+"""
+import argparse
+import asyncio
+import sys
+
+from app.database import Database
+from app.dependencies import get_email_service, get_settings
+from app.services.email_service import EmailOutbox
+from app.services.user_import_service import ImportFormat, UserImportService, read_rows, shutdown_hash_pool
+
+
+async def run(path: str, import_format: ImportFormat, send_email: bool) -> int:
+    settings = get_settings()
+    Database.initialize(settings.database_url, settings.debug)
+    outbox = EmailOutbox() if send_email else None
+    email_service = get_email_service() if send_email else None
+    async with Database.get_session_factory()() as session:
+        with open(path, "rb") as stream:
+            report = await UserImportService.import_users(
+                session, read_rows(stream, import_format), email_service, outbox,
+                batch_size=settings.import_batch_size, hash_workers=settings.import_hash_workers,
+            )
+    if outbox is not None:
+        await outbox.drain()
+    shutdown_hash_pool()
+    print(report.model_dump_json(indent=2))
+    return 1 if report.failed else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=[f.value for f in ImportFormat], default=None,
+                        help="Defaults to the file extension")
+    parser.add_argument("--no-email", action="store_true", help="Do not send verification emails")
+    args = parser.parse_args()
+    import_format = ImportFormat(args.format) if args.format else (
+        ImportFormat.CSV if args.path.lower().endswith(".csv") else ImportFormat.NDJSON)
+    sys.exit(asyncio.run(run(args.path, import_format, not args.no_email)))
+
+
+if __name__ == "__main__":
+    main()
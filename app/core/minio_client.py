@@ -1,20 +1,36 @@
-from minio import Minio
-from minio.error import S3Error
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterator
 from app.core.config import (
     MINIO_ENDPOINT, MINIO_ACCESS_KEY, MINIO_SECRET_KEY,
     MINIO_BUCKET_NAME, MINIO_SECURE
 )
+from app.utils.metrics import STORAGE_CALL_SECONDS
+from app.utils.tracing import tracer
 
-# Initialize MinIO client
-client = Minio(
-    MINIO_ENDPOINT,
-    access_key=MINIO_ACCESS_KEY,
-    secret_key=MINIO_SECRET_KEY,
-    secure=MINIO_SECURE
-)
+@lru_cache(maxsize=None)
+def get_client():
+    """
+    The process-wide MinIO client, created on first use. Importing this module neither
+    loads the minio package nor contacts the server; uploads ensure the bucket exists.
+    """
+    from minio import Minio
+    return Minio(
+        MINIO_ENDPOINT,
+        access_key=MINIO_ACCESS_KEY,
+        secret_key=MINIO_SECRET_KEY,
+        secure=MINIO_SECURE
+    )
+
+@contextmanager
+def storage_call(operation: str) -> Iterator[None]:
+    """Time a MinIO call for /metrics and, in a sampled trace, give it a client span."""
+    with STORAGE_CALL_SECONDS.labels(operation).time(), tracer.span(f"minio.{operation}", "CLIENT"):
+        yield
 
 # This function now takes `minio_client` and `bucket_name` as parameters
 def create_bucket_if_not_exists(minio_client, bucket_name):
+    from minio.error import S3Error
     try:
         if not minio_client.bucket_exists(bucket_name):
             minio_client.make_bucket(bucket_name)
@@ -25,7 +41,3 @@ def create_bucket_if_not_exists(minio_client, bucket_name):
         print(f"❌ MinIO Error: {err}")
     except Exception as e:
         print(f"❌ Could not connect to MinIO: {e}")
-
-
-# Call the function to ensure the bucket exists
-create_bucket_if_not_exists(client,MINIO_BUCKET_NAME)
\ No newline at end of file
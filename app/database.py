@@ -1,22 +1,72 @@
+import time
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from app.utils.query_stats import SlowQueryLog, instrument_engine
 
 Base = declarative_base()
 
+class TimedSession(Session):
+    """
+    Session that totals, in `info["connection_seconds"]`, how long it held a pooled
+    connection: from the first statement of a transaction until its commit or rollback.
+    """
+
+@event.listens_for(TimedSession, "after_begin")
+def _connection_acquired(session, transaction, connection):
+    session.info.setdefault("connection_acquired_at", time.perf_counter())
+
+@event.listens_for(TimedSession, "after_transaction_end")
+def _connection_released(session, transaction):
+    if transaction.parent is None:
+        started = session.info.pop("connection_acquired_at", None)
+        if started is not None:
+            session.info["connection_seconds"] = session.info.get("connection_seconds", 0.0) + time.perf_counter() - started
+
+async def release_connection(session: AsyncSession) -> None:
+    """
+    End a transaction that has nothing to write, handing its connection back to the pool
+    before slow work that does not need it (bcrypt, SMTP, object storage). The session's
+    next statement checks a connection out again.
+    """
+    if session.in_transaction() and not (session.new or session.dirty or session.deleted):
+        await session.commit()
+
 class Database:
     """Handles database connections and sessions."""
     _engine = None
     _session_factory = None
 
     @classmethod
-    def initialize(cls, database_url: str, echo: bool = False):
-        """Initialize the async engine and sessionmaker."""
+    def initialize(cls, database_url: str, echo: bool = False, pool_size: Optional[int] = None, max_overflow: Optional[int] = None,
+                   slow_query_seconds: float = 0, explain_slow_queries: bool = False):
+        """
+        Initialize the async engine and sessionmaker. `pool_size` and `max_overflow` size
+        this process's connection pool; SQLite, which does not pool, ignores them.
+        Statements slower than `slow_query_seconds` are logged, with their plan when
+        `explain_slow_queries` is set.
+        """
         if cls._engine is None:  # Ensure engine is created once
-            cls._engine = create_async_engine(database_url, echo=echo, future=True)
+            options = {}
+            if pool_size is not None and make_url(database_url).get_backend_name() != "sqlite":
+                options = {"pool_size": pool_size, "max_overflow": max_overflow or 0}
+            cls._engine = create_async_engine(database_url, echo=echo, future=True, **options)
+            slow_query_log = SlowQueryLog(slow_query_seconds, explain_slow_queries) if slow_query_seconds > 0 else None
+            instrument_engine(cls._engine, slow_query_log)
             cls._session_factory = sessionmaker(
-                bind=cls._engine, class_=AsyncSession, expire_on_commit=False, future=True
+                bind=cls._engine, class_=AsyncSession, sync_session_class=TimedSession,
+                expire_on_commit=False, future=True
             )
 
+    @classmethod
+    def get_engine(cls):
+        """Returns the engine, ensuring it's initialized."""
+        if cls._engine is None:
+            raise ValueError("Database not initialized. Call `initialize()` first.")
+        return cls._engine
+
     @classmethod
     def get_session_factory(cls):
         """Returns the session factory, ensuring it's initialized."""
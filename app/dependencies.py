@@ -1,9 +1,10 @@
-from builtins import Exception, dict, str
+from builtins import KeyError, TypeError, ValueError, dict, int, isinstance, str
+from functools import lru_cache
+from typing import Optional
 from uuid import UUID
 from dotenv import load_dotenv
-from fastapi import Depends, HTTPException
-from fastapi.security import OAuth2PasswordBearer
-from minio import Minio
+from fastapi import Depends, HTTPException, Request
+from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import Database
@@ -11,54 +12,135 @@ from app.models.user_model import User
 from app.utils.template_manager import TemplateManager
 from app.services.email_service import EmailService
 from app.services.jwt_service import decode_token
-from settings.config import Settings
-from fastapi import Depends
-from app.core.minio_client import client as minio_client
+from app.services.revocation_service import revocation_list
+from app.utils.permissions import Permission
+from app.utils.principal import Principal
+from app.utils.rate_limiter import InMemoryRateLimitBackend, LoginThrottle, RedisRateLimitBackend
+from app.utils.session_middleware import request_session
+from settings.config import Settings, settings
+from app.core.minio_client import get_client as get_minio_storage_client
 
 # Load environment variables from .env file
 load_dotenv()
 
 def get_settings() -> Settings:
-    """Return application settings."""
-    return Settings()
+    """Return application settings: the one instance built when settings.config was imported."""
+    return settings
 
 def get_email_service() -> EmailService:
     template_manager = TemplateManager()
     return EmailService(template_manager=template_manager)
 
-async def get_db() -> AsyncSession: # type: ignore
-    """Dependency that provides a database session for each request."""
-    async_session_factory = Database.get_session_factory()
-    async with async_session_factory() as session:
-        try:
-            yield session
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
+async def get_db(request: Request) -> AsyncSession:
+    """
+    The request's database session. DatabaseSessionMiddleware creates it on first use and
+    commits or rolls it back once, when the response starts; errors propagate unchanged
+    to the exception handlers.
+    """
+    return request_session(request)
+
+_login_throttle = None
+
+def get_login_throttle() -> LoginThrottle:
+    """Return the process-wide login throttle, created from settings on first use."""
+    global _login_throttle
+    if _login_throttle is None:
+        settings = get_settings()
+        if settings.rate_limit_url:
+            backend = RedisRateLimitBackend(settings.rate_limit_url)
+        else:
+            backend = InMemoryRateLimitBackend(max_keys=settings.rate_limit_max_keys)
+        _login_throttle = LoginThrottle(
+            backend,
+            ip_burst=settings.login_ip_burst,
+            ip_per_minute=settings.login_ip_per_minute,
+            email_burst=settings.login_email_burst,
+            email_per_minute=settings.login_email_per_minute,
+        )
+    return _login_throttle
+
+def client_ip(request: Request) -> Optional[str]:
+    if get_settings().trust_proxy_headers and "x-real-ip" in request.headers:
+        return request.headers["x-real-ip"]
+    return request.client.host if request.client else None
+
+async def throttle_login(
+    request: Request,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    throttle: LoginThrottle = Depends(get_login_throttle),
+):
+    """Reject over-limit login attempts before the user lookup and password hash run."""
+    if not get_settings().login_rate_limit_enabled:
+        return
+    retry_after = await throttle.check(client_ip(request), form_data.username)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many login attempts. Try again later.",
+            headers={"Retry-After": str(int(retry_after) + 1)},
+        )
 
 def get_minio_client():
-    """Return the MinIO client instance."""
-    return minio_client
+    """Return the MinIO client, created on first use."""
+    return get_minio_storage_client()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+def get_current_user(token: str = Depends(oauth2_scheme)) -> Principal:
+    """
+    Verify the bearer token and return its principal. Within a request FastAPI caches
+    this dependency, so the token is decoded once however many guards depend on it.
+    """
     credentials_exception = HTTPException(
         status_code=401,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     payload = decode_token(token)
-    if payload is None:
+    if payload is None or revocation_list.is_revoked(payload):
         raise credentials_exception
-    user_id: str = payload.get("sub")
-    user_role: str = payload.get("role")
-    if user_id is None or user_role is None:
+    try:
+        return Principal.from_claims(payload)
+    except (KeyError, TypeError, ValueError):
         raise credentials_exception
-    return {"user_id": user_id, "role": user_role}
 
-def require_role(role: str):
-    def role_checker(current_user: dict = Depends(get_current_user)):
-        if current_user["role"] not in role:
+async def get_current_user_record(
+    request: Request,
+    principal: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> User:
+    """
+    Load the caller's user row, at most once per request: the result is kept on
+    `request.state` for code outside the dependency graph, and FastAPI caches it for
+    every dependency that asks.
+    """
+    user = getattr(request.state, "current_user_record", None)
+    if user is None:
+        user = (await db.execute(select(User).where(User.id == principal.id))).scalars().first()
+        if user is None:
+            raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
+        request.state.current_user_record = user
+    return user
+
+@lru_cache(maxsize=None)
+def require_permission(required: Permission):
+    """
+    Guard requiring every capability in `required`. The check is one integer AND against
+    the token's mask, and one checker exists per distinct mask, so FastAPI resolves it
+    once per request however many routes share it.
+    """
+    required = int(required)
+    def permission_checker(current_user: Principal = Depends(get_current_user)):
+        if not current_user.can(required):
+            raise HTTPException(status_code=403, detail="Operation not permitted")
+        return current_user
+    return permission_checker
+
+def require_role(role):
+    """Guard by role name(s). Prefer `require_permission`; kept for existing callers."""
+    roles = frozenset([role] if isinstance(role, str) else role)
+    def role_checker(current_user: Principal = Depends(get_current_user)):
+        if current_user.role not in roles:
             raise HTTPException(status_code=403, detail="Operation not permitted")
         return current_user
     return role_checker
\ No newline at end of file
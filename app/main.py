@@ -1,11 +1,48 @@
-from builtins import Exception
+from builtins import Exception, min
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
-from starlette.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from starlette.middleware.cors import CORSMiddleware  # Import the CORSMiddleware
 from app.database import Database
 from app.dependencies import get_settings
-from app.routers import user_routes
+from app.routers import health_routes, jwks_routes, metrics_routes, user_routes
+from app.services.email_service import email_outbox
+from app.services.revocation_service import RevocationService
+from app.services.warmup_service import WarmupService
+from app.utils.common import setup_logging
+from app.utils.compression import CompressionMiddleware
+from app.utils.metrics import MetricsMiddleware
+from app.utils.request_id import RequestIdMiddleware
+from app.utils.tracing import TracingMiddleware, configure_tracing
+from app.utils.session_middleware import DatabaseSessionMiddleware
 from app.utils.api_description import getDescription
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = get_settings()
+    setup_logging()  # per worker: app.server's own setup stays in the parent process
+    configure_tracing(settings.tracing_enabled, settings.tracing_exporter, settings.tracing_file, settings.tracing_sample_rate)
+    Database.initialize(settings.database_url, settings.debug, settings.database_pool_size, settings.database_max_overflow,
+                        settings.database_slow_query_seconds, settings.database_explain_slow_queries)
+    if settings.warmup_enabled:
+        await WarmupService.run(app, Database.get_engine(), min(settings.warmup_connections, settings.database_pool_size))
+    # Keeps this worker's copy of the token deny list current and purges expired entries.
+    refresher = asyncio.create_task(
+        RevocationService.run_refresher(Database.get_session_factory(), settings.revocation_refresh_seconds)
+    )
+    app.state.ready = True
+    try:
+        yield
+    finally:
+        app.state.ready = False
+        # uvicorn has finished in-flight requests by now; let their queued emails go out.
+        await email_outbox.drain(settings.email_drain_seconds)
+        refresher.cancel()
+        with suppress(asyncio.CancelledError):
+            await refresher
+        await Database.get_engine().dispose()
+
 app = FastAPI(
     title="User Management",
     description=getDescription(),
@@ -16,7 +53,16 @@ app = FastAPI(
         "email": "support@example.com",
     },
     license_info={"name": "MIT", "url": "https://opensource.org/licenses/MIT"},
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
+settings = get_settings()
+# Added first so it sits innermost and sees the route the router matched in its scope.
+app.add_middleware(DatabaseSessionMiddleware, session_factory=Database.get_session_factory)
+# Inside compression, which may copy the scope, so it can still read the matched route.
+app.add_middleware(MetricsMiddleware, repeated_query_threshold=settings.database_repeated_query_threshold)
+if settings.tracing_enabled:
+    app.add_middleware(TracingMiddleware)
 # CORS middleware configuration
 # This middleware will enable CORS and allow requests from any origin
 # It can be configured to allow specific methods, headers, and origins
@@ -27,16 +73,25 @@ app.add_middleware(
     allow_methods=["*"],  # Allowed HTTP methods
     allow_headers=["*"],  # Allowed HTTP headers
 )
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_minimum_size,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality,
+        brotli_enabled=settings.compression_brotli_enabled,
+    )
 
-@app.on_event("startup")
-async def startup_event():
-    settings = get_settings()
-    Database.initialize(settings.database_url, settings.debug)
+# Outermost, so every log line written while handling the request carries its id.
+app.add_middleware(RequestIdMiddleware)
 
 @app.exception_handler(Exception)
 async def exception_handler(request, exc):
-    return JSONResponse(status_code=500, content={"message": "An unexpected error occurred."})
+    return ORJSONResponse(status_code=500, content={"message": "An unexpected error occurred."})
 
 app.include_router(user_routes.router)
+app.include_router(jwks_routes.router)
+app.include_router(health_routes.router)
+app.include_router(metrics_routes.router)
 
 
@@ -0,0 +1,36 @@
+from builtins import str
+from datetime import datetime
+import uuid
+from sqlalchemy import Column, DateTime, ForeignKey, LargeBinary, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+class UserSession(Base):
+    """
+    A refresh-token session, corresponding to the 'user_sessions' table in the database.
+    Only the SHA-256 digest of the opaque refresh token is stored, so a leaked table
+    cannot be replayed, and the unique index on the 32-byte digest keeps lookups cheap.
+
+    Attributes:
+        id (UUID): Unique identifier for the session row.
+        user_id (UUID): Owner of the session; rows are removed with the user.
+        family_id (UUID): Shared by every token rotated from the same login. Presenting
+            an already-rotated token revokes the whole family.
+        token_hash (bytes): SHA-256 digest of the refresh token.
+        created_at (datetime): When the token was issued.
+        expires_at (datetime): When the token stops being accepted.
+        revoked_at (datetime): When the token was rotated or revoked, if it has been.
+    """
+    __tablename__ = "user_sessions"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id: Mapped[uuid.UUID] = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    family_id: Mapped[uuid.UUID] = Column(UUID(as_uuid=True), nullable=False, index=True)
+    token_hash: Mapped[bytes] = Column(LargeBinary(32), nullable=False, unique=True, index=True)
+    created_at: Mapped[datetime] = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at: Mapped[datetime] = Column(DateTime(timezone=True), nullable=False)
+    revoked_at: Mapped[datetime] = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<UserSession {self.id} user={self.user_id} family={self.family_id}>"
@@ -0,0 +1,33 @@
+from builtins import str
+from datetime import datetime
+import uuid
+from sqlalchemy import Column, DateTime, String, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+class TokenRevocation(Base):
+    """
+    An entry in the access-token deny list, corresponding to the 'token_revocations' table.
+    A row either revokes one token by its `jti`, or every token for `subject` issued at or
+    before `revoked_before`. Rows are only needed until the tokens they cover expire.
+
+    Attributes:
+        id (UUID): Unique identifier for the entry.
+        jti (str): JWT ID of a single revoked token.
+        subject (str): Token subject (`sub` claim) whose earlier tokens are revoked.
+        revoked_before (datetime): Tokens for `subject` issued at or before this time are rejected.
+        created_at (datetime): When the entry was recorded.
+        expires_at (datetime): When every token covered by the entry has expired anyway.
+    """
+    __tablename__ = "token_revocations"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    jti: Mapped[str] = Column(String(64), nullable=True, unique=True)
+    subject: Mapped[str] = Column(String(255), nullable=True, index=True)
+    revoked_before: Mapped[datetime] = Column(DateTime(timezone=True), nullable=True)
+    created_at: Mapped[datetime] = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at: Mapped[datetime] = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return f"<TokenRevocation {self.jti or self.subject}>"
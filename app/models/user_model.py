@@ -3,7 +3,7 @@ from datetime import datetime
 from enum import Enum
 import uuid
 from sqlalchemy import (
-    Column, String, Integer, DateTime, Boolean, func, Enum as SQLAlchemyEnum
+    Column, String, Integer, DateTime, Boolean, Index, func, text, Enum as SQLAlchemyEnum
 )
 from sqlalchemy.dialects.postgresql import UUID, ENUM
 from sqlalchemy.orm import Mapped, mapped_column
@@ -95,4 +95,24 @@ class User(Base):
     def update_professional_status(self, status: bool):
         """Updates the professional status and logs the update time."""
         self.is_professional = status
-        self.professional_status_updated_at = func.now()
\ No newline at end of file
+        self.professional_status_updated_at = func.now()
+
+
+# Indexes backing the user search endpoint (see UserService.build_search_query).
+# The trigram indexes require the pg_trgm extension, which the matching Alembic
+# migration creates before building them.
+Index("ix_users_created_at", User.created_at)
+Index("ix_users_role_created_at", User.role, User.created_at)
+Index("ix_users_locked_created_at", User.created_at, postgresql_where=text("is_locked"))
+Index(
+    "ix_users_email_lower_prefix", func.lower(User.email).label("email_lower"),
+    postgresql_ops={"email_lower": "text_pattern_ops"},
+)
+Index(
+    "ix_users_nickname_lower_prefix", func.lower(User.nickname).label("nickname_lower"),
+    postgresql_ops={"nickname_lower": "text_pattern_ops"},
+)
+Index("ix_users_email_trgm", User.email, postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"})
+Index("ix_users_nickname_trgm", User.nickname, postgresql_using="gin", postgresql_ops={"nickname": "gin_trgm_ops"})
+Index("ix_users_first_name_trgm", User.first_name, postgresql_using="gin", postgresql_ops={"first_name": "gin_trgm_ops"})
+Index("ix_users_last_name_trgm", User.last_name, postgresql_using="gin", postgresql_ops={"last_name": "gin_trgm_ops"})
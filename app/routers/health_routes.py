@@ -0,0 +1,31 @@
+from builtins import Exception, getattr
+import asyncio
+import logging
+from fastapi import APIRouter, Request
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import text
+from app.database import Database
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+DATABASE_CHECK_TIMEOUT = 2.0
+
+@router.get("/health/live", name="liveness", tags=["Health"])
+async def liveness():
+    """The process is up and its event loop is answering."""
+    return {"status": "ok"}
+
+@router.get("/health/ready", name="readiness", tags=["Health"], responses={503: {"description": "Warming up, shutting down or the database is unreachable"}})
+async def readiness(request: Request):
+    """Ready once startup warmup has finished, until shutdown begins, while the database answers."""
+    if not getattr(request.app.state, "ready", False):
+        return ORJSONResponse(status_code=503, content={"status": "starting"})
+    try:
+        async with Database.get_engine().connect() as conn:
+            await asyncio.wait_for(conn.execute(text("SELECT 1")), DATABASE_CHECK_TIMEOUT)
+    except Exception as e:
+        logger.warning("Readiness check failed: %s", e)
+        return ORJSONResponse(status_code=503, content={"status": "database unavailable"})
+    return {"status": "ready"}
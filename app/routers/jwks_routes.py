@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Request, Response
+from app.dependencies import get_settings
+from app.services.jwt_service import get_key_ring
+from app.utils.etag import etag_matches
+
+router = APIRouter()
+settings = get_settings()
+
+@router.get("/.well-known/jwks.json", name="jwks", tags=["Login and Registration"])
+async def jwks(request: Request):
+    """Public keys for verifying access tokens locally, matched by the token's `kid` header."""
+    key_ring = get_key_ring()
+    headers = {"ETag": key_ring.jwks_etag, "Cache-Control": f"public, max-age={settings.jwks_max_age}"}
+    if etag_matches(request.headers.get("if-none-match"), key_ring.jwks_etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=key_ring.jwks, media_type="application/json", headers=headers)
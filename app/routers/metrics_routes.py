@@ -0,0 +1,53 @@
+from builtins import float
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.dependencies import get_login_throttle
+from app.services.user_cache import user_cache
+from app.utils.common import dropped_records
+from app.utils.metrics import CONTENT_TYPE, registry
+from app.utils.session_middleware import connection_hold_stats
+from app.utils.tracing import tracer
+
+router = APIRouter()
+
+def _user_cache_metrics():
+    stats = user_cache.stats()
+    yield ("user_cache_lookups_total", "counter", "User cache lookups by result.",
+           [({"result": "hit"}, stats["hits"]), ({"result": "miss"}, stats["misses"]),
+            ({"result": "coalesced"}, stats["coalesced"])])
+    yield ("user_cache_hit_ratio", "gauge", "Share of user cache lookups served from the cache.",
+           [({}, stats["hit_ratio"])])
+
+def _login_throttle_metrics():
+    stats = get_login_throttle().stats()
+    yield ("login_attempts_total", "counter", "Login attempts by throttle decision.",
+           [({"decision": decision}, float(count)) for decision, count in stats.items()])
+
+def _connection_hold_metrics():
+    routes = connection_hold_stats.snapshot()
+    yield ("db_connection_hold_seconds_total", "counter", "Time requests held a pooled connection, by route.",
+           [({"route": route}, entry["total_seconds"]) for route, entry in routes.items()])
+    yield ("db_connection_hold_requests_total", "counter", "Requests that held a pooled connection, by route.",
+           [({"route": route}, entry["requests"]) for route, entry in routes.items()])
+    yield ("db_connection_hold_max_seconds", "gauge", "Longest single connection hold, by route.",
+           [({"route": route}, entry["max_seconds"]) for route, entry in routes.items()])
+
+def _logging_metrics():
+    yield ("log_records_dropped_total", "counter", "Log records discarded because the log queue was full.",
+           [({}, dropped_records())])
+
+def _tracing_metrics():
+    dropped = tracer.exporter.dropped if tracer.exporter is not None else 0
+    yield ("trace_spans_dropped_total", "counter", "Spans discarded because the export queue was full.",
+           [({}, dropped)])
+
+registry.register_collector(_user_cache_metrics)
+registry.register_collector(_login_throttle_metrics)
+registry.register_collector(_connection_hold_metrics)
+registry.register_collector(_logging_metrics)
+registry.register_collector(_tracing_metrics)
+
+@router.get("/metrics", name="metrics", include_in_schema=False)
+async def metrics():
+    """This worker's metrics in the Prometheus text format."""
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
@@ -18,23 +18,35 @@ Key Highlights:
 - Utilizes OAuth2PasswordBearer for securing API endpoints, requiring valid access tokens for operations.
 """
 
-from builtins import dict, int, len, str
-from datetime import timedelta
+from builtins import bool, dict, int, len, str
+from datetime import datetime, timedelta
 import os
+from typing import Optional
 from uuid import UUID, uuid4
 from dotenv import load_dotenv
-from fastapi import APIRouter, Depends, HTTPException, Response, status, Request, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status, Request, UploadFile, File
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.dependencies import get_db, get_email_service, require_role, get_current_user
+from app.database import Database
+from app.dependencies import get_db, get_email_service, get_login_throttle, require_permission, get_current_user, get_current_user_record, throttle_login
 from app.schemas.pagination_schema import EnhancedPagination
-from app.schemas.token_schema import TokenResponse
-from app.schemas.user_schemas import LoginRequest, UserBase, UserCreate, UserListResponse, UserResponse, UserUpdate
-from app.services.user_service import UserService
-from app.services.jwt_service import create_access_token
+from app.schemas.token_schema import RefreshRequest, TokenResponse
+from app.schemas.user_schemas import BatchOperation, LoginRequest, SearchMode, UserBase, UserBatchRequest, UserBatchResponse, UserBatchResult, UserCreate, UserImportReport, UserListResponse, UserResponse, UserSearchFilters, UserSelfUpdate, UserUpdate
+from app.models.user_model import User, UserRole
+from app.services.export_service import MEDIA_TYPES, ExportFormat, parse_columns, stream_export
+from app.services.user_import_service import ImportFormat, UserImportService, read_upload_rows
+from app.services.session_service import SessionService
+from app.services.user_service import LoginStatus, UserService
+from app.services.jwt_service import create_access_token, token_subject
+from app.utils.permissions import Permission
+from app.utils.principal import Principal
+from app.utils.rate_limiter import LoginThrottle
+from app.utils.etag import etag_matches, fields_etag, strong_etag_matches
+from app.core.minio_client import storage_call
 from app.utils.link_generation import create_user_links, generate_pagination_links
 from app.dependencies import get_settings
-from app.services.email_service import EmailService
+from app.services.email_service import EmailService, email_outbox
 from app.utils.crud_profile_picture import upload_profile_picture
 from app.dependencies import get_minio_client
 
@@ -56,8 +68,62 @@ load_dotenv()
 MINIO_ACCESS_KEY = os.getenv("MINIO_ACCESS_KEY")
 MINIO_SECRET_KEY = os.getenv("MINIO_SECRET_KEY")
 MINIO_BUCKET_NAME = os.getenv("MINIO_BUCKET_NAME")
+
+# Declared before /users/{user_id} so "search" is not parsed as a user id.
+@router.get("/users/search", response_model=UserListResponse, name="search_users", tags=["User Management Requires (Admin or Manager Roles)"])
+async def search_users(
+    request: Request,
+    q: Optional[str] = Query(None, min_length=1, description="Search term matched against email, nickname and name"),
+    match: SearchMode = Query(SearchMode.CONTAINS, description="prefix: email/nickname starts with q; contains: substring of email, nickname or name"),
+    email: Optional[str] = Query(None, description="Exact email address"),
+    nickname: Optional[str] = Query(None, description="Exact nickname"),
+    role: Optional[UserRole] = Query(None),
+    is_locked: Optional[bool] = Query(None),
+    email_verified: Optional[bool] = Query(None),
+    is_professional: Optional[bool] = Query(None),
+    created_after: Optional[datetime] = Query(None, description="Inclusive lower bound on created_at"),
+    created_before: Optional[datetime] = Query(None, description="Exclusive upper bound on created_at"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_permission(Permission.USERS_SEARCH))
+):
+    filters = UserSearchFilters(
+        q=q, match=match, email=email, nickname=nickname, role=role, is_locked=is_locked,
+        email_verified=email_verified, is_professional=is_professional,
+        created_after=created_after, created_before=created_before,
+    )
+    total_users = await UserService.count_search(db, filters)
+    users = await UserService.search_users(db, filters, skip, limit)
+    user_responses = [UserResponse.model_validate(user) for user in users]
+    pagination_links = generate_pagination_links(request, skip, limit, total_users)
+    return UserListResponse(
+        items=user_responses,
+        total=total_users,
+        page=skip // limit + 1,
+        size=len(user_responses),
+        links=pagination_links
+    )
+
+@router.get("/users/export", name="export_users", response_class=StreamingResponse, tags=["User Management Requires (Admin Role)"])
+async def export_users(
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format"),
+    columns: Optional[str] = Query(None, description="Comma-separated columns to export; id is always included"),
+    after: Optional[UUID] = Query(None, description="Resume after this user id (the last id of an interrupted export)"),
+    current_user: Principal = Depends(require_permission(Permission.USERS_EXPORT))
+):
+    try:
+        selected = parse_columns(columns)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return StreamingResponse(
+        stream_export(Database.get_session_factory(), export_format, selected, after, settings.export_batch_size),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="users.{export_format.value}"'},
+    )
+
 @router.get("/users/{user_id}", response_model=UserResponse, name="get_user", tags=["User Management Requires (Admin or Manager Roles)"])
-async def get_user(user_id: UUID, request: Request, db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
+async def get_user(user_id: UUID, request: Request, db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme), current_user: Principal = Depends(require_permission(Permission.USERS_READ))):
     user = await UserService.get_by_id(db, user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
@@ -86,7 +152,7 @@ async def update_user(
     request: Request,
     db: AsyncSession = Depends(get_db),
     token: str = Depends(oauth2_scheme),
-    current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))
+    current_user: Principal = Depends(require_permission(Permission.USERS_UPDATE))
 ):
     # Extract updated fields from the request body
     user_data = user_update.model_dump(exclude_unset=True)
@@ -117,14 +183,14 @@ async def update_user(
 
 
 @router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT, name="delete_user", tags=["User Management Requires (Admin or Manager Roles)"])
-async def delete_user(user_id: UUID, db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
+async def delete_user(user_id: UUID, db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme), current_user: Principal = Depends(require_permission(Permission.USERS_DELETE))):
     success = await UserService.delete(db, user_id)
     if not success:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 @router.post("/users/", response_model=UserResponse, status_code=status.HTTP_201_CREATED, tags=["User Management Requires (Admin or Manager Roles)"], name="create_user")
-async def create_user(user: UserCreate, request: Request, db: AsyncSession = Depends(get_db), email_service: EmailService = Depends(get_email_service), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
+async def create_user(user: UserCreate, request: Request, db: AsyncSession = Depends(get_db), email_service: EmailService = Depends(get_email_service), token: str = Depends(oauth2_scheme), current_user: Principal = Depends(require_permission(Permission.USERS_CREATE))):
     existing_user = await UserService.get_by_email(db, user.email)
     if existing_user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already exists")
@@ -148,13 +214,45 @@ async def create_user(user: UserCreate, request: Request, db: AsyncSession = Dep
         links=create_user_links(created_user.id, request)
     )
 
+@router.post("/users/import", response_model=UserImportReport, name="import_users", tags=["User Management Requires (Admin Role)"])
+async def import_users(
+    file: UploadFile = File(..., description="CSV with a header row, or NDJSON with one user object per line"),
+    import_format: Optional[ImportFormat] = Query(None, alias="format", description="Defaults to the file extension"),
+    db: AsyncSession = Depends(get_db),
+    email_service: EmailService = Depends(get_email_service),
+    current_user: Principal = Depends(require_permission(Permission.USERS_IMPORT))
+):
+    if import_format is None:
+        extension = (file.filename or "").rsplit(".", 1)[-1].lower()
+        import_format = ImportFormat.CSV if extension == "csv" else ImportFormat.NDJSON
+    return await UserImportService.import_users(
+        db, read_upload_rows(file, import_format), email_service, email_outbox,
+        batch_size=settings.import_batch_size, hash_workers=settings.import_hash_workers,
+    )
+
+@router.post("/users/batch", response_model=UserBatchResponse, name="batch_update_users", tags=["User Management Requires (Admin Role)"])
+async def batch_update_users(
+    batch: UserBatchRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_permission(Permission.USERS_BATCH))
+):
+    affected = set(await UserService.batch_mutate(db, batch.ids, batch.operation, batch.role))
+    done = "deleted" if batch.operation == BatchOperation.DELETE else "updated"
+    results = [UserBatchResult(id=user_id, status=done if user_id in affected else "not_found") for user_id in dict.fromkeys(batch.ids)]
+    return UserBatchResponse(
+        operation=batch.operation,
+        succeeded=len(affected),
+        not_found=len(results) - len(affected),
+        results=results,
+    )
+
 @router.get("/users/", response_model=UserListResponse, tags=["User Management Requires (Admin or Manager Roles)"])
 async def list_users(
     request: Request,
     skip: int = 0,
     limit: int = 10,
     db: AsyncSession = Depends(get_db),
-    current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))  # Pass a list of roles
+    current_user: Principal = Depends(require_permission(Permission.USERS_READ))
 ):
     total_users = await UserService.count(db)
     users = await UserService.list_users(db, skip, limit)
@@ -176,19 +274,43 @@ async def register(user_data: UserCreate, session: AsyncSession = Depends(get_db
     raise HTTPException(status_code=400, detail="Email already exists")
 
 @router.post("/login/", response_model=TokenResponse, tags=["Login and Registration"])
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), session: AsyncSession = Depends(get_db)):
-    if await UserService.is_account_locked(session, form_data.username):
+async def login(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    _: None = Depends(throttle_login),
+    throttle: LoginThrottle = Depends(get_login_throttle),
+    session: AsyncSession = Depends(get_db)
+):
+    outcome, user = await UserService.authenticate(session, form_data.username, form_data.password)
+    if outcome == LoginStatus.LOCKED:
         raise HTTPException(status_code=400, detail="Account locked due to too many failed login attempts.")
-    user = await UserService.login_user(session, form_data.username, form_data.password)
     if user:
-        access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
-        access_token = create_access_token(
-            data={"sub": user.email, "role": str(user.role.name)},
-            expires_delta=access_token_expires
-        )
-        return {"access_token": access_token, "token_type": "bearer"}
+        await throttle.record_success(form_data.username)
+        refresh_token = await SessionService.issue(session, user)
+        return _token_response(user, refresh_token)
     raise HTTPException(status_code=401, detail="Incorrect email or password.")
 
+def _token_response(user, refresh_token: str) -> dict:
+    access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
+    access_token = create_access_token(
+        data={"sub": token_subject(user), "role": str(user.role.name)},
+        expires_delta=access_token_expires
+    )
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+@router.post("/token/refresh", response_model=TokenResponse, name="refresh_token", tags=["Login and Registration"])
+async def refresh_access_token(body: RefreshRequest, session: AsyncSession = Depends(get_db)):
+    """Exchange a refresh token for a new access token and a rotated refresh token, without a password check."""
+    rotated = await SessionService.rotate(session, body.refresh_token)
+    if rotated is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired refresh token.")
+    user, refresh_token = rotated
+    return _token_response(user, refresh_token)
+
+@router.post("/logout/", status_code=status.HTTP_204_NO_CONTENT, name="logout", tags=["Login and Registration"])
+async def logout(body: RefreshRequest, session: AsyncSession = Depends(get_db)):
+    await SessionService.revoke(session, body.refresh_token)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
 @router.get("/verify-email/{user_id}/{token}", status_code=status.HTTP_200_OK, name="verify_email", tags=["Login and Registration"])
 async def verify_email(user_id: UUID, token: str, db: AsyncSession = Depends(get_db), email_service: EmailService = Depends(get_email_service)):
     if await UserService.verify_email_with_token(db, user_id, token):
@@ -207,7 +329,7 @@ ALLOWED_CONTENT_TYPES = ["image/jpeg", "image/png"]
 async def upload_profile_picture_route(
     file: UploadFile = File(...),
     db: AsyncSession = Depends(get_db),
-    current_user: dict = Depends(get_current_user)
+    current_user: Principal = Depends(require_permission(Permission.PROFILE_UPDATE))
 ):
     # Validate presence of file
     if not file:
@@ -230,8 +352,11 @@ async def upload_profile_picture_route(
 
     # Ensure bucket exists in MinIO
     try:
-        if not client.bucket_exists(MINIO_BUCKET_NAME):
-            client.make_bucket(MINIO_BUCKET_NAME)
+        with storage_call("bucket_exists"):
+            exists = client.bucket_exists(MINIO_BUCKET_NAME)
+        if not exists:
+            with storage_call("make_bucket"):
+                client.make_bucket(MINIO_BUCKET_NAME)
     except Exception:
         logger.exception("MinIO bucket creation failed.")
         raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail="Configured storage bucket does not exist.")
@@ -241,13 +366,14 @@ async def upload_profile_picture_route(
         file_ext = file.filename.split(".")[-1]
         filename = f"profile-pics/{uuid4()}.{file_ext}"
 
-        client.put_object(
-            bucket_name=MINIO_BUCKET_NAME,
-            object_name=filename,
-            data=file.file,
-            length=len(content),
-            content_type=file.content_type,
-        )
+        with storage_call("put_object"):
+            client.put_object(
+                bucket_name=MINIO_BUCKET_NAME,
+                object_name=filename,
+                data=file.file,
+                length=len(content),
+                content_type=file.content_type,
+            )
 
         profile_picture_url = f"{MINIO_BUCKET_NAME}/{filename}"
 
@@ -264,7 +390,7 @@ async def upload_profile_picture_route(
 
     # Update user profile in database
     try:
-        updated = await UserService.update(db, current_user["id"], {"profile_picture_url": profile_picture_url})
+        updated = await UserService.update_profile(db, current_user.id, {"profile_picture_url": profile_picture_url})
         if not updated:
             raise HTTPException(status_code=HTTP_500_INTERNAL_SERVER_ERROR, detail="Profile update failed.")
     except HTTPException:
@@ -273,4 +399,53 @@ async def upload_profile_picture_route(
         logger.exception("Failed to update profile_picture_url in database")
         raise HTTPException(status_code=HTTP_500_INTERNAL_SERVER_ERROR, detail="Profile update failed.")
 
-    return {"message": "Profile picture uploaded successfully.", "profile_picture_url": profile_picture_url}
\ No newline at end of file
+    return {"message": "Profile picture uploaded successfully.", "profile_picture_url": profile_picture_url}
+
+# Self-service profile. Responses carry a strong ETag over the returned fields, so polling
+# clients revalidate with If-None-Match and editors guard PATCH with If-Match.
+ME_CACHE_CONTROL = "private, no-cache"
+PROFILE_FIELDS = tuple(UserResponse.model_fields)
+
+def profile_etag(user: User) -> str:
+    """Strong ETag over the fields /me returns; login bookkeeping and locks leave it alone."""
+    return fields_etag(getattr(user, field) for field in PROFILE_FIELDS)
+
+@router.get("/me", response_model=UserResponse, name="get_me", tags=["User Management Requires (Authenticated Users)"], responses={304: {"description": "Not modified"}})
+async def get_me(
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(require_permission(Permission.PROFILE_READ)),
+    user: User = Depends(get_current_user_record),
+):
+    # The row comes from the database, the same source If-Match is checked against,
+    # so an ETag handed out here never disagrees with PATCH /me in another worker.
+    etag = profile_etag(user)
+    headers = {"ETag": etag, "Cache-Control": ME_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return UserResponse.model_validate(user)
+
+@router.patch("/me", response_model=UserResponse, name="update_me", tags=["User Management Requires (Authenticated Users)"], responses={412: {"description": "The profile changed since the If-Match ETag was issued"}})
+async def update_me(
+    user_update: UserSelfUpdate,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_permission(Permission.PROFILE_UPDATE))
+):
+    if_match = request.headers.get("if-match")
+    if if_match:
+        # Locks the row, so no other write lands between this check and the update.
+        current = await UserService.get_for_update(db, current_user.id)
+        if current is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+        if not strong_etag_matches(if_match, profile_etag(current)):
+            await db.rollback()
+            raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Profile was modified; fetch it again before updating")
+    user = await UserService.update_profile(db, current_user.id, user_update.model_dump(exclude_unset=True))
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    response.headers["ETag"] = profile_etag(user)
+    response.headers["Cache-Control"] = ME_CACHE_CONTROL
+    return UserResponse.model_validate(user)
@@ -54,6 +54,27 @@ class UserUpdate(UserBase):
             raise ValueError("At least one field must be provided for update")
         return values
 
+class UserSelfUpdate(BaseModel):
+    """Profile fields a user may change on their own account via PATCH /me."""
+    first_name: Optional[str] = Field(None, example="John")
+    last_name: Optional[str] = Field(None, example="Doe")
+    bio: Optional[str] = Field(None, example="Experienced software developer specializing in web applications.")
+    profile_picture_url: Optional[str] = Field(None, example="https://example.com/profiles/john.jpg")
+    linkedin_profile_url: Optional[str] = Field(None, example="https://linkedin.com/in/johndoe")
+    github_profile_url: Optional[str] = Field(None, example="https://github.com/johndoe")
+
+    _validate_urls = validator('profile_picture_url', 'linkedin_profile_url', 'github_profile_url', pre=True, allow_reuse=True)(validate_url)
+
+    @root_validator(pre=True)
+    def check_at_least_one_value(cls, values):
+        if not any(values.values()):
+            raise ValueError("At least one field must be provided for update")
+        return values
+
+    class Config:
+        # Email, nickname and role are not self-service; reject them instead of ignoring them.
+        extra = "forbid"
+
 class UserResponse(UserBase):
     id: uuid.UUID = Field(..., example=uuid.uuid4())
     email: EmailStr = Field(..., example="john.doe@example.com")
@@ -69,6 +90,23 @@ class ErrorResponse(BaseModel):
     error: str = Field(..., example="Not Found")
     details: Optional[str] = Field(None, example="The requested resource was not found.")
 
+class SearchMode(str, Enum):
+    """How the free-text `q` term is matched against email, nickname and name."""
+    PREFIX = "prefix"
+    CONTAINS = "contains"
+
+class UserSearchFilters(BaseModel):
+    q: Optional[str] = Field(None, min_length=1, example="john")
+    match: SearchMode = Field(SearchMode.CONTAINS, example="prefix")
+    email: Optional[str] = Field(None, example="john.doe@example.com")
+    nickname: Optional[str] = Field(None, example="john_doe123")
+    role: Optional[UserRole] = Field(None, example="AUTHENTICATED")
+    is_locked: Optional[bool] = Field(None, example=False)
+    email_verified: Optional[bool] = Field(None, example=True)
+    is_professional: Optional[bool] = Field(None, example=False)
+    created_after: Optional[datetime] = Field(None, example="2024-01-01T00:00:00Z")
+    created_before: Optional[datetime] = Field(None, example="2024-12-31T23:59:59Z")
+
 class UserListResponse(BaseModel):
     items: List[UserResponse] = Field(..., example=[{
         "id": uuid.uuid4(), "nickname": generate_nickname(), "email": "john.doe@example.com",
@@ -81,3 +119,41 @@ class UserListResponse(BaseModel):
     total: int = Field(..., example=100)
     page: int = Field(..., example=1)
     size: int = Field(..., example=10)
+
+class BatchOperation(str, Enum):
+    LOCK = "lock"
+    UNLOCK = "unlock"
+    DELETE = "delete"
+    SET_ROLE = "set_role"
+
+class UserBatchRequest(BaseModel):
+    ids: List[uuid.UUID] = Field(..., min_length=1, max_length=10000, example=[uuid.uuid4()])
+    operation: BatchOperation = Field(..., example="lock")
+    role: Optional[UserRole] = Field(None, example="MANAGER", description="Required for set_role")
+
+    @root_validator(skip_on_failure=True)
+    def check_role_for_set_role(cls, values):
+        if (values.get("operation") == BatchOperation.SET_ROLE) != (values.get("role") is not None):
+            raise ValueError("role must be provided for set_role and only for set_role")
+        return values
+
+class UserBatchResult(BaseModel):
+    id: uuid.UUID
+    status: str = Field(..., example="updated", description="updated, deleted or not_found")
+
+class UserBatchResponse(BaseModel):
+    operation: BatchOperation
+    succeeded: int = Field(..., example=9998)
+    not_found: int = Field(..., example=2)
+    results: List[UserBatchResult]
+
+class ImportRowError(BaseModel):
+    row: int = Field(..., example=3)
+    email: Optional[str] = Field(None, example="john.doe@example.com")
+    errors: List[str] = Field(..., example=["email: Email already exists"])
+
+class UserImportReport(BaseModel):
+    total: int = Field(..., example=100)
+    created: int = Field(..., example=98)
+    failed: int = Field(..., example=2)
+    errors: List[ImportRowError] = Field(default_factory=list)
@@ -0,0 +1,75 @@
+"""
+Production entry point: `python -m app.server`.
+
+Runs uvicorn with one worker process per available CPU (or `server_workers`), using
+uvloop and httptools when they are installed, with keep-alive, backlog and concurrency
+limits from settings. With `database_max_connections` set, each worker's pool gets an
+equal share of that budget, so adding workers never exceeds what the database allows.
+
+On SIGTERM each worker stops accepting connections, waits up to
+`server_graceful_shutdown_seconds` for in-flight requests, then runs the app's lifespan
+shutdown, which drains the email outbox and closes the pool.
+"""
+from builtins import AttributeError, bool, int, len, max, str
+import importlib.util
+import logging
+import os
+
+import uvicorn
+
+from app.dependencies import get_settings
+from app.utils.common import setup_logging
+
+logger = logging.getLogger(__name__)
+
+def available_cpus() -> int:
+    """CPUs this process may run on, which inside a container can be fewer than the host has."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS or Windows
+        return os.cpu_count() or 1
+
+def worker_count(configured: int) -> int:
+    return configured if configured > 0 else available_cpus()
+
+def pool_size_per_worker(max_connections: int, workers: int) -> int:
+    """Each worker's equal share of the database connection budget, at least one."""
+    return max(1, max_connections // workers)
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+def main() -> None:
+    setup_logging()
+    settings = get_settings()
+    workers = worker_count(settings.server_workers)
+    if settings.database_max_connections > 0:
+        # Workers build their own settings from the environment they inherit.
+        os.environ["DATABASE_POOL_SIZE"] = str(pool_size_per_worker(settings.database_max_connections, workers))
+        os.environ["DATABASE_MAX_OVERFLOW"] = "0"
+    if workers > 1 and not settings.user_cache_url:
+        logger.warning(
+            "%d workers share no user cache (user_cache_url is unset); a user changed through one "
+            "worker can be served stale by another for up to %ss", workers, settings.user_cache_ttl_seconds,
+        )
+    loop = "uvloop" if _installed("uvloop") else "asyncio"
+    http = "httptools" if _installed("httptools") else "h11"
+    logger.info("Starting %d workers on %s:%d (loop=%s, http=%s)", workers, settings.server_host, settings.server_port, loop, http)
+    uvicorn.run(
+        "app.main:app",
+        host=settings.server_host,
+        port=settings.server_port,
+        workers=workers,
+        loop=loop,
+        http=http,
+        backlog=settings.server_backlog,
+        timeout_keep_alive=settings.server_keep_alive_seconds,
+        limit_concurrency=settings.server_limit_concurrency,
+        timeout_graceful_shutdown=settings.server_graceful_shutdown_seconds,
+        proxy_headers=settings.trust_proxy_headers,
+        # uvicorn's loggers go through setup_logging's queue, which each worker's lifespan installs.
+        log_config=None,
+    )
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,15 @@
 # email_service.py
-from builtins import ValueError, dict, str
+from builtins import Exception, ValueError, dict, str
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
 from settings.config import settings
 from app.utils.smtp_connection import SMTPClient
 from app.utils.template_manager import TemplateManager
 from app.models.user_model import User
 
+logger = logging.getLogger(__name__)
+
 class EmailService:
     def __init__(self, template_manager: TemplateManager):
         self.smtp_client = SMTPClient(
@@ -26,7 +31,8 @@ class EmailService:
             raise ValueError("Invalid email type")
 
         html_content = self.template_manager.render_template(email_type, **user_data)
-        self.smtp_client.send_email(subject_map[email_type], html_content, user_data['email'])
+        # smtplib blocks for the whole SMTP exchange; keep it off the event loop.
+        await asyncio.to_thread(self.smtp_client.send_email, subject_map[email_type], html_content, user_data['email'])
 
     async def send_verification_email(self, user: User):
         verification_url = f"{settings.server_base_url}verify-email/{user.id}/{user.verification_token}"
@@ -34,4 +40,51 @@ class EmailService:
             "name": user.first_name,
             "verification_url": verification_url,
             "email": user.email
-        }, 'email_verification')
\ No newline at end of file
+        }, 'email_verification')
+
+class EmailOutbox:
+    """
+    In-process queue of pending email sends, worked off by a single background task
+    so bulk operations can respond before every message has gone out. The worker is
+    started on first use; `drain` waits for queued sends to finish (e.g. on shutdown).
+    """
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def enqueue(self, send: Callable[[], Awaitable[None]]):
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        self._queue.put_nowait(send)
+
+    def enqueue_verification(self, email_service: EmailService, user: User):
+        self.enqueue(lambda: email_service.send_verification_email(user))
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _run(self):
+        while True:
+            send = await self._queue.get()
+            try:
+                await send()
+            except Exception as e:
+                logger.error("Queued email send failed: %s", e)
+            finally:
+                self._queue.task_done()
+
+    async def drain(self, timeout: Optional[float] = None):
+        """Wait until every queued email has been attempted, then stop the worker."""
+        if self._queue is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Email outbox drain timed out with %d messages pending", self.pending)
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
+email_outbox = EmailOutbox()
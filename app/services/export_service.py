@@ -0,0 +1,83 @@
+from builtins import dict, len, list, str, tuple
+import csv
+import io
+import json
+from datetime import datetime
+from enum import Enum
+from typing import AsyncIterator, Callable, List, Optional, Sequence
+from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.services.user_service import UserService
+
+# Columns that may be exported. Secrets (hashed_password, verification_token) are never exposed.
+EXPORTABLE_COLUMNS = (
+    "id", "nickname", "email", "first_name", "last_name", "bio", "profile_picture_url",
+    "linkedin_profile_url", "github_profile_url", "role", "is_professional", "email_verified",
+    "is_locked", "last_login_at", "created_at", "updated_at",
+)
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+def parse_columns(columns: Optional[str]) -> List[str]:
+    """
+    Resolve a comma-separated column list. `id` is always exported first so a client
+    can resume an interrupted export by passing the last id it received as `after`.
+    """
+    if not columns:
+        return list(EXPORTABLE_COLUMNS)
+    selected = ["id"]
+    for name in (c.strip() for c in columns.split(",")):
+        if not name or name in selected:
+            continue
+        if name not in EXPORTABLE_COLUMNS:
+            raise ValueError(f"Unknown export column: {name}")
+        selected.append(name)
+    return selected
+
+def _plain(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+def encode_ndjson(columns: Sequence[str], rows: Sequence[tuple]) -> str:
+    return "".join(json.dumps(dict(zip(columns, map(_plain, row))), separators=(",", ":")) + "\n" for row in rows)
+
+def encode_csv(columns: Sequence[str], rows: Sequence[tuple]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([_plain(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+def csv_header(columns: Sequence[str]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(columns)
+    return buffer.getvalue()
+
+async def stream_export(
+    session_factory: Callable[[], AsyncSession],
+    export_format: ExportFormat,
+    columns: Sequence[str],
+    after: Optional[UUID] = None,
+    batch_size: int = 1000,
+) -> AsyncIterator[str]:
+    """
+    Yield the encoded export one partition at a time. The generator owns its session
+    because the response body is produced after request dependencies have been closed.
+    """
+    encode = encode_ndjson if export_format == ExportFormat.NDJSON else encode_csv
+    if export_format == ExportFormat.CSV:
+        yield csv_header(columns)
+    async with session_factory() as session:
+        async for rows in UserService.stream_users(session, columns, after=after, batch_size=batch_size):
+            yield encode(columns, rows)
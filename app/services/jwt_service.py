@@ -1,23 +1,45 @@
 # app/services/jwt_service.py
 from builtins import dict, str
+from functools import lru_cache
+import uuid
 import jwt
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from app.utils.key_ring import KeyRing
+from app.utils.permissions import permissions_for
 from settings.config import settings
 
+@lru_cache(maxsize=None)
+def get_key_ring() -> KeyRing:
+    """
+    The process-wide key ring. Asymmetric algorithms load keys from `jwt_key_dir`;
+    HS256 keeps signing with `jwt_secret_key`.
+    """
+    if settings.jwt_algorithm.startswith("HS"):
+        return KeyRing.from_secret(settings.jwt_secret_key, settings.jwt_algorithm)
+    return KeyRing.from_directory(settings.jwt_key_dir, settings.jwt_algorithm, settings.jwt_active_kid)
+
+def token_subject(user) -> str:
+    """The `sub` claim for `user`'s tokens (their id); revocations are keyed on the same value."""
+    return str(user.id)
+
 def create_access_token(*, data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     # Convert role to uppercase before encoding the JWT
     if 'role' in to_encode:
         to_encode['role'] = to_encode['role'].upper()
-    expire = datetime.utcnow() + (expires_delta if expires_delta else timedelta(minutes=settings.access_token_expire_minutes))
-    to_encode.update({"exp": expire})
+        # Guards check this precomputed mask instead of comparing role names.
+        to_encode.setdefault('perms', permissions_for(to_encode['role']))
+    now = datetime.now(timezone.utc)
+    expire = now + (expires_delta if expires_delta else timedelta(minutes=settings.access_token_expire_minutes))
+    # `iat` is whole seconds; `iat_us` lets revocation cutoffs tell apart tokens issued
+    # just before and just after them within the same second.
+    iat_us = int(now.timestamp()) * 1_000_000 + now.microsecond
+    to_encode.update({"exp": expire, "iat": now, "iat_us": iat_us, "jti": uuid.uuid4().hex})
     to_encode.update({"user_id": data["sub"]}) # Add userid
-    encoded_jwt = jwt.encode(to_encode, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
-    return encoded_jwt
+    return get_key_ring().sign(to_encode)
 
 def decode_token(token: str):
     try:
-        decoded = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
-        return decoded
+        return get_key_ring().verify(token)
     except jwt.PyJWTError:
-        return None
\ No newline at end of file
+        return None
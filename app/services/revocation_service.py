@@ -0,0 +1,144 @@
+from builtins import Exception, bool, classmethod, dict, int, len, max, set, str
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Set
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.token_revocation_model import TokenRevocation
+from settings.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+def to_micros(moment: datetime) -> int:
+    """Microseconds since the epoch, exactly (no float rounding); naive datetimes are UTC."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp()) * 1_000_000 + moment.microsecond
+
+def issued_at_micros(payload: dict) -> int:
+    """
+    When a token was issued, in microseconds. `iat` only has whole seconds, so tokens
+    carry `iat_us` as well; without it the start of the `iat` second is assumed, which
+    errs towards treating the token as older.
+    """
+    if "iat_us" in payload:
+        return int(payload["iat_us"])
+    return int(payload.get("iat", 0)) * 1_000_000
+
+class RevocationList:
+    """
+    In-memory snapshot of the token deny list, consulted on every authenticated request.
+    Both structures are hash lookups and are skipped entirely while empty, so a token
+    that was not revoked costs a couple of dict probes and never touches the database.
+    Subject cutoffs are in microseconds, so a token issued right after a revocation (a
+    user logging back in after an unlock or role change) is not caught by it.
+    """
+
+    def __init__(self):
+        self._jtis: Set[str] = set()
+        self._subjects: Dict[str, int] = {}
+
+    def is_revoked(self, payload: dict) -> bool:
+        if self._jtis and payload.get("jti") in self._jtis:
+            return True
+        if self._subjects:
+            revoked_before = self._subjects.get(payload.get("sub"))
+            if revoked_before is not None and issued_at_micros(payload) <= revoked_before:
+                return True
+        return False
+
+    def add_jti(self, jti: str):
+        self._jtis.add(jti)
+
+    def add_subject(self, subject: str, revoked_before: int):
+        self._subjects[subject] = max(revoked_before, self._subjects.get(subject, revoked_before))
+
+    def replace(self, jtis: Set[str], subjects: Dict[str, int]):
+        self._jtis, self._subjects = jtis, subjects
+
+    def clear(self):
+        self.replace(set(), {})
+
+    def __len__(self) -> int:
+        return len(self._jtis) + len(self._subjects)
+
+revocation_list = RevocationList()
+
+class RevocationService:
+    """
+    Persists revocations in `token_revocations` and keeps `revocation_list` in sync. A
+    revocation takes effect immediately in the worker that records it; other workers
+    pick it up on their next `refresh`, every `revocation_refresh_seconds`.
+    """
+
+    @classmethod
+    async def revoke_token(cls, session: AsyncSession, jti: str, expires_at: datetime, commit: bool = True):
+        """Revoke a single access token by its `jti` claim."""
+        await session.execute(insert(TokenRevocation).values(jti=jti, expires_at=expires_at))
+        if commit:
+            await session.commit()
+        revocation_list.add_jti(jti)
+
+    @classmethod
+    async def revoke_subjects(cls, session: AsyncSession, subjects: Iterable[str], commit: bool = True):
+        """Revoke every access token issued so far to each of `subjects`."""
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(minutes=settings.access_token_expire_minutes)
+        values = [{"subject": subject, "revoked_before": now, "expires_at": expires_at} for subject in dict.fromkeys(subjects)]
+        if not values:
+            return
+        await session.execute(insert(TokenRevocation), values)
+        if commit:
+            await session.commit()
+        for value in values:
+            revocation_list.add_subject(value["subject"], to_micros(now))
+
+    @classmethod
+    async def refresh(cls, session: AsyncSession) -> int:
+        """Reload the unexpired deny list from the database and swap it in."""
+        result = await session.execute(
+            select(TokenRevocation.jti, TokenRevocation.subject, TokenRevocation.revoked_before)
+            .where(TokenRevocation.expires_at > func.now())
+        )
+        jtis: Set[str] = set()
+        subjects: Dict[str, int] = {}
+        for jti, subject, revoked_before in result:
+            if jti is not None:
+                jtis.add(jti)
+            if subject is not None and revoked_before is not None:
+                subjects[subject] = max(to_micros(revoked_before), subjects.get(subject, 0))
+        revocation_list.replace(jtis, subjects)
+        return len(revocation_list)
+
+    @classmethod
+    async def purge_expired(cls, session: AsyncSession) -> int:
+        """Delete entries whose tokens have all expired."""
+        result = await session.execute(
+            delete(TokenRevocation).where(TokenRevocation.expires_at <= func.now()).execution_options(synchronize_session=False)
+        )
+        await session.commit()
+        return result.rowcount
+
+    @classmethod
+    async def run_refresher(cls, session_factory, interval: float, purge_every: int = 20):
+        """
+        Background loop: refresh the deny list every `interval` seconds and, every
+        `purge_every` rounds, delete expired revocations and refresh-token sessions.
+        """
+        # Imported here: session_service depends on app.dependencies, which imports this module.
+        from app.services.session_service import SessionService
+        rounds = 0
+        while True:
+            try:
+                async with session_factory() as session:
+                    await cls.refresh(session)
+                    if rounds % purge_every == 0:
+                        await cls.purge_expired(session)
+                        await SessionService.purge_expired(session)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Refreshing the token revocation list failed: %s", e)
+            rounds += 1
+            await asyncio.sleep(interval)
@@ -0,0 +1,121 @@
+from builtins import bytes, classmethod, str
+from datetime import datetime, timedelta, timezone
+import hashlib
+import secrets
+from typing import Optional, Sequence, Tuple
+from uuid import UUID, uuid4
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.dependencies import get_settings
+from app.models.session_model import UserSession
+from app.models.user_model import User
+import logging
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+def hash_refresh_token(token: str) -> bytes:
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+class SessionService:
+    """
+    Issues and rotates opaque refresh tokens. Every refresh replaces the presented
+    token with a new one from the same family; presenting a token that was already
+    rotated is treated as theft and revokes the whole family.
+    """
+
+    @classmethod
+    async def issue(cls, session: AsyncSession, user: User, family_id: Optional[UUID] = None, commit: bool = True) -> str:
+        token = secrets.token_urlsafe(32)
+        session.add(UserSession(
+            user_id=user.id,
+            family_id=family_id or uuid4(),
+            token_hash=hash_refresh_token(token),
+            expires_at=datetime.now(timezone.utc) + timedelta(minutes=settings.refresh_token_expire_minutes),
+        ))
+        if commit:
+            await session.commit()
+        return token
+
+    @classmethod
+    async def rotate(cls, session: AsyncSession, refresh_token: str) -> Optional[Tuple[User, str]]:
+        """
+        Exchange a refresh token for its owner and a new refresh token. Costs one
+        indexed lookup on the token digest, one conditional UPDATE and one INSERT.
+        """
+        query = (
+            select(UserSession, User, (UserSession.expires_at > func.now()).label("active"))
+            .join(User, User.id == UserSession.user_id)
+            .where(UserSession.token_hash == hash_refresh_token(refresh_token))
+        )
+        row = (await session.execute(query)).first()
+        if row is None:
+            return None
+        user_session, user, active = row
+        if user_session.revoked_at is not None:
+            logger.warning("Refresh token reuse detected for user %s; revoking session family.", user.id)
+            await cls.revoke_family(session, user_session.family_id)
+            return None
+        if not active or user.is_locked:
+            return None
+        # Guarded so that two concurrent refreshes with the same token cannot both succeed.
+        claimed = await session.execute(
+            update(UserSession)
+            .where(UserSession.id == user_session.id, UserSession.revoked_at.is_(None))
+            .values(revoked_at=func.now())
+            .returning(UserSession.id)
+            .execution_options(synchronize_session=False)
+        )
+        if claimed.first() is None:
+            await session.rollback()
+            logger.warning("Concurrent refresh token reuse for user %s; revoking session family.", user.id)
+            await cls.revoke_family(session, user_session.family_id)
+            return None
+        new_token = await cls.issue(session, user, family_id=user_session.family_id)
+        return user, new_token
+
+    @classmethod
+    async def revoke(cls, session: AsyncSession, refresh_token: str) -> bool:
+        """Log out: revoke the family the presented token belongs to."""
+        query = select(UserSession.family_id).where(UserSession.token_hash == hash_refresh_token(refresh_token))
+        family_id = (await session.execute(query)).scalar()
+        if family_id is None:
+            return False
+        await cls.revoke_family(session, family_id)
+        return True
+
+    @classmethod
+    async def revoke_family(cls, session: AsyncSession, family_id: UUID):
+        await session.execute(
+            update(UserSession)
+            .where(UserSession.family_id == family_id, UserSession.revoked_at.is_(None))
+            .values(revoked_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+
+    @classmethod
+    async def revoke_user(cls, session: AsyncSession, user_id: UUID, commit: bool = True):
+        await cls.revoke_users(session, [user_id], commit=commit)
+
+    @classmethod
+    async def revoke_users(cls, session: AsyncSession, user_ids: Sequence[UUID], commit: bool = True):
+        if not user_ids:
+            return
+        await session.execute(
+            update(UserSession)
+            .where(UserSession.user_id.in_(user_ids), UserSession.revoked_at.is_(None))
+            .values(revoked_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        if commit:
+            await session.commit()
+
+    @classmethod
+    async def purge_expired(cls, session: AsyncSession) -> int:
+        """Delete sessions past their expiry so the table only holds live tokens."""
+        result = await session.execute(
+            delete(UserSession).where(UserSession.expires_at < func.now()).execution_options(synchronize_session=False)
+        )
+        await session.commit()
+        return result.rowcount
@@ -0,0 +1,178 @@
+from builtins import BaseException, any, bytes, dict, float, int, isinstance, issubclass, str
+import asyncio
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Optional
+from uuid import UUID
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+from app.models.user_model import User
+from app.utils.cache import CacheBackend, InMemoryLRUCache, RedisCache
+from settings.config import settings
+
+# Secrets are never cached; on instances served from the cache they are simply unloaded.
+EXCLUDED_COLUMNS = {"hashed_password", "verification_token"}
+CACHED_COLUMNS = {
+    attr.key: attr.columns[0].type.python_type
+    for attr in inspect(User).column_attrs
+    if attr.key not in EXCLUDED_COLUMNS
+}
+
+def dumps_snapshot(snapshot: Dict[str, Any]) -> bytes:
+    """JSON codec for shared backends: UUIDs and datetimes as strings, enums by name."""
+    def encode(value):
+        if isinstance(value, Enum):
+            return value.name
+        if isinstance(value, (UUID, datetime)):
+            return value.isoformat() if isinstance(value, datetime) else str(value)
+        return value
+    return json.dumps({key: encode(value) for key, value in snapshot.items()}, separators=(",", ":")).encode("utf-8")
+
+def loads_snapshot(data: bytes) -> Dict[str, Any]:
+    def decode(python_type, value):
+        if value is None:
+            return None
+        if issubclass(python_type, Enum):
+            return python_type[value]
+        if python_type is UUID:
+            return UUID(value)
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+        return value
+    return {key: decode(CACHED_COLUMNS[key], value) for key, value in json.loads(data).items() if key in CACHED_COLUMNS}
+
+class UserCache:
+    """
+    Read-through cache for user lookups by id and email. Entries are column snapshots,
+    not ORM objects: a hit rebuilds the user and merges it into the caller's session
+    without a query, so callers still get a normal persistent instance.
+
+    Concurrent misses for the same key share one database load (single-flight), and a
+    load that overlaps an invalidation is returned but not stored, so a write that
+    commits mid-load cannot be papered over by the stale row.
+
+    Invalidation only reaches the backend it is called on. With the default in-process
+    backend, each worker has its own copy, and after a write another worker can serve
+    the old row for up to `ttl` seconds (`user_cache_ttl_seconds`). Deployments running
+    more than one worker should set `user_cache_url` to share one cache, or lower the
+    TTL to the staleness they can accept.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._inflight: Dict[str, "asyncio.Future"] = {}
+        self._invalidations = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced, "hit_ratio": self.hit_ratio}
+
+    async def get_by_id(self, session: AsyncSession, user_id: UUID, load: Callable[[], Awaitable[Optional[User]]]) -> Optional[User]:
+        if not self.enabled:
+            return await load()
+        key = f"user:{user_id}"
+        snapshot = await self.backend.get(key)
+        if snapshot is not None:
+            self.hits += 1
+            return await self._attach(session, snapshot)
+        self.misses += 1
+        return await self._load(session, key, load)
+
+    async def get_by_email(self, session: AsyncSession, email: str, load: Callable[[], Awaitable[Optional[User]]]) -> Optional[User]:
+        """
+        Emails map to ids; the id entry is authoritative and must still carry this email.
+        The mapping is stored as a one-column snapshot, `{"id": ...}`, so it goes through
+        the same codec as the user entries on shared backends.
+        """
+        if not self.enabled:
+            return await load()
+        mapping = await self.backend.get(f"email:{email}")
+        if mapping is not None:
+            snapshot = await self.backend.get(f"user:{mapping['id']}")
+            if snapshot is not None and snapshot["email"] == email:
+                self.hits += 1
+                return await self._attach(session, snapshot)
+        self.misses += 1
+        return await self._load(session, f"email:{email}", load)
+
+    async def invalidate(self, *user_ids: UUID) -> None:
+        """Drop cached users. Call after the write that changed them has committed."""
+        self._invalidations += 1
+        if user_ids:
+            await self.backend.delete(*(f"user:{user_id}" for user_id in user_ids))
+
+    async def clear(self) -> None:
+        self._invalidations += 1
+        await self.backend.clear()
+        self.hits = self.misses = self.coalesced = 0
+
+    async def _load(self, session: AsyncSession, key: str, load: Callable[[], Awaitable[Optional[User]]]) -> Optional[User]:
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            await asyncio.wait([pending])
+            if not pending.cancelled() and pending.exception() is None:
+                found, snapshot = pending.result()
+                if not found:
+                    return None
+                if snapshot is not None:
+                    return await self._attach(session, snapshot)
+            # The leading load failed or its row could not be snapshotted; load for ourselves.
+            return await load()
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generation = self._invalidations
+        try:
+            user = await load()
+            snapshot = self._snapshot(user) if user is not None else None
+            if snapshot is not None and generation == self._invalidations:
+                await self.backend.set(f"user:{user.id}", snapshot, self.ttl)
+                await self.backend.set(f"email:{user.email}", {"id": user.id}, self.ttl)
+            future.set_result((user is not None, snapshot))
+            return user
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception()  # followers handle it; don't log it as unretrieved
+            raise
+        finally:
+            del self._inflight[key]
+
+    @staticmethod
+    def _snapshot(user: User) -> Optional[Dict[str, Any]]:
+        state = user.__dict__
+        if any(key not in state for key in CACHED_COLUMNS):
+            return None  # expired or deferred attributes; caching would invent NULLs
+        return {key: state[key] for key in CACHED_COLUMNS}
+
+    @staticmethod
+    async def _attach(session: AsyncSession, snapshot: Dict[str, Any]) -> User:
+        # An instance the session already holds may carry newer, unflushed state; never
+        # overwrite it with the snapshot.
+        present = session.sync_session.identity_map.get(Session.identity_key(User, snapshot["id"]))
+        if present is not None:
+            return present
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return await session.merge(user, load=False)
+
+def _build_backend() -> CacheBackend:
+    if settings.user_cache_url:
+        return RedisCache(settings.user_cache_url, dumps_snapshot, loads_snapshot, prefix="users:")
+    return InMemoryLRUCache(max_entries=settings.user_cache_max_entries)
+
+user_cache = UserCache(_build_backend(), ttl=settings.user_cache_ttl_seconds, enabled=settings.user_cache_enabled)
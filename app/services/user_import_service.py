@@ -0,0 +1,325 @@
+from builtins import Exception, StopIteration, ValueError, bool, bytes, dict, hasattr, int, isinstance, len, list, next, range, set, str, sum, zip
+import asyncio
+import codecs
+import contextvars
+import csv
+import json
+import os
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import IO, AsyncIterable, AsyncIterator, Deque, Iterable, Iterator, List, Optional, Set, Tuple, Union
+from fastapi import UploadFile
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user_model import User, UserRole
+from app.schemas.user_schemas import ImportRowError, UserCreate, UserImportReport
+from app.services.email_service import EmailOutbox, EmailService
+from app.utils.nickname_gen import generate_nickname
+from app.utils.security import generate_verification_token, hash_password
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAX_NICKNAME_ROUNDS = 10
+
+class ImportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+READ_CHUNK_SIZE = 64 * 1024
+_LINE_END = re.compile(r"(\r\n|\r|\n)")
+
+# bcrypt releases the GIL while hashing, so threads hash in parallel and, unlike child
+# processes, report their PASSWORD_HASH_SECONDS observations and spans to this process.
+_hash_pool: Optional[ThreadPoolExecutor] = None
+
+def _get_hash_pool(workers: int) -> ThreadPoolExecutor:
+    global _hash_pool
+    if _hash_pool is None:
+        _hash_pool = ThreadPoolExecutor(max_workers=workers or os.cpu_count(), thread_name_prefix="import-hash")
+    return _hash_pool
+
+def shutdown_hash_pool():
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(wait=True)
+        _hash_pool = None
+
+def _format_validation_error(error: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(part) for part in e['loc']) or 'row'}: {e['msg']}" for e in error.errors()]
+
+class RowParser:
+    """
+    Incremental CSV/NDJSON parser: `feed` it raw bytes as they arrive and it returns the
+    (row_number, data, parse_error) tuples completed so far, so neither the sync CLI nor
+    the async upload path has to hold the whole file. Row numbers are 1-based data rows
+    (the CSV header is not counted). Lines end at \\n, \\r or \\r\\n, as with
+    `newline=""`; a CSV record spans lines while a quoted field is open.
+    """
+
+    def __init__(self, import_format: ImportFormat):
+        self.format = import_format
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._pending = ""
+        self._record = ""
+        self._records: Deque[str] = deque()
+        self._csv = csv.reader(_DequeIterator(self._records))
+        self._header: Optional[List[str]] = None
+        self._number = 0
+
+    def feed(self, data: bytes, final: bool = False) -> List[Tuple[int, Optional[dict], Optional[str]]]:
+        text = self._pending + self._decoder.decode(data, final)
+        lines = _LINE_END.split(text)
+        # split() leaves [line, terminator, line, terminator, ..., remainder].
+        self._pending = lines.pop()
+        if not final and not self._pending and lines and lines[-1] == "\r":
+            # A \r at the end of a chunk may be the first half of \r\n.
+            self._pending = lines.pop(-2) + lines.pop() + self._pending
+        rows = []
+        for i in range(0, len(lines), 2):
+            rows.extend(self._line(lines[i] + lines[i + 1]))
+        if final:
+            if self._pending:
+                rows.extend(self._line(self._pending))
+                self._pending = ""
+            if self._record:
+                # Unterminated quoted field: let the csv module report what it can.
+                rows.extend(self._complete(self._record))
+                self._record = ""
+        return rows
+
+    def _line(self, line: str) -> List[Tuple[int, Optional[dict], Optional[str]]]:
+        if self.format == ImportFormat.NDJSON:
+            return self._json_line(line)
+        self._record += line
+        if self._record.count('"') % 2:
+            return []  # a quoted field continues on the next line
+        record, self._record = self._record, ""
+        return self._complete(record)
+
+    def _complete(self, record: str) -> List[Tuple[int, Optional[dict], Optional[str]]]:
+        self._records.append(record)
+        try:
+            values = next(self._csv)
+        except csv.Error as e:
+            self._number += 1
+            return [(self._number, None, f"Invalid CSV: {e}")]
+        if self._header is None:
+            self._header = values
+            return []
+        if not values:
+            return []
+        self._number += 1
+        return [(self._number, {k: v for k, v in zip(self._header, values) if k and v != ""}, None)]
+
+    def _json_line(self, line: str) -> List[Tuple[int, Optional[dict], Optional[str]]]:
+        if not line.strip():
+            return []
+        self._number += 1
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            return [(self._number, None, f"Invalid JSON: {e}")]
+        if not isinstance(record, dict):
+            return [(self._number, None, "Each line must be a JSON object")]
+        return [(self._number, record, None)]
+
+class _DequeIterator:
+    """Hands the csv reader one complete record per `next`; the parser only asks when one is queued."""
+
+    def __init__(self, records: Deque[str]):
+        self.records = records
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.records:
+            raise StopIteration
+        return self.records.popleft()
+
+def read_rows(stream: IO[bytes], import_format: ImportFormat, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Parse a binary file object chunk by chunk. Used by the CLI."""
+    parser = RowParser(import_format)
+    while True:
+        data = stream.read(chunk_size)
+        if not data:
+            break
+        yield from parser.feed(data)
+    yield from parser.feed(b"", final=True)
+
+async def read_upload_rows(upload: UploadFile, import_format: ImportFormat, chunk_size: int = READ_CHUNK_SIZE) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """
+    Parse an uploaded file chunk by chunk. `UploadFile.read` runs the blocking file read
+    in a thread, so the event loop is never blocked on the spooled upload.
+    """
+    parser = RowParser(import_format)
+    while True:
+        data = await upload.read(chunk_size)
+        if not data:
+            break
+        for row in parser.feed(data):
+            yield row
+    for row in parser.feed(b"", final=True):
+        yield row
+
+async def _as_async(rows: Iterable) -> AsyncIterator:
+    for row in rows:
+        yield row
+
+class UserImportService:
+    @classmethod
+    async def import_users(
+        cls,
+        session: AsyncSession,
+        rows: Union[Iterable[Tuple[int, Optional[dict], Optional[str]]], AsyncIterable[Tuple[int, Optional[dict], Optional[str]]]],
+        email_service: Optional[EmailService],
+        outbox: Optional[EmailOutbox],
+        batch_size: int = 500,
+        hash_workers: int = 0,
+    ) -> UserImportReport:
+        """
+        Import users in batches: each batch is validated with `UserCreate`, checked for
+        existing emails and nicknames with one set-based query each, hashed in a thread
+        pool and written with a single multi-row INSERT. Verification emails are queued
+        on the outbox only after the batch has been committed.
+
+        `rows` may be a plain iterable (`read_rows`) or an async one (`read_upload_rows`).
+        """
+        if not hasattr(rows, "__aiter__"):
+            rows = _as_async(rows)
+        report = UserImportReport(total=0, created=0, failed=0, errors=[])
+        seen_emails: Set[str] = set()
+        batch: List[Tuple[int, dict]] = []
+        async for number, record, parse_error in rows:
+            report.total += 1
+            if parse_error:
+                cls._fail(report, number, None, [parse_error])
+                continue
+            batch.append((number, record))
+            if len(batch) >= batch_size:
+                await cls._import_batch(session, batch, seen_emails, report, email_service, outbox, hash_workers)
+                batch = []
+        if batch:
+            await cls._import_batch(session, batch, seen_emails, report, email_service, outbox, hash_workers)
+        report.errors.sort(key=lambda error: error.row)
+        return report
+
+    @staticmethod
+    def _fail(report: UserImportReport, row: int, email: Optional[str], errors: List[str]):
+        report.failed += 1
+        report.errors.append(ImportRowError(row=row, email=email, errors=errors))
+
+    @classmethod
+    async def _import_batch(cls, session, batch, seen_emails, report, email_service, outbox, hash_workers):
+        valid: List[Tuple[int, UserCreate]] = []
+        for number, record in batch:
+            if "role" in record:
+                # Imported accounts always start unverified as ANONYMOUS, like /register/.
+                cls._fail(report, number, record.get("email"), ["role: Roles cannot be imported; remove the role column"])
+                continue
+            record["role"] = UserRole.ANONYMOUS.name
+            try:
+                user = UserCreate(**record)
+            except ValidationError as e:
+                cls._fail(report, number, record.get("email"), _format_validation_error(e))
+                continue
+            if user.email in seen_emails:
+                cls._fail(report, number, user.email, ["email: Duplicate email in import file"])
+                continue
+            seen_emails.add(user.email)
+            valid.append((number, user))
+        if not valid:
+            return
+
+        existing_emails = set((await session.execute(
+            select(User.email).where(User.email.in_([user.email for _, user in valid]))
+        )).scalars())
+        requested = [user.nickname for _, user in valid if user.nickname]
+        taken_nicknames = set((await session.execute(
+            select(User.nickname).where(User.nickname.in_(requested))
+        )).scalars()) if requested else set()
+
+        accepted: List[Tuple[int, UserCreate]] = []
+        for number, user in valid:
+            if user.email in existing_emails:
+                cls._fail(report, number, user.email, ["email: Email already exists"])
+            elif user.nickname and user.nickname in taken_nicknames:
+                cls._fail(report, number, user.email, ["nickname: Nickname already exists"])
+            else:
+                if user.nickname:
+                    taken_nicknames.add(user.nickname)
+                accepted.append((number, user))
+        if not accepted:
+            return
+
+        generated = await cls._allocate_nicknames(session, sum(1 for _, u in accepted if not u.nickname), taken_nicknames)
+        nicknames: List[str] = []
+        with_nickname: List[Tuple[int, UserCreate]] = []
+        for number, user in accepted:
+            nickname = user.nickname or (generated.pop() if generated else None)
+            if nickname is None:
+                cls._fail(report, number, user.email, ["nickname: Could not allocate a unique nickname"])
+                continue
+            nicknames.append(nickname)
+            with_nickname.append((number, user))
+        accepted = with_nickname
+        if not accepted:
+            return
+
+        loop = asyncio.get_running_loop()
+        pool = _get_hash_pool(hash_workers)
+        # Each hash runs in a copy of this context so its bcrypt span nests under the import.
+        hashes = await asyncio.gather(*(
+            loop.run_in_executor(pool, contextvars.copy_context().run, hash_password, user.password)
+            for _, user in accepted
+        ))
+
+        values = []
+        for (number, user), nickname, hashed in zip(accepted, nicknames, hashes):
+            data = user.model_dump(exclude={"password"})
+            data.update(
+                nickname=nickname,
+                hashed_password=hashed,
+                role=UserRole.ANONYMOUS,
+                email_verified=False,
+                verification_token=generate_verification_token(),
+            )
+            values.append(data)
+        try:
+            created = (await session.scalars(insert(User).returning(User), values)).all()
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            logger.error("Bulk insert of %d users failed: %s", len(values), e)
+            for number, user in accepted:
+                cls._fail(report, number, user.email, ["Database error while inserting row"])
+            return
+
+        report.created += len(created)
+        if email_service is not None and outbox is not None:
+            for user in created:
+                outbox.enqueue_verification(email_service, user)
+
+    @classmethod
+    async def _allocate_nicknames(cls, session: AsyncSession, count: int, reserved: Set[str]) -> List[str]:
+        """
+        Generate up to `count` unused nicknames, checking each round of candidates with
+        one query. Fewer are returned if the generator's name space is exhausted.
+        """
+        allocated: List[str] = []
+        for _ in range(MAX_NICKNAME_ROUNDS):
+            needed = count - len(allocated)
+            if needed <= 0:
+                break
+            candidates = {generate_nickname() for _ in range(needed * 2)} - reserved
+            taken = set((await session.execute(
+                select(User.nickname).where(User.nickname.in_(candidates))
+            )).scalars()) if candidates else set()
+            fresh = list(candidates - taken)[:needed]
+            reserved.update(fresh)
+            allocated.extend(fresh)
+        return allocated
@@ -1,22 +1,31 @@
 from builtins import Exception, bool, classmethod, int, str
 from datetime import datetime, timezone
+from enum import Enum
 from http import client
 import io
 import secrets
-from typing import Optional, Dict, List
+from typing import AsyncIterator, Optional, Dict, List, Sequence, Tuple
 from fastapi import UploadFile, HTTPException
-from PIL import Image
 from pydantic import ValidationError
-from sqlalchemy import func, update, select
+from sqlalchemy import any_, bindparam, delete, func, or_, update, select
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.sql import Select
 from app.core.config import MINIO_BUCKET_NAME
 from app.dependencies import get_settings, get_minio_client
+from app.database import release_connection
 from app.models.user_model import User, UserRole
-from app.schemas.user_schemas import UserCreate, UserUpdate
+from app.schemas.user_schemas import BatchOperation, SearchMode, UserCreate, UserSearchFilters, UserUpdate
 from app.utils.crud_profile_picture import create_bucket_if_not_exists, delete_old_profile_picture
 from app.utils.nickname_gen import generate_nickname
 from app.utils.security import generate_verification_token, hash_password, verify_password
+from app.utils.tracing import traced, tracer
+from app.services.jwt_service import token_subject
+from app.services.revocation_service import RevocationService
+from app.services.session_service import SessionService
+from app.services.user_cache import user_cache
 from uuid import UUID, uuid4
 from app.services.email_service import EmailService
 import logging
@@ -24,15 +33,26 @@ import logging
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+class LoginStatus(Enum):
+    """Outcome of a login attempt, so callers can tell a locked account from bad credentials."""
+    SUCCESS = "success"
+    INVALID_CREDENTIALS = "invalid_credentials"
+    LOCKED = "locked"
+
 class UserService:
     @classmethod
-    async def _execute_query(cls, session: AsyncSession, query):
+    async def _execute_query(cls, session: AsyncSession, query, commit: bool = False):
+        """
+        Run `query`, committing only for writes (`commit=True`). Reads stay in the
+        request's transaction, which ends once when the response starts.
+        """
         try:
             result = await session.execute(query)
-            await session.commit()
+            if commit:
+                await session.commit()
             return result
         except SQLAlchemyError as e:
-            logger.error(f"Database error: {e}")
+            logger.error("Database error: %s", e)
             await session.rollback()
             return None
 
@@ -43,150 +63,387 @@ class UserService:
         return result.scalars().first() if result else None
 
     @classmethod
+    @traced()
     async def get_by_id(cls, session: AsyncSession, user_id: UUID) -> Optional[User]:
-        return await cls._fetch_user(session, id=user_id)
+        """Cached read. Code that modifies the user should load it with `_fetch_user`."""
+        return await user_cache.get_by_id(session, user_id, lambda: cls._fetch_user(session, id=user_id))
 
     @classmethod
+    @traced()
     async def get_by_nickname(cls, session: AsyncSession, nickname: str) -> Optional[User]:
         return await cls._fetch_user(session, nickname=nickname)
 
     @classmethod
+    @traced()
     async def get_by_email(cls, session: AsyncSession, email: str) -> Optional[User]:
-        return await cls._fetch_user(session, email=email)
+        """Cached read. Code that modifies the user should load it with `_fetch_user`."""
+        return await user_cache.get_by_email(session, email, lambda: cls._fetch_user(session, email=email))
 
     @classmethod
+    @traced()
     async def create(cls, session: AsyncSession, user_data: Dict[str, str], email_service: EmailService) -> Optional[User]:
         try:
             validated_data = UserCreate(**user_data).model_dump()
-            existing_user = await cls.get_by_email(session, validated_data['email'])
-            if existing_user:
-                logger.error("User with given email already exists.")
-                return None
-            validated_data['hashed_password'] = hash_password(validated_data.pop('password'))
+            password = validated_data.pop('password')
             new_user = User(**validated_data)
             new_nickname = generate_nickname()
-            while await cls.get_by_nickname(session, new_nickname):
+            # One round trip answers all three pre-insert questions; only a nickname
+            # collision, which is rare, costs another query per retry.
+            email_taken, nickname_taken, has_users = (await session.execute(select(
+                select(User.id).where(User.email == validated_data['email']).exists(),
+                select(User.id).where(User.nickname == new_nickname).exists(),
+                select(User.id).exists(),
+            ))).one()
+            if email_taken:
+                logger.error("User with given email already exists.")
+                return None
+            while nickname_taken:
                 new_nickname = generate_nickname()
+                nickname_taken = await cls.get_by_nickname(session, new_nickname) is not None
             new_user.nickname = new_nickname
-            user_count = await cls.count(session)
-            new_user.role = UserRole.ADMIN if user_count == 0 else UserRole.ANONYMOUS            
+            await release_connection(session)
+            new_user.hashed_password = hash_password(password)
+            new_user.role = UserRole.ANONYMOUS if has_users else UserRole.ADMIN
             if new_user.role == UserRole.ADMIN:
                 new_user.email_verified = True
             else:
                 new_user.verification_token = generate_verification_token()
-                await email_service.send_verification_email(new_user)
 
             session.add(new_user)
-            await session.commit()
+            with tracer.span("db.commit"):
+                await session.commit()
+            # Sent after the commit: the link needs the user's id, and SMTP should not hold a connection.
+            if new_user.verification_token is not None:
+                await email_service.send_verification_email(new_user)
             return new_user
         except ValidationError as e:
-            logger.error(f"Validation error during user creation: {e}")
+            logger.error("Validation error during user creation: %s", e)
             return None
     
     @classmethod
+    @traced()
     async def update(cls, session: AsyncSession, user_id: UUID, update_data: Dict[str, str]) -> Optional[User]:
         try:
             validated_data = UserUpdate(**update_data).model_dump(exclude_unset=True)
             if 'password' in validated_data:
                 validated_data['hashed_password'] = hash_password(validated_data.pop('password'))
-            query = update(User).where(User.id == user_id).values(**validated_data).execution_options(synchronize_session="fetch")
-            await cls._execute_query(session, query)
-            updated_user = await cls.get_by_id(session, user_id)
-            if updated_user:
-                session.refresh(updated_user)
-                logger.info(f"User {user_id} updated successfully.")
-                return updated_user
+            role = validated_data.get('role')
+            if role is not None:
+                current_role = (await session.execute(select(User.role).where(User.id == user_id).with_for_update())).scalar()
+                role_changed = current_role is not None and current_role.name != role
             else:
-                logger.error(f"User {user_id} not found after update attempt.")
-            return None
+                role_changed = False
+            # RETURNING hands back the updated row, so no SELECT follows the UPDATE.
+            query = (
+                update(User)
+                .where(User.id == user_id)
+                .values(**validated_data)
+                .returning(User)
+                .execution_options(synchronize_session="fetch", populate_existing=True)
+            )
+            try:
+                updated_user = (await session.execute(query)).scalars().first()
+                if updated_user and role_changed:
+                    # Tokens carry the old role's permission mask; revoke them with the change,
+                    # exactly as batch_mutate does for SET_ROLE.
+                    await RevocationService.revoke_subjects(session, [token_subject(updated_user)], commit=False)
+                    await SessionService.revoke_user(session, user_id, commit=False)
+                await session.commit()
+            except SQLAlchemyError as e:
+                logger.error("Update of user %s failed: %s", user_id, e)
+                await session.rollback()
+                return None
+            await user_cache.invalidate(user_id)
+            if updated_user is None:
+                logger.error("User %s not found after update attempt.", user_id)
+                return None
+            logger.info("User %s updated successfully.", user_id)
+            return updated_user
         except Exception as e:
-            logger.error(f"Error during user update: {e}")
+            logger.error("Error during user update: %s", e)
             return None
 
     @classmethod
+    @traced()
+    async def get_for_update(cls, session: AsyncSession, user_id: UUID) -> Optional[User]:
+        """
+        Load the user with its row locked until the session commits, so a precondition
+        check on it followed by `update_profile` cannot interleave with another writer.
+        """
+        query = select(User).where(User.id == user_id).with_for_update().execution_options(populate_existing=True)
+        result = await session.execute(query)
+        return result.scalars().first()
+
+    @classmethod
+    @traced()
+    async def update_profile(cls, session: AsyncSession, user_id: UUID, values: Dict[str, str]) -> Optional[User]:
+        """Apply `values` with one `UPDATE ... RETURNING` and commit; None if the user is missing."""
+        query = (
+            update(User)
+            .where(User.id == user_id)
+            .values(**values)
+            .returning(User)
+            .execution_options(synchronize_session="fetch", populate_existing=True)
+        )
+        try:
+            user = (await session.execute(query)).scalars().first()
+            await session.commit()
+        except SQLAlchemyError as e:
+            logger.error("Profile update of user %s failed: %s", user_id, e)
+            await session.rollback()
+            raise
+        await user_cache.invalidate(user_id)
+        return user
+
+    @classmethod
+    @traced()
     async def delete(cls, session: AsyncSession, user_id: UUID) -> bool:
-        user = await cls.get_by_id(session, user_id)
+        user = await cls._fetch_user(session, id=user_id)
         if not user:
-            logger.info(f"User with ID {user_id} not found.")
+            logger.info("User with ID %s not found.", user_id)
             return False
         await session.delete(user)
+        await RevocationService.revoke_subjects(session, [token_subject(user)], commit=False)
         await session.commit()
+        await user_cache.invalidate(user_id)
         return True
 
     @classmethod
+    @traced()
+    async def batch_mutate(cls, session: AsyncSession, user_ids: Sequence[UUID], operation: BatchOperation, role: Optional[UserRole] = None) -> List[UUID]:
+        """
+        Apply one operation to many users with a single set-based statement
+        (`... WHERE id = ANY(:ids) RETURNING id`) and return the ids that matched.
+        Locks, deletes and role changes also revoke the affected users' tokens and
+        refresh sessions in the same transaction.
+        """
+        ids = bindparam("ids", value=list(dict.fromkeys(user_ids)), type_=ARRAY(PG_UUID(as_uuid=True)))
+        if operation == BatchOperation.DELETE:
+            query = delete(User).where(User.id == any_(ids))
+        else:
+            values = {
+                BatchOperation.LOCK: {"is_locked": True},
+                BatchOperation.UNLOCK: {"is_locked": False, "failed_login_attempts": 0},
+                BatchOperation.SET_ROLE: {"role": role},
+            }[operation]
+            query = update(User).where(User.id == any_(ids)).values(**values)
+        query = query.returning(User.id).execution_options(synchronize_session=False)
+        try:
+            rows = (await session.execute(query)).all()
+            affected = [row.id for row in rows]
+            if operation != BatchOperation.UNLOCK:
+                await RevocationService.revoke_subjects(session, [token_subject(row) for row in rows], commit=False)
+                if operation != BatchOperation.DELETE:
+                    await SessionService.revoke_users(session, affected, commit=False)
+            await session.commit()
+        except SQLAlchemyError as e:
+            logger.error("Batch %s failed: %s", operation.value, e)
+            await session.rollback()
+            raise
+        await user_cache.invalidate(*affected)
+        logger.info("Batch %s applied to %d of %d users.", operation.value, len(affected), len(user_ids))
+        return affected
+
+    @classmethod
+    @traced()
     async def list_users(cls, session: AsyncSession, skip: int = 0, limit: int = 10) -> List[User]:
         query = select(User).offset(skip).limit(limit)
         result = await cls._execute_query(session, query)
         return result.scalars().all() if result else []
 
+    @staticmethod
+    def _escape_like(term: str) -> str:
+        return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+    @classmethod
+    def build_search_query(cls, filters: UserSearchFilters) -> Select:
+        """
+        Build the filtered user query. Every predicate maps onto an index from the
+        search migration: prefix matches use the lower() text_pattern_ops indexes,
+        substring matches the pg_trgm GIN indexes, and locked users the partial index.
+        """
+        query = select(User)
+        if filters.q:
+            term = cls._escape_like(filters.q.strip())
+            if filters.match == SearchMode.PREFIX:
+                pattern = f"{term.lower()}%"
+                query = query.where(or_(
+                    func.lower(User.email).like(pattern, escape="\\"),
+                    func.lower(User.nickname).like(pattern, escape="\\"),
+                ))
+            else:
+                pattern = f"%{term}%"
+                query = query.where(or_(
+                    User.email.ilike(pattern, escape="\\"),
+                    User.nickname.ilike(pattern, escape="\\"),
+                    User.first_name.ilike(pattern, escape="\\"),
+                    User.last_name.ilike(pattern, escape="\\"),
+                ))
+        if filters.email is not None:
+            query = query.where(User.email == filters.email)
+        if filters.nickname is not None:
+            query = query.where(User.nickname == filters.nickname)
+        if filters.role is not None:
+            query = query.where(User.role == filters.role)
+        if filters.is_locked is not None:
+            query = query.where(User.is_locked == filters.is_locked)
+        if filters.email_verified is not None:
+            query = query.where(User.email_verified == filters.email_verified)
+        if filters.is_professional is not None:
+            query = query.where(User.is_professional == filters.is_professional)
+        if filters.created_after is not None:
+            query = query.where(User.created_at >= filters.created_after)
+        if filters.created_before is not None:
+            query = query.where(User.created_at < filters.created_before)
+        return query
+
+    @classmethod
+    @traced()
+    async def search_users(cls, session: AsyncSession, filters: UserSearchFilters, skip: int = 0, limit: int = 10) -> List[User]:
+        query = cls.build_search_query(filters).order_by(User.created_at.desc(), User.id).offset(skip).limit(limit)
+        result = await cls._execute_query(session, query)
+        return result.scalars().all() if result else []
+
     @classmethod
+    @traced()
+    async def count_search(cls, session: AsyncSession, filters: UserSearchFilters) -> int:
+        query = select(func.count()).select_from(cls.build_search_query(filters).subquery())
+        result = await cls._execute_query(session, query)
+        return result.scalar() if result else 0
+
+    @classmethod
+    async def stream_users(cls, session: AsyncSession, columns: Sequence[str], after: Optional[UUID] = None, batch_size: int = 1000) -> AsyncIterator[Sequence]:
+        """
+        Stream rows of the requested columns in primary-key order through a server-side
+        cursor, one partition of `batch_size` rows at a time. Keyset pagination on `id`
+        (rather than OFFSET) lets an interrupted export resume from the last id seen.
+        """
+        query = select(*(getattr(User, name) for name in columns)).order_by(User.id)
+        if after is not None:
+            query = query.where(User.id > after)
+        result = await session.stream(query.execution_options(yield_per=batch_size))
+        async for partition in result.partitions():
+            yield partition
+
+    @classmethod
+    @traced()
     async def register_user(cls, session: AsyncSession, user_data: Dict[str, str], get_email_service) -> Optional[User]:
         return await cls.create(session, user_data, get_email_service)
 
     @classmethod
+    @traced()
+    async def authenticate(cls, session: AsyncSession, email: str, password: str) -> Tuple[LoginStatus, Optional[User]]:
+        """
+        Check credentials with a single lookup of the user row. Attempt accounting is one
+        conditional UPDATE evaluated against the current row, so concurrent failures
+        cannot lose increments and the account locks at exactly `max_login_attempts`.
+        Failures only count against an unlocked row, so attempts racing past the limit
+        stop at it, and only the attempt whose UPDATE locked the row revokes the user's
+        tokens and sessions.
+        """
+        user = await cls._fetch_user(session, email=email)
+        if user is None:
+            return LoginStatus.INVALID_CREDENTIALS, None
+        if user.is_locked:
+            return LoginStatus.LOCKED, None
+        if not user.email_verified:
+            return LoginStatus.INVALID_CREDENTIALS, None
+        user_id, subject = user.id, token_subject(user)  # a failed UPDATE's rollback expires `user`
+        await release_connection(session)
+        if verify_password(password, user.hashed_password):
+            query = (
+                update(User)
+                .where(User.id == user.id, User.is_locked.isnot(True))
+                .values(failed_login_attempts=0, last_login_at=datetime.now(timezone.utc))
+                .returning(User.id)
+                .execution_options(synchronize_session="fetch")
+            )
+            result = await cls._execute_query(session, query, commit=True)
+            if result is None or result.first() is None:
+                # Locked by a concurrent failed attempt after our read.
+                return LoginStatus.LOCKED, None
+            await user_cache.invalidate(user.id)
+            return LoginStatus.SUCCESS, user
+        attempts = func.coalesce(User.failed_login_attempts, 0) + 1
+        query = (
+            update(User)
+            .where(User.id == user_id, User.is_locked.isnot(True))
+            .values(failed_login_attempts=attempts, is_locked=attempts >= settings.max_login_attempts)
+            .returning(User.failed_login_attempts, User.is_locked)
+            # Not "fetch": it prepends the primary key to RETURNING, which shifts the
+            # named columns so that `row.is_locked` reads the attempt count.
+            .execution_options(synchronize_session=False)
+        )
+        result = await cls._execute_query(session, query, commit=True)
+        await user_cache.invalidate(user_id)
+        row = result.first() if result else None
+        if row is not None:
+            set_committed_value(user, "failed_login_attempts", row.failed_login_attempts)
+            set_committed_value(user, "is_locked", row.is_locked)
+        if row is not None and row.is_locked:
+            logger.info("Account %s locked after %d failed login attempts.", user_id, row.failed_login_attempts)
+            await RevocationService.revoke_subjects(session, [subject], commit=False)
+            await SessionService.revoke_user(session, user_id)
+        return LoginStatus.INVALID_CREDENTIALS, None
+
+    @classmethod
+    @traced()
     async def login_user(cls, session: AsyncSession, email: str, password: str) -> Optional[User]:
-        user = await cls.get_by_email(session, email)
-        if user:
-            if not user.email_verified or user.is_locked:
-                return None
-            if verify_password(password, user.hashed_password):
-                user.failed_login_attempts = 0
-                user.last_login_at = datetime.now(timezone.utc)
-                session.add(user)
-                await session.commit()
-                return user
-            else:
-                user.failed_login_attempts += 1
-                if user.failed_login_attempts >= settings.max_login_attempts:
-                    user.is_locked = True
-                session.add(user)
-                await session.commit()
-        return None
+        _, user = await cls.authenticate(session, email, password)
+        return user
 
     @classmethod
+    @traced()
     async def is_account_locked(cls, session: AsyncSession, email: str) -> bool:
-        user = await cls.get_by_email(session, email)
+        user = await cls._fetch_user(session, email=email)
         return user.is_locked if user else False
 
     @classmethod
+    @traced()
     async def reset_password(cls, session: AsyncSession, user_id: UUID, new_password: str) -> bool:
         hashed_password = hash_password(new_password)
-        user = await cls.get_by_id(session, user_id)
+        user = await cls._fetch_user(session, id=user_id)
         if user:
             user.hashed_password = hashed_password
             user.failed_login_attempts = 0
             user.is_locked = False
             session.add(user)
             await session.commit()
+            await user_cache.invalidate(user_id)
             return True
         return False
 
     @classmethod
+    @traced()
     async def verify_email_with_token(cls, session: AsyncSession, user_id: UUID, token: str) -> bool:
-        user = await cls.get_by_id(session, user_id)
+        user = await cls._fetch_user(session, id=user_id)
         if user and user.verification_token == token:
             user.email_verified = True
             user.verification_token = None
             user.role = UserRole.AUTHENTICATED
             session.add(user)
             await session.commit()
+            await user_cache.invalidate(user_id)
             return True
         return False
 
     @classmethod
+    @traced()
     async def count(cls, session: AsyncSession) -> int:
         query = select(func.count()).select_from(User)
         result = await session.execute(query)
         return result.scalar()
 
     @classmethod
+    @traced()
     async def unlock_user_account(cls, session: AsyncSession, user_id: UUID) -> bool:
-        user = await cls.get_by_id(session, user_id)
+        user = await cls._fetch_user(session, id=user_id)
         if user and user.is_locked:
             user.is_locked = False
             user.failed_login_attempts = 0
             session.add(user)
             await session.commit()
+            await user_cache.invalidate(user_id)
             return True
         return False
 
@@ -208,7 +465,8 @@ class UserService:
             # Move the file pointer back to the start
             file.file.seek(0)
 
-            # Resize the image if necessary (use PIL)
+            # Resize the image if necessary (use PIL, loaded only when a picture is uploaded)
+            from PIL import Image
             image = Image.open(file.file)
             image.thumbnail((200, 200))  # Resize image to fit profile picture size
 
@@ -229,11 +487,12 @@ class UserService:
             db.add(user)
             await db.commit()
             await db.refresh(user)
+            await user_cache.invalidate(user.id)
 
-            logger.info(f"Profile picture uploaded for user {user.username}")
+            logger.info("Profile picture uploaded for user %s", user.username)
             return user
         except HTTPException as e:
             raise e  # Reraise HTTP exceptions
         except Exception as e:
-            logger.error(f"Error uploading profile picture: {e}")
+            logger.error("Error uploading profile picture: %s", e)
             raise HTTPException(status_code=500, detail="Error uploading profile picture")
\ No newline at end of file
@@ -0,0 +1,83 @@
+from builtins import Exception, classmethod, float, int, list, range, str, sum
+import asyncio
+import logging
+import time
+from typing import Dict
+from uuid import uuid4
+
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.models.user_model import User, UserRole
+from app.schemas.user_schemas import UserResponse
+from app.utils.security import hash_password, verify_password
+from app.utils.template_manager import TemplateManager
+
+logger = logging.getLogger(__name__)
+
+def hot_statements() -> list:
+    """
+    The queries behind token-authenticated reads, logins and user lists. Running them on
+    a new connection makes asyncpg introspect the column types and prepare each statement
+    on that connection, so the first requests after a deploy pay for neither.
+    """
+    return [
+        select(User).where(User.id == uuid4()),
+        select(User).filter_by(email="warmup@example.invalid"),
+        select(func.count()).select_from(User),
+        select(User).offset(0).limit(10),
+    ]
+
+class WarmupService:
+    """Pays a worker's one-off startup costs before it takes traffic rather than on its first requests."""
+
+    @classmethod
+    async def warm_pool(cls, engine: AsyncEngine, connections: int) -> None:
+        """Open `connections` pool connections at once and prime each with the hot statements."""
+        async def prime():
+            async with engine.connect() as conn:
+                for statement in hot_statements():
+                    await conn.execute(statement)
+        await asyncio.gather(*(prime() for _ in range(connections)))
+
+    @classmethod
+    def warm_templates(cls) -> None:
+        TemplateManager().preload()
+
+    @classmethod
+    def warm_schemas(cls, app: FastAPI) -> None:
+        """Build the OpenAPI document and run a user through the response model and encoder once."""
+        app.openapi()
+        sample = User(id=uuid4(), email="warmup@example.com", nickname="warmup", role=UserRole.AUTHENTICATED)
+        jsonable_encoder(UserResponse.model_validate(sample))
+
+    @classmethod
+    async def warm_hasher(cls) -> None:
+        """Load bcrypt and run it once at the lowest cost, off the event loop."""
+        await asyncio.to_thread(verify_password, "warmup", hash_password("warmup", rounds=4))
+
+    @classmethod
+    async def run(cls, app: FastAPI, engine: AsyncEngine, connections: int) -> Dict[str, float]:
+        """
+        Run every warmup step and return how long each took in seconds. A failing step is
+        logged and skipped: a cold worker is still better than one that never starts.
+        """
+        steps = {
+            "pool": lambda: cls.warm_pool(engine, connections),
+            "templates": lambda: asyncio.to_thread(cls.warm_templates),
+            "schemas": lambda: asyncio.to_thread(cls.warm_schemas, app),
+            "hasher": cls.warm_hasher,
+        }
+        timings = {}
+        for name, step in steps.items():
+            started = time.perf_counter()
+            try:
+                await step()
+            except Exception as e:
+                logger.warning("Warmup step %s failed: %s", name, e)
+            timings[name] = time.perf_counter() - started
+        logger.info("Warmup finished in %.0f ms: %s", sum(timings.values()) * 1000,
+                    ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in timings.items()))
+        return timings
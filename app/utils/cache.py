@@ -0,0 +1,101 @@
+from builtins import ImportError, bytes, float, int, len, str
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+
+class CacheBackend(ABC):
+    """
+    Key/value storage for read-through caches. The in-memory backend is per process; a
+    shared backend (e.g. Redis) implements the same interface so entries and
+    invalidations are seen by every worker.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        """Return the value stored under `key`, or None if it is missing or expired."""
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        """Store `value` under `key` for `ttl` seconds."""
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        """Remove `keys` if present."""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Remove every entry."""
+
+
+class InMemoryLRUCache(CacheBackend):
+    """
+    Entries in an LRU-ordered dict, each with its own expiry. Values are stored as given,
+    so a hit costs a dict lookup and no deserialization. Beyond `max_entries` the least
+    recently used entry is evicted.
+    """
+
+    def __init__(self, max_entries: int = 10_000, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        self._entries[key] = (self.clock() + ttl, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisCache(CacheBackend):
+    """
+    Shared backend on Redis. Requires the optional `redis` package; keys are namespaced
+    with `prefix` so `clear` only removes this cache's entries.
+    """
+
+    def __init__(self, url: str, dumps: Callable[[Any], bytes], loads: Callable[[bytes], Any], prefix: str = "cache:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise ImportError("RedisCache requires the 'redis' package (pip install redis)") from e
+        self.client = redis.from_url(url)
+        self.dumps = dumps
+        self.loads = loads
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[Any]:
+        data = await self.client.get(self.prefix + key)
+        return None if data is None else self.loads(data)
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        await self.client.set(self.prefix + key, self.dumps(value), px=int(ttl * 1000))
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*(self.prefix + key for key in keys))
+
+    async def clear(self) -> None:
+        async for key in self.client.scan_iter(match=self.prefix + "*"):
+            await self.client.delete(key)
@@ -1,16 +1,137 @@
-import logging.config
-import os
+from builtins import bool, float, frozenset, getattr, int, str
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
 from app.dependencies import get_settings
+from app.utils.request_id import current_request_id
 
 settings = get_settings()
-def setup_logging():
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s"
+TEXT_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request id and any traceback."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str, separators=(",", ":"))
+
+class RequestIdFilter(logging.Filter):
+    """Stamps each record with the id of the request that logged it, or "-" outside one."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = current_request_id() or "-"
+        return True
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps roughly `rate` of the INFO and DEBUG records from `loggers` (and their children);
+    warnings and errors always pass. Dropped records are never formatted or queued.
+    """
+
+    def __init__(self, loggers: Iterable[str], rate: float):
+        super().__init__()
+        self.loggers = frozenset(loggers)
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.rate >= 1.0:
+            return True
+        name = record.name
+        while name:
+            if name in self.loggers:
+                return random.random() < self.rate
+            name = name.rpartition(".")[0]
+        return True
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the listener thread through a bounded queue. When the queue is full
+    the record is dropped and counted instead of blocking the event loop; the message and
+    any traceback are rendered here so the record no longer references live objects.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[NonBlockingQueueHandler] = None
+
+def dropped_records() -> int:
+    """Records this process discarded because the log queue was full."""
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+def setup_logging() -> logging.handlers.QueueListener:
     """
-    Sets up logging for the application using a configuration file.
-    This ensures standardized logging across the entire application.
+    Route every log record through a queue to a background thread that formats it (JSON
+    or text, per `log_format`) and writes it to stdout, so logging never blocks the event
+    loop on I/O. Records carry the current request id and INFO records from
+    `log_sampled_loggers` are sampled at `log_sample_rate`. Safe to call more than once
+    per process; the listener is flushed and stopped at exit.
     """
-    # Construct the path to 'logging.conf', assuming it's in the project's root.
-    logging_config_path = os.path.join(os.path.dirname(__file__), '..', '..', 'logging.conf')
-    # Normalize the path to handle any '..' correctly.
-    normalized_path = os.path.normpath(logging_config_path)
-    # Apply the logging configuration.
-    logging.config.fileConfig(normalized_path, disable_existing_loggers=False)
\ No newline at end of file
+    global _listener, _queue_handler
+    if _listener is not None:
+        return _listener
+    stream = logging.StreamHandler(sys.stdout)
+    if settings.log_format == "json":
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter(TEXT_FORMAT, TEXT_DATE_FORMAT))
+    log_queue: queue.Queue = queue.Queue(settings.log_queue_size)
+    _queue_handler = NonBlockingQueueHandler(log_queue)
+    _queue_handler.addFilter(SamplingFilter(
+        (name.strip() for name in settings.log_sampled_loggers.split(",") if name.strip()), settings.log_sample_rate
+    ))
+    _queue_handler.addFilter(RequestIdFilter())
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(settings.log_level.upper())
+    # uvicorn's loggers propagate to the root handler instead of writing to stderr themselves.
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
@@ -0,0 +1,185 @@
+from builtins import ValueError, any, bool, bytes, dict, float, int, str, tuple
+import re
+import zlib
+from typing import Optional, Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional; without it only gzip is offered
+    brotli = None
+
+# Media types worth compressing. Images, archives and other already-compressed bodies
+# only cost CPU to recompress.
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "application/javascript", "application/xml")
+
+def choose_encoding(accept_encoding: str, available: Sequence[str]) -> Optional[str]:
+    """
+    Pick the content coding for a request from its Accept-Encoding header: the one with
+    the highest q-value, ties going to the earlier entry in `available`. Returns None
+    when the client accepts none of them (q=0 is a refusal).
+    """
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name] = q
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type.startswith(COMPRESSIBLE_TYPES) or media_type.endswith("+json")
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes) -> bytes:
+        """Compress `data` and flush, so a streamed chunk reaches the client without waiting for the next."""
+        if self._brotli is not None:
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self._brotli is not None:
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH)
+
+_CODING_SUFFIX = re.compile(rb'-(?:gzip|br)"')
+_CONDITIONAL_HEADERS = (b"if-match", b"if-none-match")
+
+def _strip_coding_from_conditionals(scope: Scope) -> Scope:
+    """Map entity tags of compressed representations back to the app's own tags."""
+    headers = scope["headers"]
+    if not any(name in _CONDITIONAL_HEADERS for name, _ in headers):
+        return scope
+    stripped = [
+        (name, _CODING_SUFFIX.sub(b'"', value) if name in _CONDITIONAL_HEADERS else value)
+        for name, value in headers
+    ]
+    return dict(scope, headers=stripped)
+
+class CompressionMiddleware:
+    """
+    Compress responses with brotli (when the `brotli` package is installed) or gzip,
+    whichever the client prefers. Bodies under `minimum_size` bytes, already-encoded
+    responses and non-text media types pass through untouched. Streaming responses are
+    compressed chunk by chunk, so exports stay incremental.
+
+    A compressed body is a different representation, so a strong ETag gets the coding
+    appended (`"abc"` becomes `"abc-gzip"`), and the suffix is stripped from incoming
+    If-Match / If-None-Match headers again. The app only ever sees its own tags and
+    can keep using strong comparison for If-Match.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 500, gzip_level: int = 6, brotli_quality: int = 4,
+                 brotli_enabled: bool = True):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.encodings: tuple = ("br", "gzip") if brotli_enabled and brotli is not None else ("gzip",)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_headers = Headers(scope=scope)
+        if_none_match = request_headers.get("if-none-match", "")
+        scope = _strip_coding_from_conditionals(scope)
+        encoding = choose_encoding(request_headers.get("accept-encoding", ""), self.encodings)
+        # A 304 for a client revalidating its compressed copy must repeat that copy's tag.
+        revalidating = encoding is not None and f'-{encoding}"' in if_none_match
+        await _CompressionResponder(self, encoding, send, revalidating).run(self.app, scope, receive)
+
+class _CompressionResponder:
+    """
+    Compresses one response with `encoding`, or only adds `Vary: Accept-Encoding` when
+    `encoding` is None. Every compressible response carries Vary, including the ones
+    sent as-is because they are small or the client refused all codings, so a shared
+    cache never hands a stored identity body to one client and a gzip body to another
+    under the same key.
+    """
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: Optional[str], send: Send,
+                 revalidating: bool = False):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.revalidating = revalidating
+        self.start: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    async def run(self, app: ASGIApp, scope: Scope, receive: Receive) -> None:
+        await app(scope, receive, self.on_send)
+
+    async def on_send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Hold the headers until the first body chunk shows whether to compress.
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.compressor is None:
+            headers = MutableHeaders(raw=self.start["headers"])
+            compressible = "content-encoding" not in headers and is_compressible(headers.get("content-type", ""))
+            if compressible:
+                headers.add_vary_header("Accept-Encoding")
+            if (
+                self.encoding is None
+                or self.start["status"] in (204, 304)
+                or not compressible
+                or (not more_body and len(body) < self.middleware.minimum_size)
+            ):
+                self.passthrough = True
+                if self.start["status"] == 304 and self.revalidating:
+                    self._tag_etag(headers)
+                await self.send(self.start)
+                await self.send(message)
+                return
+            self.compressor = _Compressor(self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality)
+            headers["Content-Encoding"] = self.encoding
+            self._tag_etag(headers)
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                body = self.compressor.finish(body)
+                headers["Content-Length"] = str(len(body))
+                await self.send(self.start)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+            await self.send(self.start)
+
+        body = self.compressor.chunk(body) if more_body else self.compressor.finish(body)
+        await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+    def _tag_etag(self, headers: MutableHeaders) -> None:
+        etag = headers.get("etag")
+        if etag is not None and etag.startswith('"'):
+            headers["ETag"] = f'{etag[:-1]}-{self.encoding}"'
@@ -1,8 +1,7 @@
 import uuid
 from fastapi import UploadFile, HTTPException
-from app.core.minio_client import client
+from app.core.minio_client import get_client, storage_call
 from app.core.config import MINIO_BUCKET_NAME
-from minio.error import S3Error
 
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 ALLOWED_MIME_TYPES = ["image/jpeg", "image/png"]
@@ -28,10 +27,14 @@ async def upload_profile_picture(file: UploadFile, old_file_path: str = None) ->
     # Reset file pointer
     file.file.seek(0)
 
+    client = get_client()
     # Ensure bucket exists
     try:
-        if not client.bucket_exists(MINIO_BUCKET_NAME):
-            client.make_bucket(MINIO_BUCKET_NAME)
+        with storage_call("bucket_exists"):
+            exists = client.bucket_exists(MINIO_BUCKET_NAME)
+        if not exists:
+            with storage_call("make_bucket"):
+                client.make_bucket(MINIO_BUCKET_NAME)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Storage bucket does not exist. {str(e)}")
 
@@ -41,20 +44,22 @@ async def upload_profile_picture(file: UploadFile, old_file_path: str = None) ->
 
     # Upload file to MinIO
     try:
-        client.put_object(
-            bucket_name=MINIO_BUCKET_NAME,
-            object_name=filename,
-            data=file.file,
-            length=len(contents),
-            content_type=file.content_type,
-        )
+        with storage_call("put_object"):
+            client.put_object(
+                bucket_name=MINIO_BUCKET_NAME,
+                object_name=filename,
+                data=file.file,
+                length=len(contents),
+                content_type=file.content_type,
+            )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Could not connect to MinIO server. {str(e)}")
 
     # Delete old profile picture if it exists
     if old_file_path:
         try:
-            client.remove_object(MINIO_BUCKET_NAME, old_file_path)
+            with storage_call("remove_object"):
+                client.remove_object(MINIO_BUCKET_NAME, old_file_path)
         except Exception as e:
             # Handle potential errors silently
             pass  # You may want to log this silently
@@ -68,8 +73,11 @@ async def delete_old_profile_picture(user_id: str, old_file_path: str):
     """
     Delete old profile picture from MinIO.
     """
+    from minio.error import S3Error
+    client = get_client()
     try:
-        client.remove_object(MINIO_BUCKET_NAME, old_file_path)
+        with storage_call("remove_object"):
+            client.remove_object(MINIO_BUCKET_NAME, old_file_path)
     except S3Error as err:
         raise Exception(f"❌ MinIO Error: {err}")
     except Exception as e:
@@ -0,0 +1,39 @@
+from builtins import any, bool, repr, str
+import hashlib
+from typing import Iterable, Optional
+
+def fields_etag(values: Iterable) -> str:
+    """
+    Strong ETag over the values a representation is built from, so it changes exactly
+    when the client-visible fields do and not on unrelated writes to the same row.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for value in values:
+        digest.update(repr(value).encode("utf-8"))
+        digest.update(b"\x1f")
+    return f'"{digest.hexdigest()}"'
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Weak comparison of `etag` against an If-None-Match header value (RFC 9110)."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+def strong_etag_matches(header: Optional[str], etag: str) -> bool:
+    """Strong comparison for If-Match: weak tags on either side never match (RFC 9110 13.1.1)."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    if etag.startswith("W/"):
+        return False
+    return any(candidate.strip() == etag for candidate in header.split(","))
@@ -0,0 +1,108 @@
+from builtins import KeyError, ValueError, bytes, classmethod, dict, isinstance, len, sorted, str
+import hashlib
+import json
+import os
+from typing import Dict, Optional
+import jwt
+from jwt.algorithms import get_default_algorithms
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed448, ed25519, rsa
+
+ASYMMETRIC_KEY_TYPES = {
+    "RS256": (rsa.RSAPrivateKey, rsa.RSAPublicKey),
+    "RS384": (rsa.RSAPrivateKey, rsa.RSAPublicKey),
+    "RS512": (rsa.RSAPrivateKey, rsa.RSAPublicKey),
+    "EdDSA": ((ed25519.Ed25519PrivateKey, ed448.Ed448PrivateKey), (ed25519.Ed25519PublicKey, ed448.Ed448PublicKey)),
+}
+
+class SigningKey:
+    """A parsed key from the ring. `private_key` is None for retired, verify-only keys."""
+
+    def __init__(self, kid: Optional[str], verify_key, private_key=None):
+        self.kid = kid
+        self.verify_key = verify_key
+        self.private_key = private_key
+
+class KeyRing:
+    """
+    Signs tokens with the active key and verifies them with any key on the ring, chosen
+    by the token's `kid` header. Keys are parsed once when the ring is built, so signing
+    and verification never re-read PEM, and the public JWKS document is serialized once.
+
+    Rotating keys: add the new key to the directory and make it active; keep the old one
+    (or just its public half) until every token it signed has expired, then remove it.
+    """
+
+    def __init__(self, algorithm: str, keys: Dict[Optional[str], SigningKey], active_kid: Optional[str]):
+        if active_kid not in keys or keys[active_kid].private_key is None:
+            raise ValueError(f"Active signing key {active_kid!r} is not on the key ring")
+        self.algorithm = algorithm
+        self.keys = keys
+        self.active = keys[active_kid]
+        self.jwks = self._build_jwks()
+        self.jwks_etag = f'"{hashlib.sha256(self.jwks).hexdigest()[:32]}"'
+
+    @classmethod
+    def from_secret(cls, secret: str, algorithm: str = "HS256") -> "KeyRing":
+        """A single shared-secret key. Tokens carry no `kid` and nothing is published."""
+        key = SigningKey(None, secret, secret)
+        return cls(algorithm, {None: key}, None)
+
+    @classmethod
+    def from_directory(cls, path: str, algorithm: str, active_kid: Optional[str] = None) -> "KeyRing":
+        """
+        Load `<kid>.pem` private keys (sign and verify) and `<kid>.pub.pem` public keys
+        (verify only) from `path`. Without `active_kid`, the private key whose kid sorts
+        last signs, so date-prefixed kids rotate by adding a file.
+        """
+        if algorithm not in ASYMMETRIC_KEY_TYPES:
+            raise ValueError(f"Unsupported asymmetric JWT algorithm: {algorithm}")
+        private_type, public_type = ASYMMETRIC_KEY_TYPES[algorithm]
+        keys: Dict[Optional[str], SigningKey] = {}
+        for name in sorted(os.listdir(path)):
+            if not name.endswith(".pem") or not os.path.isfile(os.path.join(path, name)):
+                continue
+            with open(os.path.join(path, name), "rb") as f:
+                data = f.read()
+            if name.endswith(".pub.pem"):
+                kid = name[:-len(".pub.pem")]
+                public_key = serialization.load_pem_public_key(data)
+                if not isinstance(public_key, public_type):
+                    raise ValueError(f"Key {name} does not match algorithm {algorithm}")
+                keys.setdefault(kid, SigningKey(kid, public_key))
+            else:
+                kid = name[:-len(".pem")]
+                private_key = serialization.load_pem_private_key(data, password=None)
+                if not isinstance(private_key, private_type):
+                    raise ValueError(f"Key {name} does not match algorithm {algorithm}")
+                keys[kid] = SigningKey(kid, private_key.public_key(), private_key)
+        if active_kid is None:
+            signing = [kid for kid, key in keys.items() if key.private_key is not None]
+            if not signing:
+                raise ValueError(f"No private signing keys found in {path}")
+            active_kid = signing[-1]
+        return cls(algorithm, keys, active_kid)
+
+    def sign(self, payload: dict) -> str:
+        headers = {"kid": self.active.kid} if self.active.kid is not None else None
+        return jwt.encode(payload, self.active.private_key, algorithm=self.algorithm, headers=headers)
+
+    def verify(self, token: str) -> dict:
+        """Decode and verify `token`; raises `jwt.PyJWTError` if it is invalid or its kid is unknown."""
+        kid = jwt.get_unverified_header(token).get("kid")
+        try:
+            key = self.keys[kid]
+        except KeyError:
+            raise jwt.InvalidKeyError(f"Unknown signing key {kid!r}")
+        return jwt.decode(token, key.verify_key, algorithms=[self.algorithm])
+
+    def _build_jwks(self) -> bytes:
+        if self.algorithm not in ASYMMETRIC_KEY_TYPES:
+            return b'{"keys":[]}'
+        to_jwk = get_default_algorithms()[self.algorithm].to_jwk
+        keys = []
+        for kid, key in self.keys.items():
+            jwk = to_jwk(key.verify_key, as_dict=True)
+            jwk.update(kid=kid, use="sig", alg=self.algorithm)
+            keys.append(jwk)
+        return json.dumps({"keys": keys}, separators=(",", ":")).encode("utf-8")
@@ -0,0 +1,289 @@
+from builtins import ValueError, dict, float, getattr, int, isinstance, len, list, object, repr, str, tuple, zip
+import bisect
+import logging
+import math
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Prometheus client defaults: 5 ms to 10 s covers a cached read as well as a bcrypt round.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+QUERY_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+# One sample: its labels and value. A collector returns (name, type, help, samples) families.
+Sample = Tuple[Dict[str, str], float]
+Family = Tuple[str, str, str, List[Sample]]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if value == math.inf:
+        return "+Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[tuple, object] = {}
+
+    def labels(self, *values: str):
+        """The child for these label values, created on first use."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    @abstractmethod
+    def _new_child(self):
+        """A fresh child holding one label combination's value."""
+
+    def _label_dict(self, values: tuple) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def samples(self) -> List[Sample]:
+        return [(self._label_dict(values), child.value) for values, child in self._children.items()]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+class _Buckets:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+class Histogram(_Metric):
+    """Observations counted into fixed cumulative buckets, with their sum and count."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(float(bound) for bound in buckets)
+
+    def _new_child(self) -> _Buckets:
+        return _Buckets(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        samples = []
+        for values, child in self._children.items():
+            labels = self._label_dict(values)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), child.counts):
+                cumulative += count
+                samples.append(("_bucket", dict(labels, le=_format_value(bound)), cumulative))
+            samples.append(("_sum", labels, child.sum))
+            samples.append(("_count", labels, cumulative))
+        return samples
+
+class MetricsRegistry:
+    """
+    The metrics of one worker process, rendered in the Prometheus text format.
+
+    Updates are plain arithmetic on Python objects with no locks: the event loop runs one
+    coroutine at a time, so an increment cannot be interleaved with another. Each worker
+    started by app.server keeps its own registry, so Prometheus should scrape every
+    worker (or sum across them) rather than rely on a single scrape being the total.
+    """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], Iterable[Family]]) -> None:
+        """Add a callable read at scrape time, for values another component already keeps."""
+        self._collectors.append(collector)
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            if isinstance(metric, Histogram):
+                for suffix, labels, value in metric.samples():
+                    lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+            else:
+                for labels, value in metric.samples():
+                    lines.append(f"{metric.name}{_format_labels(labels)} {_format_value(value)}")
+        for collector in self._collectors:
+            for name, kind, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "Requests handled, by route name, method and status.", ("route", "method", "status"))
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "Time from request start to the end of the response body.", ("route", "method"))
+HTTP_IN_FLIGHT = registry.gauge("http_requests_in_flight", "Requests currently being handled.")
+DB_QUERY_SECONDS = registry.histogram(
+    "db_query_duration_seconds", "Time each SQL statement spent executing.", buckets=QUERY_LATENCY_BUCKETS)
+DB_QUERIES_PER_REQUEST = registry.histogram(
+    "db_queries_per_request", "SQL statements executed per request, by route name.", ("route",), QUERY_COUNT_BUCKETS)
+DB_SECONDS_PER_REQUEST = registry.histogram(
+    "db_seconds_per_request", "Total SQL execution time per request, by route name.", ("route",), QUERY_LATENCY_BUCKETS)
+PASSWORD_HASH_SECONDS = registry.histogram(
+    "password_hash_duration_seconds", "bcrypt time, by operation (hash or verify).", ("operation",))
+SMTP_SEND_SECONDS = registry.histogram(
+    "smtp_send_duration_seconds", "Time to deliver one email over SMTP, by outcome.", ("outcome",))
+STORAGE_CALL_SECONDS = registry.histogram(
+    "object_storage_call_duration_seconds", "MinIO call time, by operation.", ("operation",))
+
+class RequestMetrics:
+    """
+    SQL work attributed to the request running in the current context: the statement
+    count, total execution time and how often each normalized statement shape ran.
+    """
+    __slots__ = ("queries", "db_seconds", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements: Dict[str, int] = {}
+
+_current_request: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+def current_request_metrics() -> Optional[RequestMetrics]:
+    return _current_request.get()
+
+def route_name(scope: Scope) -> str:
+    """The matched route's name (`get_user`, `login`, ...), so ids in paths do not split the series."""
+    route = scope.get("route")
+    return getattr(route, "name", None) or "unmatched"
+
+class MetricsMiddleware:
+    """
+    Records per-route request count, latency and SQL work, and the in-flight gauge. Add it
+    inside any middleware that copies the scope so it sees the route the router matched.
+    A request that runs one statement shape `repeated_query_threshold` times or more is
+    logged as a likely N+1 (0 turns the check off).
+    """
+
+    def __init__(self, app: ASGIApp, repeated_query_threshold: int = 0):
+        self.app = app
+        self.repeated_query_threshold = repeated_query_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request = RequestMetrics()
+        token = _current_request.set(request)
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec()
+            _current_request.reset(token)
+            route, method = route_name(scope), scope["method"]
+            HTTP_REQUESTS.labels(route, method, str(status)).inc()
+            HTTP_REQUEST_SECONDS.labels(route, method).observe(elapsed)
+            DB_QUERIES_PER_REQUEST.labels(route).observe(request.queries)
+            DB_SECONDS_PER_REQUEST.labels(route).observe(request.db_seconds)
+            if self.repeated_query_threshold:
+                for statement, count in request.statements.items():
+                    if count >= self.repeated_query_threshold:
+                        logger.warning("%s %s ran one query %d times, a likely N+1: %s", method, route, count, statement)
@@ -0,0 +1,44 @@
+from builtins import bool, int, str
+from enum import IntFlag
+from typing import Dict, Optional
+from app.models.user_model import UserRole
+
+class Permission(IntFlag):
+    """Capabilities checked by route guards. Tokens carry the union as an integer `perms` claim."""
+    NONE = 0
+    PROFILE_READ = 1 << 0      # read one's own profile
+    PROFILE_UPDATE = 1 << 1    # edit one's own profile, upload a picture
+    USERS_READ = 1 << 2        # list users and fetch any user
+    USERS_SEARCH = 1 << 3
+    USERS_CREATE = 1 << 4
+    USERS_UPDATE = 1 << 5
+    USERS_DELETE = 1 << 6
+    USERS_EXPORT = 1 << 7
+    USERS_IMPORT = 1 << 8
+    USERS_BATCH = 1 << 9
+
+SELF_SERVICE = Permission.PROFILE_READ | Permission.PROFILE_UPDATE
+USER_MANAGEMENT = (
+    Permission.USERS_READ | Permission.USERS_SEARCH | Permission.USERS_CREATE
+    | Permission.USERS_UPDATE | Permission.USERS_DELETE
+)
+BULK_OPERATIONS = Permission.USERS_EXPORT | Permission.USERS_IMPORT | Permission.USERS_BATCH
+
+# The policy table: what each role may do. Managers handle individual accounts; bulk
+# export, import and batch changes stay with admins.
+ROLE_PERMISSIONS: Dict[UserRole, Permission] = {
+    UserRole.ANONYMOUS: SELF_SERVICE,
+    UserRole.AUTHENTICATED: SELF_SERVICE,
+    UserRole.MANAGER: SELF_SERVICE | USER_MANAGEMENT,
+    UserRole.ADMIN: SELF_SERVICE | USER_MANAGEMENT | BULK_OPERATIONS,
+}
+
+# Keyed by role name, the form roles take in tokens.
+ROLE_MASKS: Dict[str, int] = {role.name: int(mask) for role, mask in ROLE_PERMISSIONS.items()}
+
+def permissions_for(role: Optional[str]) -> int:
+    """The integer mask granted to a role name; unknown roles get nothing."""
+    return ROLE_MASKS.get(role, 0)
+
+def has_permissions(granted: int, required: int) -> bool:
+    return granted & required == required
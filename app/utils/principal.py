@@ -0,0 +1,42 @@
+from builtins import bool, classmethod, dict, int, isinstance, str
+from typing import Optional
+from uuid import UUID
+from app.utils.permissions import has_permissions, permissions_for
+
+class Principal:
+    """
+    The authenticated caller, built once per request from verified token claims. It holds
+    what guards and routes need (the user's id, role and permission mask) without a
+    database lookup; use `get_current_user_record` when the full row is required.
+    """
+    __slots__ = ("id", "role", "perms", "jti")
+
+    def __init__(self, id: UUID, role: str, perms: int, jti: Optional[str] = None):
+        self.id = id
+        self.role = role
+        self.perms = perms
+        self.jti = jti
+
+    @classmethod
+    def from_claims(cls, payload: dict) -> "Principal":
+        """Raises KeyError, ValueError or TypeError if the claims do not identify a user."""
+        role = payload["role"]
+        perms = payload.get("perms")
+        # Tokens issued before permission masks existed fall back to their role's mask.
+        if not isinstance(perms, int):
+            perms = permissions_for(role)
+        return cls(UUID(payload["sub"]), role, perms, payload.get("jti"))
+
+    def can(self, required: int) -> bool:
+        return has_permissions(self.perms, required)
+
+    def __getitem__(self, key: str):
+        # Routes written against the old dict form read current_user["user_id"] / ["role"].
+        if key == "user_id":
+            return str(self.id)
+        if key in self.__slots__:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __repr__(self) -> str:
+        return f"<Principal {self.id} role={self.role}>"
@@ -0,0 +1,162 @@
+from builtins import AssertionError, Exception, bool, float, getattr, int, len, list, set, str, tuple
+import hashlib
+import logging
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.utils.metrics import DB_QUERY_SECONDS, current_request_metrics
+from app.utils.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+_STRING_LITERALS = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERALS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDERS = re.compile(r"\$\d+|%\(\w+\)s|%s|(?<![:\w]):\w+|\?")
+_PLACEHOLDER_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+# Savepoints are transaction bookkeeping, not queries the code asked for; tests that
+# run inside a rolled-back transaction get one per session.
+_SAVEPOINT = re.compile(r"(?:RELEASE |ROLLBACK TO )?SAVEPOINT\b", re.IGNORECASE)
+
+@lru_cache(maxsize=2048)
+def normalize(statement: str) -> str:
+    """
+    The statement's shape: literals and bind placeholders become `?`, IN lists of any
+    length become `(?)` and whitespace is collapsed, so every execution of one query in
+    the code maps to the same text.
+    """
+    shape = _STRING_LITERALS.sub("?", statement)
+    shape = _NUMBER_LITERALS.sub("?", _PLACEHOLDERS.sub("?", shape))
+    shape = _PLACEHOLDER_LISTS.sub("(?)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """A short, stable id for the statement's shape, to group log lines by query."""
+    return hashlib.sha1(normalize(statement).encode("utf-8")).hexdigest()[:12]
+
+class SlowQueryLog:
+    """
+    Logs statements that ran longer than `threshold` seconds under their fingerprint.
+    With `explain`, the first slow run of each SELECT shape is followed by an EXPLAIN on
+    the same connection and the plan is logged with it; later slow runs of that shape
+    log only the timing, so a hot slow query does not double its own cost.
+    """
+
+    def __init__(self, threshold: float, explain: bool = False):
+        self.threshold = threshold
+        self.explain = explain
+        self._explained: set = set()
+
+    def record(self, conn, statement: str, parameters, elapsed: float, executemany: bool) -> None:
+        if elapsed < self.threshold:
+            return
+        key = fingerprint(statement)
+        plan = None
+        if (self.explain and not executemany and key not in self._explained
+                and statement.lstrip()[:6].upper() == "SELECT"):
+            self._explained.add(key)
+            plan = self._explain(conn, statement, parameters)
+        if plan:
+            logger.warning("Slow query %s took %.1f ms: %s\n%s", key, elapsed * 1000, normalize(statement), plan)
+        else:
+            logger.warning("Slow query %s took %.1f ms: %s", key, elapsed * 1000, normalize(statement))
+
+    @staticmethod
+    def _explain(conn, statement: str, parameters) -> Optional[str]:
+        prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+        # A raw DBAPI cursor, so the EXPLAIN is neither timed nor logged as a query itself.
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            return "\n".join(" ".join(str(column) for column in row) for row in cursor.fetchall())
+        except Exception as e:
+            logger.debug("Could not explain slow query %s: %s", fingerprint(statement), e)
+            return None
+        finally:
+            cursor.close()
+
+class QueryCounter:
+    """The statements executed while `count_queries` was active."""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+_counters: ContextVar[Tuple[QueryCounter, ...]] = ContextVar("query_counters", default=())
+
+@contextmanager
+def count_queries() -> Iterator[QueryCounter]:
+    """Record every statement the current task runs on an instrumented engine."""
+    counter = QueryCounter()
+    token = _counters.set(_counters.get() + (counter,))
+    try:
+        yield counter
+    finally:
+        _counters.reset(token)
+
+@contextmanager
+def assert_max_queries(n: int) -> Iterator[QueryCounter]:
+    """
+    Fail if the block runs more than `n` statements, listing them, e.g.
+    `with assert_max_queries(1): await UserService.update(db_session, user.id, data)`.
+    """
+    with count_queries() as counter:
+        yield counter
+    if counter.count > n:
+        statements = "\n".join(f"  {normalize(statement)}" for statement in counter.statements)
+        raise AssertionError(f"expected at most {n} queries, ran {counter.count}:\n{statements}")
+
+def instrument_engine(engine: AsyncEngine, slow_query_log: Optional[SlowQueryLog] = None) -> None:
+    """
+    Time every statement the engine runs, charge it to the current request and any active
+    `count_queries` blocks (savepoints excepted), and pass it to `slow_query_log` when one
+    is given. In a sampled trace each statement also gets a client span carrying its
+    normalized text.
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if tracer.enabled:
+            context._query_span = tracer.child_span(statement.split(None, 1)[0].upper(), "CLIENT", {
+                "db.system": conn.dialect.name, "db.statement": normalize(statement),
+            })
+        context._query_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_started
+        DB_QUERY_SECONDS.observe(elapsed)
+        span = getattr(context, "_query_span", None)
+        if span is not None:
+            tracer.finish_span(span)
+        if _SAVEPOINT.match(statement):
+            return
+        request = current_request_metrics()
+        if request is not None:
+            request.queries += 1
+            request.db_seconds += elapsed
+            shape = normalize(statement)
+            request.statements[shape] = request.statements.get(shape, 0) + 1
+        for counter in _counters.get():
+            counter.statements.append(statement)
+        if slow_query_log is not None:
+            slow_query_log.record(conn, statement, parameters, elapsed, executemany)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _failed(exception_context):
+        span = getattr(exception_context.execution_context, "_query_span", None)
+        if span is not None:
+            span.record_exception(exception_context.original_exception)
+            tracer.finish_span(span)
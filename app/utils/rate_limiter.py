@@ -0,0 +1,160 @@
+from builtins import ImportError, dict, float, int, max, min, str
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+
+class RateLimitBackend(ABC):
+    """
+    Storage for token buckets. The in-memory backend keeps state per process; a shared
+    backend (e.g. Redis) implements the same interface so limits hold across workers.
+    """
+
+    @abstractmethod
+    async def consume(self, key: str, capacity: int, refill_per_second: float, now: float) -> float:
+        """Take one token from `key`'s bucket. Returns 0 if allowed, else seconds until a token is available."""
+
+    @abstractmethod
+    async def reset(self, key: str) -> None:
+        """Forget `key`'s bucket, restoring its full capacity."""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Forget every bucket."""
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    Token buckets in an LRU-ordered dict. Each key costs one small tuple and the least
+    recently used keys are evicted beyond `max_keys`, so memory stays bounded even when
+    an attacker rotates through many IPs or emails. An evicted key simply starts over
+    with a full bucket.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def consume(self, key: str, capacity: int, refill_per_second: float, now: float) -> float:
+        tokens, updated = self._buckets.pop(key, (float(capacity), now))
+        tokens = min(float(capacity), tokens + (now - updated) * refill_per_second)
+        if tokens >= 1.0:
+            retry_after = 0.0
+            tokens -= 1.0
+        else:
+            retry_after = (1.0 - tokens) / refill_per_second
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+    async def reset(self, key: str) -> None:
+        self._buckets.pop(key, None)
+
+    async def clear(self) -> None:
+        self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+# Token bucket update run atomically inside Redis. Times come from the Redis server
+# clock so every worker (and host) measures refill against the same time source; the
+# bucket expires once it would have refilled completely, when it equals a fresh one.
+_CONSUME_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(retry_after)
+"""
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """
+    Token buckets in Redis, shared by every worker, so a client cannot multiply its
+    budget by landing on different processes. Requires the optional `redis` package.
+    Each check is one script round trip; the `now` argument is ignored in favour of
+    the Redis server clock.
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise ImportError("RedisRateLimitBackend requires the 'redis' package (pip install redis)") from e
+        self.client = redis.from_url(url)
+        self.prefix = prefix
+        self._consume = self.client.register_script(_CONSUME_SCRIPT)
+
+    async def consume(self, key: str, capacity: int, refill_per_second: float, now: float) -> float:
+        return float(await self._consume(keys=[self.prefix + key], args=[capacity, refill_per_second]))
+
+    async def reset(self, key: str) -> None:
+        await self.client.delete(self.prefix + key)
+
+    async def clear(self) -> None:
+        async for key in self.client.scan_iter(match=self.prefix + "*"):
+            await self.client.delete(key)
+
+
+class LoginThrottle:
+    """
+    Per-IP and per-email token buckets checked before any credential work. The IP bucket
+    stops one client from spraying many accounts; the email bucket stops a botnet from
+    hammering one account. Both are consulted on every attempt. `allowed` and `throttled`
+    count this process's decisions.
+    """
+
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        ip_burst: int,
+        ip_per_minute: float,
+        email_burst: int,
+        email_per_minute: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.backend = backend
+        self.ip_burst = ip_burst
+        self.ip_rate = ip_per_minute / 60.0
+        self.email_burst = email_burst
+        self.email_rate = email_per_minute / 60.0
+        self.clock = clock
+        self.allowed = 0
+        self.throttled = 0
+
+    async def check(self, ip: Optional[str], email: str) -> float:
+        """Returns 0 if the attempt may proceed, otherwise the Retry-After delay in seconds."""
+        now = self.clock()
+        retry_after = await self.backend.consume(f"login:email:{email.lower()}", self.email_burst, self.email_rate, now)
+        if ip:
+            retry_after = max(retry_after, await self.backend.consume(f"login:ip:{ip}", self.ip_burst, self.ip_rate, now))
+        if retry_after > 0:
+            self.throttled += 1
+        else:
+            self.allowed += 1
+        return retry_after
+
+    def stats(self) -> Dict[str, int]:
+        return {"allowed": self.allowed, "throttled": self.throttled}
+
+    async def record_success(self, email: str) -> None:
+        """A successful login clears the account's bucket so a user's own typos do not linger."""
+        await self.backend.reset(f"login:email:{email.lower()}")
+
+    async def clear(self) -> None:
+        await self.backend.clear()
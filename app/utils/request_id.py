@@ -0,0 +1,47 @@
+from builtins import next, str
+import re
+from contextvars import ContextVar
+from typing import Optional
+from uuid import uuid4
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+HEADER = "x-request-id"
+_HEADER_KEY = HEADER.encode("latin-1")
+
+# Ids from the proxy are echoed into logs and responses, so only short, plain ones are kept.
+_VALID_ID = re.compile(r"[A-Za-z0-9._-]{1,128}")
+
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+class RequestIdMiddleware:
+    """
+    Gives every request an id, taken from a valid incoming `X-Request-ID` (nginx sets one)
+    or generated, makes it available to log records through `current_request_id()` and
+    returns it in the response's `X-Request-ID` header.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        incoming = next((value for key, value in scope["headers"] if key == _HEADER_KEY), b"").decode("latin-1")
+        request_id = incoming if _VALID_ID.fullmatch(incoming) else uuid4().hex
+        token = _request_id.set(request_id)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[HEADER] = request_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_id.reset(token)
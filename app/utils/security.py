@@ -1,8 +1,9 @@
 # app/security.py
 from builtins import Exception, ValueError, bool, int, str
 import secrets
-import bcrypt
 from logging import getLogger
+from app.utils.metrics import PASSWORD_HASH_SECONDS
+from app.utils.tracing import tracer
 
 # Set up logging
 logger = getLogger(__name__)
@@ -21,9 +22,11 @@ def hash_password(password: str, rounds: int = 12) -> str:
     Raises:
         ValueError: If hashing the password fails.
     """
+    import bcrypt  # deferred so importing the app does not load the C extension
     try:
         salt = bcrypt.gensalt(rounds=rounds)
-        hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt)
+        with PASSWORD_HASH_SECONDS.labels("hash").time(), tracer.span("bcrypt.hash", rounds=rounds):
+            hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt)
         return hashed_password.decode('utf-8')
     except Exception as e:
         logger.error("Failed to hash password: %s", e)
@@ -43,8 +46,10 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Raises:
         ValueError: If the hashed password format is incorrect or the function fails to verify.
     """
+    import bcrypt
     try:
-        return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+        with PASSWORD_HASH_SECONDS.labels("verify").time(), tracer.span("bcrypt.verify"):
+            return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
     except Exception as e:
         logger.error("Error verifying password: %s", e)
         raise ValueError("Authentication process encountered an unexpected error") from e
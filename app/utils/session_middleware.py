@@ -0,0 +1,130 @@
+from builtins import Exception, RuntimeError, dict, float, int, max, str
+import logging
+from typing import Callable, Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import HTTPConnection
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+SCOPE_KEY = "db_session"
+
+class ConnectionHoldStats:
+    """Per-route totals of how long requests held a pooled database connection."""
+
+    def __init__(self):
+        self._routes: Dict[str, list] = {}
+
+    def record(self, route: str, seconds: float) -> None:
+        entry = self._routes.get(route)
+        if entry is None:
+            self._routes[route] = [1, seconds, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {
+            route: {"requests": count, "total_seconds": total, "max_seconds": longest}
+            for route, (count, total, longest) in self._routes.items()
+        }
+
+    def clear(self) -> None:
+        self._routes.clear()
+
+connection_hold_stats = ConnectionHoldStats()
+
+class RequestSession:
+    """The request's session, created on first use so routes without database work never open one."""
+
+    def __init__(self, session_factory: Callable[[], AsyncSession]):
+        self._session_factory = session_factory
+        self.session: Optional[AsyncSession] = None
+
+    def get(self) -> AsyncSession:
+        if self.session is None:
+            self.session = self._session_factory()
+        return self.session
+
+def request_session(connection: HTTPConnection) -> AsyncSession:
+    holder = connection.scope.get(SCOPE_KEY)
+    if holder is None:
+        raise RuntimeError("DatabaseSessionMiddleware is not installed")
+    return holder.get()
+
+class DatabaseSessionMiddleware:
+    """
+    Owns each request's database session. The session is created when `get_db` first
+    asks for it and checks out a connection at its first statement. Just before the
+    response starts, pending work is committed, or rolled back when the status is 400
+    or above, so the connection goes back to the pool without waiting for the body to
+    be sent. If the app raises, the session is rolled back and the error propagates to
+    the 500 handler. The time the connection was held is recorded per route in
+    `connection_hold_stats`.
+    """
+
+    def __init__(self, app: ASGIApp, session_factory: Callable[[], Callable[[], AsyncSession]],
+                 stats: ConnectionHoldStats = connection_hold_stats):
+        self.app = app
+        # Resolved per request: the factory only exists once the database is initialized.
+        self.session_factory = session_factory
+        self.stats = stats
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        holder = RequestSession(self.session_factory())
+        scope[SCOPE_KEY] = holder
+        finished = False
+        failed = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal finished, failed
+            if failed:
+                return
+            if message["type"] == "http.response.start" and not finished:
+                finished = True
+                if holder.session is not None:
+                    try:
+                        await self._finish(holder.session, message["status"] < 400)
+                    except Exception:
+                        logger.exception("Commit at the end of %s %s failed", scope["method"], scope["path"])
+                        failed = True
+                        await JSONResponse({"message": "An unexpected error occurred."}, status_code=500)(scope, receive, send)
+                        return
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            if holder.session is not None and not finished:
+                finished = True
+                await holder.session.rollback()
+            raise
+        finally:
+            if holder.session is not None:
+                await holder.session.close()
+                seconds = holder.session.sync_session.info.get("connection_seconds")
+                if seconds is not None:
+                    self.stats.record(_route_name(scope), seconds)
+
+    @staticmethod
+    async def _finish(session: AsyncSession, commit: bool) -> None:
+        if not session.in_transaction():
+            return
+        with tracer.span("db.commit" if commit else "db.rollback"):
+            if commit:
+                await session.commit()
+            else:
+                await session.rollback()
+
+def _route_name(scope: Scope) -> str:
+    route = scope.get("route")
+    path = getattr(route, "path", None) or "unmatched"
+    return f'{scope["method"]} {path}'
@@ -5,6 +5,11 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from settings.config import settings
 import logging
+import time
+from app.utils.metrics import SMTP_SEND_SECONDS
+from app.utils.tracing import tracer
+
+logger = logging.getLogger(__name__)
 
 class SMTPClient:
     def __init__(self, server: str, port: int, username: str, password: str):
@@ -14,6 +19,7 @@ class SMTPClient:
         self.password = password
 
     def send_email(self, subject: str, html_content: str, recipient: str):
+        started = time.perf_counter()
         try:
             message = MIMEMultipart('alternative')
             message['Subject'] = subject
@@ -21,11 +27,14 @@ class SMTPClient:
             message['To'] = recipient
             message.attach(MIMEText(html_content, 'html'))
 
-            with smtplib.SMTP(self.server, self.port) as server:
-                server.starttls()  # Use TLS
-                server.login(self.username, self.password)
-                server.sendmail(self.username, recipient, message.as_string())
-            logging.info(f"Email sent to {recipient}")
+            with tracer.span("smtp.send", "CLIENT", **{"server.address": self.server, "server.port": self.port}):
+                with smtplib.SMTP(self.server, self.port) as server:
+                    server.starttls()  # Use TLS
+                    server.login(self.username, self.password)
+                    server.sendmail(self.username, recipient, message.as_string())
+            SMTP_SEND_SECONDS.labels("sent").observe(time.perf_counter() - started)
+            logger.info("Email sent to %s", recipient)
         except Exception as e:
-            logging.error(f"Failed to send email: {str(e)}")
+            SMTP_SEND_SECONDS.labels("failed").observe(time.perf_counter() - started)
+            logger.error("Failed to send email: %s", e)
             raise
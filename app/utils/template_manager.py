@@ -1,7 +1,11 @@
-import markdown2
+from builtins import int, len, sorted, str
 from pathlib import Path
+from typing import Dict
 
 class TemplateManager:
+    # Templates ship with the code, so each file is read once per process.
+    _templates: Dict[Path, str] = {}
+
     def __init__(self):
         # Dynamically determine the root path of the project
         self.root_dir = Path(__file__).resolve().parent.parent.parent  # Adjust this depending on the structure
@@ -10,8 +14,20 @@ class TemplateManager:
     def _read_template(self, filename: str) -> str:
         """Private method to read template content."""
         template_path = self.templates_dir / filename
-        with open(template_path, 'r', encoding='utf-8') as file:
-            return file.read()
+        content = self._templates.get(template_path)
+        if content is None:
+            with open(template_path, 'r', encoding='utf-8') as file:
+                content = file.read()
+            self._templates[template_path] = content
+        return content
+
+    def preload(self) -> int:
+        """Read every template and run markdown once, so the first email skips the file reads and regex compilation."""
+        import markdown2
+        names = sorted(path.name for path in self.templates_dir.glob('*.md'))
+        for name in names:
+            markdown2.markdown(self._read_template(name))
+        return len(names)
 
     def _apply_email_styles(self, html: str) -> str:
         """Apply advanced CSS styles inline for email compatibility with excellent typography."""
@@ -41,6 +57,7 @@ class TemplateManager:
         main_template = self._read_template(f'{template_name}.md')
         main_content = main_template.format(**context)
 
+        import markdown2  # loaded with the first email rather than at startup
         full_markdown = f"{header}\n{main_content}\n{footer}"
         html_content = markdown2.markdown(full_markdown)
         return self._apply_email_styles(html_content)
@@ -0,0 +1,287 @@
+"""
+Lightweight tracing with OpenTelemetry-compatible spans.
+
+Trace and span ids, the W3C `traceparent` header and the trace-id ratio sampler follow
+the OpenTelemetry specification, and exported spans use the JSON layout of the
+OpenTelemetry console exporter, one span per line, so the output can be loaded by tools
+that read it or replayed into a collector. Tracing is off unless `tracing_enabled` is
+set; while off, instrumented code skips all span work after checking `tracer.enabled`.
+"""
+from builtins import BaseException, ValueError, bool, dict, float, getattr, int, isinstance, len, object, str, type
+import atexit
+import functools
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+SERVICE_NAME = "user-management"
+
+class Span:
+    """One timed operation within a trace."""
+    __slots__ = ("name", "kind", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "status", "description")
+
+    def __init__(self, name: str, kind: str, trace_id: int, parent_id: Optional[int], attributes: Dict[str, Any]):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = random.getrandbits(64) or 1
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.status = "UNSET"
+        self.description: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.status = "ERROR"
+        self.description = f"{type(exc).__name__}: {exc}"
+        self.attributes["exception.type"] = type(exc).__name__
+
+    def to_dict(self) -> Dict[str, Any]:
+        status = {"status_code": self.status}
+        if self.description:
+            status["description"] = self.description
+        return {
+            "name": self.name,
+            "context": {"trace_id": f"0x{self.trace_id:032x}", "span_id": f"0x{self.span_id:016x}", "trace_state": "[]"},
+            "kind": f"SpanKind.{self.kind}",
+            "parent_id": f"0x{self.parent_id:016x}" if self.parent_id else None,
+            "start_time": _iso(self.start_ns),
+            "end_time": _iso(self.end_ns),
+            "status": status,
+            "attributes": self.attributes,
+            "resource": {"attributes": {"service.name": SERVICE_NAME}},
+        }
+
+def _iso(ns: Optional[int]) -> Optional[str]:
+    if ns is None:
+        return None
+    return datetime.fromtimestamp(ns / 1e9, timezone.utc).isoformat().replace("+00:00", "Z")
+
+class _Unsampled:
+    """Marks a trace that was not sampled, so its descendants skip span work too."""
+    __slots__ = ("trace_id", "span_id")
+
+    def __init__(self, trace_id: int, span_id: int):
+        self.trace_id = trace_id
+        self.span_id = span_id
+
+_current: ContextVar[Optional[object]] = ContextVar("current_span", default=None)
+
+def current_span() -> Optional[Span]:
+    """The recording span of the current context, if any."""
+    span = _current.get()
+    return span if isinstance(span, Span) else None
+
+class SpanExporter:
+    """
+    Writes finished spans as JSON lines from a background thread, through a bounded queue
+    like the logging pipeline: serialization and I/O stay off the event loop, and when
+    the queue is full spans are dropped and counted rather than waited on.
+    """
+
+    def __init__(self, handler: logging.Handler, queue_size: int = 10000):
+        handler.setFormatter(_SpanFormatter())
+        self._queue: queue.Queue = queue.Queue(queue_size)
+        self._listener = logging.handlers.QueueListener(self._queue, handler)
+        self._listener.start()
+        self._running = True
+        atexit.register(self.shutdown)
+        self.dropped = 0
+
+    def export(self, span: Span) -> None:
+        record = logging.LogRecord("app.tracing", logging.INFO, "", 0, "", None, None)
+        record.span = span
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def shutdown(self) -> None:
+        """Write the spans still queued and stop the thread."""
+        if self._running:
+            self._running = False
+            self._listener.stop()
+
+class _SpanFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record.span.to_dict(), default=str, separators=(",", ":"))
+
+def console_exporter() -> SpanExporter:
+    return SpanExporter(logging.StreamHandler(sys.stdout))
+
+def file_exporter(path: str) -> SpanExporter:
+    return SpanExporter(logging.FileHandler(path, encoding="utf-8"))
+
+class Tracer:
+    """
+    Starts spans and hands finished ones to the exporter. Root spans are kept with
+    probability `sample_rate`, decided from the trace id as OpenTelemetry's
+    TraceIdRatioBased sampler does; child spans follow their parent's decision.
+    """
+
+    def __init__(self):
+        self.exporter: Optional[SpanExporter] = None
+        self.sample_rate = 0.0
+        self.enabled = False
+
+    def configure(self, exporter: Optional[SpanExporter], sample_rate: float) -> None:
+        if self.exporter is not None and self.exporter is not exporter:
+            self.exporter.shutdown()
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.enabled = exporter is not None and sample_rate > 0
+
+    def _sampled(self, trace_id: int) -> bool:
+        return (trace_id & 0xFFFFFFFFFFFFFFFF) < self.sample_rate * (1 << 64)
+
+    def start_span(self, name: str, kind: str = "INTERNAL", attributes: Optional[Dict[str, Any]] = None,
+                   remote_parent: Optional[Tuple[int, int, bool]] = None) -> Tuple[Optional[object], Any]:
+        """
+        Start a span under the current one (or under `remote_parent`, a
+        `(trace_id, span_id, sampled)` from `traceparent`) and make it current. Returns the
+        span or an unsampled marker, and the token `end_span` needs.
+        """
+        parent = _current.get()
+        if remote_parent is not None:
+            trace_id, parent_id, sampled = remote_parent
+        elif parent is not None:
+            trace_id, parent_id, sampled = parent.trace_id, parent.span_id, isinstance(parent, Span)
+        else:
+            trace_id, parent_id = random.getrandbits(128) or 1, None
+            sampled = self._sampled(trace_id)
+        if sampled:
+            span = Span(name, kind, trace_id, parent_id, dict(attributes) if attributes else {})
+        else:
+            span = _Unsampled(trace_id, parent_id or 0)
+        return span, _current.set(span)
+
+    def end_span(self, span: Optional[object], token: Any, exc: Optional[BaseException] = None) -> None:
+        _current.reset(token)
+        if isinstance(span, Span):
+            if exc is not None:
+                span.record_exception(exc)
+            self.finish_span(span)
+
+    def child_span(self, name: str, kind: str = "INTERNAL", attributes: Optional[Dict[str, Any]] = None) -> Optional[Span]:
+        """
+        Start a leaf span under the current one without making it current, for callbacks
+        such as SQLAlchemy's cursor events that cannot hold a context token. Only sampled
+        traces get one; finish it with `finish_span`.
+        """
+        parent = _current.get()
+        if not isinstance(parent, Span):
+            return None
+        return Span(name, kind, parent.trace_id, parent.span_id, dict(attributes) if attributes else {})
+
+    def finish_span(self, span: Span) -> None:
+        span.end_ns = time.time_ns()
+        if self.exporter is not None:  # tracing may have been switched off mid-span
+            self.exporter.export(span)
+
+    @contextmanager
+    def span(self, name: str, kind: str = "INTERNAL", **attributes: Any) -> Iterator[Optional[Span]]:
+        """`with tracer.span("smtp.send", kind="CLIENT") as span:` (span is None when not recording)."""
+        if not self.enabled:
+            yield None
+            return
+        span, token = self.start_span(name, kind, attributes)
+        try:
+            yield span if isinstance(span, Span) else None
+        except BaseException as exc:
+            self.end_span(span, token, exc)
+            raise
+        self.end_span(span, token)
+
+tracer = Tracer()
+
+def traced(name: Optional[str] = None, kind: str = "INTERNAL") -> Callable:
+    """Decorate a coroutine function so each call runs in a span named `name` (default: its qualname)."""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return await func(*args, **kwargs)
+            with tracer.span(span_name, kind):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def configure_tracing(enabled: bool, exporter: str, path: str, sample_rate: float) -> None:
+    """Set up this process's tracer from settings; `exporter` is "console" or "file"."""
+    if not enabled:
+        tracer.configure(None, 0.0)
+        return
+    tracer.configure(file_exporter(path) if exporter == "file" else console_exporter(), sample_rate)
+
+def parse_traceparent(value: str) -> Optional[Tuple[int, int, bool]]:
+    """`(trace_id, parent_span_id, sampled)` from a W3C traceparent header, or None if malformed."""
+    parts = value.strip().split("-")
+    if len(parts) < 4 or len(parts[0]) != 2 or parts[0] == "ff" or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        trace_id, parent_id, flags = int(parts[1], 16), int(parts[2], 16), int(parts[3][:2], 16)
+    except ValueError:
+        return None
+    if not trace_id or not parent_id:
+        return None
+    return trace_id, parent_id, bool(flags & 1)
+
+class TracingMiddleware:
+    """
+    Opens the server span for each request, continuing the caller's trace when a valid
+    `traceparent` header arrives, and names it after the matched route once routing is
+    done. Add it inside any middleware that copies the scope, like MetricsMiddleware.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+        remote_parent = None
+        for key, value in scope["headers"]:
+            if key == b"traceparent":
+                remote_parent = parse_traceparent(value.decode("latin-1"))
+                break
+        span, token = tracer.start_span(f'{scope["method"]} request', "SERVER", {
+            "http.request.method": scope["method"], "url.path": scope["path"],
+        }, remote_parent)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and isinstance(span, Span):
+                span.set_attribute("http.response.status_code", message["status"])
+                if message["status"] >= 500:
+                    span.status = "ERROR"
+            await send(message)
+
+        error = None
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            if isinstance(span, Span):
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    span.name = f'{scope["method"]} {route}'
+                    span.set_attribute("http.route", route)
+            tracer.end_span(span, token, error)
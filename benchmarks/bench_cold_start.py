@@ -0,0 +1,133 @@
+"""
+Measure cold-start latency: how the first requests to a freshly started worker compare
+with and without the startup warmup.
+
+Each run starts a new uvicorn process against the target database, waits until
+/health/ready answers, then immediately sends --requests authenticated GET /users/
+calls, --concurrency at a time, as an admin seeded into the database. Reported per mode
+are the time from process start to ready and the p50/p99 latency of those first
+requests, over --runs fresh processes.
+
+    python -m benchmarks.bench_cold_start
+    python -m benchmarks.bench_cold_start --database-url sqlite+aiosqlite:///bench.db --runs 5
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import timedelta
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database import Base
+import app.models.session_model  # noqa: F401  registers user_sessions on Base.metadata
+import app.models.token_revocation_model  # noqa: F401  registers token_revocations on Base.metadata
+from app.models.user_model import User, UserRole
+from app.services.jwt_service import create_access_token
+from app.utils.security import hash_password
+from settings.config import settings
+
+ADMIN_EMAIL = "bench_admin@example.com"
+
+
+async def seed_admin(database_url: str) -> tuple:
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        row = (await conn.execute(select(User.id, User.role).where(User.email == ADMIN_EMAIL))).first()
+        if row is None:
+            row = (uuid.uuid4(), UserRole.ADMIN)
+            await conn.execute(User.__table__.insert().values(
+                id=row[0], nickname="bench_admin", email=ADMIN_EMAIL, role=UserRole.ADMIN,
+                hashed_password=hash_password("BenchPassword1!", rounds=4), email_verified=True,
+            ))
+    await engine.dispose()
+    return row
+
+
+def percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def wait_ready(client: httpx.AsyncClient, process: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with status {process.returncode}")
+        try:
+            if (await client.get("/health/ready")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.01)
+    raise RuntimeError("server did not become ready in time")
+
+
+async def first_requests(client: httpx.AsyncClient, token: str, requests: int, concurrency: int) -> list:
+    headers = {"Authorization": f"Bearer {token}"}
+    gate = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with gate:
+            started = time.perf_counter()
+            response = await client.get("/users/", params={"limit": 10}, headers=headers)
+            latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies
+
+
+async def run_once(args, warm: bool, token: str) -> tuple:
+    env = dict(os.environ, DATABASE_URL=args.database_url, WARMUP_ENABLED=str(warm).lower())
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=30) as client:
+            await wait_ready(client, process, args.startup_timeout)
+            ready_after = time.perf_counter() - started
+            latencies = await first_requests(client, token, args.requests, args.concurrency)
+    finally:
+        process.terminate()
+        process.wait()
+    return ready_after, latencies
+
+
+async def main_async(args) -> None:
+    admin_id, role = await seed_admin(args.database_url)
+    token = create_access_token(data={"sub": str(admin_id), "role": role.name}, expires_delta=timedelta(minutes=30))
+    for warm in (False, True):
+        ready, latencies = [], []
+        for _ in range(args.runs):
+            ready_after, run_latencies = await run_once(args, warm, token)
+            ready.append(ready_after)
+            latencies.extend(run_latencies)
+        print(f"warmup {'on ' if warm else 'off'}: ready after {statistics.median(ready) * 1000:.0f} ms, "
+              f"first {args.requests} requests p50 {percentile(latencies, 0.5) * 1000:.1f} ms, "
+              f"p99 {percentile(latencies, 0.99) * 1000:.1f} ms, max {max(latencies) * 1000:.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=settings.database_url)
+    parser.add_argument("--runs", type=int, default=3, help="Fresh server processes per mode")
+    parser.add_argument("--requests", type=int, default=50, help="Requests sent right after the server is ready")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--startup-timeout", type=float, default=60)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Measure streaming user-export throughput (rows/sec) and peak memory.
+
+Seeds the target database with synthetic users (skipped when it already holds at
+least --rows users), then drains `stream_export` exactly as the /users/export
+endpoint does and reports throughput for each format.
+
+    python -m benchmarks.bench_export --rows 1000000
+    python -m benchmarks.bench_export --database-url sqlite+aiosqlite:///bench.db --rows 100000
+"""
+import argparse
+import asyncio
+import resource
+import time
+import uuid
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.user_model import User, UserRole
+from app.services.export_service import ExportFormat, parse_columns, stream_export
+from settings.config import settings
+
+SEED_CHUNK = 5000
+
+
+async def seed(engine, rows: int) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        existing = (await conn.execute(select(func.count()).select_from(User))).scalar()
+        for start in range(existing, rows, SEED_CHUNK):
+            batch = [
+                {
+                    "id": uuid.uuid4(),
+                    "nickname": f"bench_{n}",
+                    "email": f"bench_{n}@example.com",
+                    "first_name": "Bench",
+                    "last_name": f"User{n}",
+                    "role": UserRole.AUTHENTICATED,
+                    "email_verified": True,
+                    "is_locked": False,
+                    "hashed_password": "x",
+                }
+                for n in range(start, min(start + SEED_CHUNK, rows))
+            ]
+            await conn.execute(insert(User), batch)
+
+
+async def run(database_url: str, rows: int, batch_size: int, columns: str) -> None:
+    engine = create_async_engine(database_url)
+    await seed(engine, rows)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    selected = parse_columns(columns)
+    for export_format in ExportFormat:
+        exported = 0
+        size = 0
+        started = time.perf_counter()
+        async for chunk in stream_export(session_factory, export_format, selected, batch_size=batch_size):
+            exported += chunk.count("\n")
+            size += len(chunk)
+        elapsed = time.perf_counter() - started
+        if export_format == ExportFormat.CSV:
+            exported -= 1  # header line
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"{export_format.value:>6}: {exported} rows in {elapsed:.2f}s = {exported / elapsed:,.0f} rows/sec, "
+              f"{size / 1e6:.1f} MB written, peak RSS {peak_mb:.0f} MB")
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=settings.database_url)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=settings.export_batch_size)
+    parser.add_argument("--columns", default=None, help="Comma-separated export columns (default: all)")
+    args = parser.parse_args()
+    asyncio.run(run(args.database_url, args.rows, args.batch_size, args.columns))
+
+
+if __name__ == "__main__":
+    main()
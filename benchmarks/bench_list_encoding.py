@@ -0,0 +1,95 @@
+"""
+Compare encode time and bytes on the wire for /users list pages.
+
+Builds UserListResponse pages of synthetic users with pagination links, runs them
+through `jsonable_encoder` exactly as FastAPI does for a response_model, then renders
+them with the stdlib-based JSONResponse and with ORJSONResponse. Each rendered page is
+also compressed with gzip (and brotli, when installed) at the configured levels.
+
+    python -m benchmarks.bench_list_encoding
+    python -m benchmarks.bench_list_encoding --sizes 10,100 --iterations 2000
+"""
+import argparse
+import json
+import time
+import uuid
+import zlib
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.models.user_model import UserRole
+from app.schemas.pagination_schema import PaginationLink
+from app.schemas.user_schemas import UserListResponse, UserResponse
+from app.utils.compression import brotli
+from settings.config import settings
+
+
+def make_page(size: int) -> UserListResponse:
+    items = [
+        UserResponse(
+            id=uuid.uuid4(),
+            email=f"bench_{n}@example.com",
+            nickname=f"bench_{n}",
+            first_name="Bench",
+            last_name=f"User{n}",
+            bio="Experienced software developer specializing in web applications.",
+            profile_picture_url=f"https://example.com/profiles/bench_{n}.jpg",
+            linkedin_profile_url=f"https://linkedin.com/in/bench_{n}",
+            github_profile_url=f"https://github.com/bench_{n}",
+            role=UserRole.AUTHENTICATED,
+        )
+        for n in range(size)
+    ]
+    base_url = f"http://localhost/users?skip=0&limit={size}"
+    links = [PaginationLink(rel=rel, href=base_url) for rel in ("self", "first", "last", "next")]
+    return UserListResponse(items=items, total=size * 50, page=1, size=size, links=links)
+
+
+def per_call_us(func, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def gzip_bytes(body: bytes) -> bytes:
+    compressor = zlib.compressobj(settings.compression_gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(body) + compressor.flush()
+
+
+def run(size: int, iterations: int) -> None:
+    page = make_page(size)
+    content = jsonable_encoder(page)
+    stdlib_us = per_call_us(lambda: JSONResponse(content), iterations)
+    orjson_us = per_call_us(lambda: ORJSONResponse(content), iterations)
+    body = ORJSONResponse(content).body
+    assert json.loads(body) == json.loads(JSONResponse(content).body)
+
+    print(f"page of {size} users: encode stdlib {stdlib_us:.1f} us, orjson {orjson_us:.1f} us "
+          f"({stdlib_us / orjson_us:.1f}x)")
+    print(f"  identity {len(body)} bytes")
+    gzipped = gzip_bytes(body)
+    gzip_us = per_call_us(lambda: gzip_bytes(body), max(iterations // 10, 1))
+    print(f"  gzip -{settings.compression_gzip_level}  {len(gzipped)} bytes "
+          f"({len(gzipped) / len(body) * 100:.0f}%), {gzip_us:.1f} us")
+    if brotli is not None:
+        quality = settings.compression_brotli_quality
+        compressed = brotli.compress(body, quality=quality)
+        brotli_us = per_call_us(lambda: brotli.compress(body, quality=quality), max(iterations // 10, 1))
+        print(f"  br q{quality}    {len(compressed)} bytes ({len(compressed) / len(body) * 100:.0f}%), {brotli_us:.1f} us")
+    else:
+        print("  br       skipped (pip install brotli)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,100", help="Comma-separated page sizes (the API allows up to 100)")
+    parser.add_argument("--iterations", type=int, default=1000)
+    args = parser.parse_args()
+    for size in (int(s) for s in args.sizes.split(",")):
+        run(size, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
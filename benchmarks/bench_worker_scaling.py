@@ -0,0 +1,83 @@
+"""
+Measure how throughput scales with app.server worker processes.
+
+For each worker count, starts `python -m app.server` against the target database, waits
+for /health/ready, then keeps --concurrency clients sending authenticated GET /users/
+requests for --duration seconds and reports requests per second and p50/p99 latency.
+The admin making the requests is seeded into the database first.
+
+The load generator runs in this process, so on a small machine it competes with the
+workers for CPU; run it from another host for numbers that reflect the server alone.
+
+    python -m benchmarks.bench_worker_scaling
+    python -m benchmarks.bench_worker_scaling --workers 1,2,4,8 --concurrency 128 --duration 20
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from datetime import timedelta
+
+import httpx
+
+from app.services.jwt_service import create_access_token
+from benchmarks.bench_cold_start import percentile, seed_admin, wait_ready
+from settings.config import settings
+
+
+async def load(client: httpx.AsyncClient, token: str, concurrency: int, duration: float) -> list:
+    headers = {"Authorization": f"Bearer {token}"}
+    deadline = time.perf_counter() + duration
+    latencies = []
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await client.get("/users/", params={"limit": 10}, headers=headers)
+            latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+async def run(args, workers: int, token: str) -> None:
+    env = dict(os.environ, DATABASE_URL=args.database_url, SERVER_WORKERS=str(workers),
+               SERVER_PORT=str(args.port), SERVER_HOST="127.0.0.1")
+    process = subprocess.Popen([sys.executable, "-m", "app.server"], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=30, limits=limits) as client:
+            await wait_ready(client, process, args.startup_timeout)
+            await load(client, token, args.concurrency, min(args.duration, 2))  # let every worker warm up
+            latencies = await load(client, token, args.concurrency, args.duration)
+    finally:
+        process.terminate()
+        process.wait()
+    print(f"{workers} worker(s): {len(latencies) / args.duration:8.1f} req/s, "
+          f"p50 {percentile(latencies, 0.5) * 1000:.1f} ms, p99 {percentile(latencies, 0.99) * 1000:.1f} ms")
+
+
+async def main_async(args) -> None:
+    admin_id, role = await seed_admin(args.database_url)
+    token = create_access_token(data={"sub": str(admin_id), "role": role.name}, expires_delta=timedelta(minutes=30))
+    for workers in (int(n) for n in args.workers.split(",")):
+        await run(args, workers, token)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=settings.database_url)
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts to compare")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of measured load per worker count")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--startup-timeout", type=float, default=60)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
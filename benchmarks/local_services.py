@@ -0,0 +1,157 @@
+"""
+In-process stand-ins for the SMTP server and MinIO, so endpoint benchmarks exercise the
+real email and upload code paths without containers or network access.
+
+`SmtpSink` speaks enough SMTP for `SMTPClient.send_email` (EHLO, STARTTLS with a
+throwaway self-signed certificate, AUTH PLAIN, MAIL, RCPT, DATA) and counts the
+messages it accepts. `FakeObjectStore` answers the S3 calls the minio client makes for
+an upload (bucket location, HEAD bucket, PUT and DELETE object) and keeps object sizes.
+Both run on daemon threads and bind to an ephemeral port on 127.0.0.1.
+"""
+import os
+import socketserver
+import ssl
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+
+def _self_signed_context() -> ssl.SSLContext:
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.now(timezone.utc)
+    certificate = (
+        x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1)).not_valid_after(now + timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    with tempfile.TemporaryDirectory() as directory:
+        cert_path, key_path = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+        with open(cert_path, "wb") as f:
+            f.write(certificate.public_bytes(serialization.Encoding.PEM))
+        with open(key_path, "wb") as f:
+            f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                      serialization.NoEncryption()))
+        context.load_cert_chain(cert_path, key_path)
+    return context
+
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    def reply(self, line: str) -> None:
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+        self.wfile.flush()
+
+    def handle(self) -> None:
+        self.reply("220 localhost benchmark sink")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("latin-1").strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self.reply("250-localhost")
+                self.reply("250-STARTTLS")
+                self.reply("250 AUTH PLAIN")
+            elif command == "STARTTLS":
+                self.reply("220 ready for TLS")
+                self.connection = self.server.tls.wrap_socket(self.connection, server_side=True)
+                self.rfile = self.connection.makefile("rb")
+                self.wfile = self.connection.makefile("wb")
+            elif command.startswith("AUTH"):
+                self.reply("235 authenticated")
+            elif command == "DATA":
+                self.reply("354 end with <CRLF>.<CRLF>")
+                while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                    pass
+                with self.server.lock:
+                    self.server.messages += 1
+                self.reply("250 queued")
+            elif command == "QUIT":
+                self.reply("221 bye")
+                return
+            else:  # MAIL, RCPT, RSET, NOOP
+                self.reply("250 ok")
+
+
+class SmtpSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _SmtpHandler)
+        self.tls = _self_signed_context()
+        self.lock = threading.Lock()
+        self.messages = 0
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self) -> "SmtpSink":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _ObjectStoreHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def respond(self, status: int, body: bytes = b"", headers: dict = None) -> None:
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if "location" in urlsplit(self.path).query:
+            self.respond(200, b'<?xml version="1.0" encoding="UTF-8"?>'
+                              b'<LocationConstraint xmlns="http://s3.amazonaws.com/doc/2006-03-01/"/>',
+                         {"Content-Type": "application/xml"})
+        else:
+            self.respond(404)
+
+    def do_HEAD(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_PUT(self) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with self.server.lock:
+            self.server.objects[urlsplit(self.path).path] = len(body)
+        self.respond(200, headers={"ETag": '"00000000000000000000000000000000"'})
+
+    def do_DELETE(self) -> None:
+        with self.server.lock:
+            self.server.objects.pop(urlsplit(self.path).path, None)
+        self.respond(204)
+
+
+class FakeObjectStore(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _ObjectStoreHandler)
+        self.lock = threading.Lock()
+        self.objects = {}
+
+    @property
+    def endpoint(self) -> str:
+        return f"127.0.0.1:{self.server_address[1]}"
+
+    def start(self) -> "FakeObjectStore":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
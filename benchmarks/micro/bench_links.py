@@ -0,0 +1,9 @@
+from app.utils.link_generation import create_user_links, generate_pagination_links
+
+
+def bench_create_user_links(benchmark, request_, user):
+    assert len(benchmark(create_user_links, user.id, request_)) == 3
+
+
+def bench_generate_pagination_links(benchmark, request_):
+    assert len(benchmark(generate_pagination_links, request_, 20, 10, 1000)) == 5
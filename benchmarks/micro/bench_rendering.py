@@ -0,0 +1,18 @@
+from app.schemas.user_schemas import UserResponse
+from app.utils.nickname_gen import generate_nickname
+from app.utils.template_manager import TemplateManager
+
+
+def bench_render_template(benchmark):
+    manager = TemplateManager()
+    html = benchmark(manager.render_template, "email_verification", name="John",
+                     verification_url="http://localhost/verify-email/1/abc", email="john.doe@example.com")
+    assert "verify-email" in html
+
+
+def bench_user_response_model_validate(benchmark, user):
+    assert benchmark(UserResponse.model_validate, user).id == user.id
+
+
+def bench_generate_nickname(benchmark):
+    benchmark(generate_nickname)
@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+import pytest
+
+from app.services.jwt_service import create_access_token, decode_token
+from app.utils.security import hash_password, verify_password
+
+PASSWORD = "Secure*1234"
+
+
+@pytest.fixture(scope="module")
+def hashed() -> str:
+    return hash_password(PASSWORD)
+
+
+@pytest.fixture(scope="module")
+def token() -> str:
+    return create_access_token(data={"sub": "1c9f0d2e-5b7a-4f7e-9c61-0f1e2d3c4b5a", "role": "ADMIN"},
+                               expires_delta=timedelta(minutes=30))
+
+
+# bcrypt at the production cost factor takes a few hundred milliseconds, so these two
+# run a fixed handful of rounds instead of letting pytest-benchmark calibrate.
+def bench_hash_password(benchmark):
+    benchmark.pedantic(hash_password, args=(PASSWORD,), rounds=5, iterations=1)
+
+
+def bench_verify_password(benchmark, hashed):
+    assert benchmark.pedantic(verify_password, args=(PASSWORD, hashed), rounds=5, iterations=1)
+
+
+def bench_create_access_token(benchmark):
+    benchmark(create_access_token, data={"sub": "1c9f0d2e-5b7a-4f7e-9c61-0f1e2d3c4b5a", "role": "ADMIN"},
+              expires_delta=timedelta(minutes=30))
+
+
+def bench_decode_token(benchmark, token):
+    assert benchmark(decode_token, token)["role"] == "ADMIN"
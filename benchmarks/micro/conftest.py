@@ -0,0 +1,54 @@
+"""
+pytest-benchmark micro benchmarks for the per-request CPU costs of the service layer:
+password hashing, JWTs, HATEOAS links, email templates, response models and nicknames.
+
+Run from the repository root (not part of the functional suite; pytest picks up
+benchmarks/micro/pytest.ini):
+
+    python -m pytest benchmarks/micro
+    python -m pytest benchmarks/micro --benchmark-compare --benchmark-compare-fail=median:10%
+    python -m pytest benchmarks/micro --benchmark-save=baseline
+
+The committed baseline lives in benchmarks/baselines/micro, under the machine id
+pytest-benchmark derives from the platform and interpreter; compare only against a
+baseline recorded on the same machine.
+"""
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import FastAPI
+from starlette.requests import Request
+
+from app.models.user_model import User, UserRole
+from app.routers import user_routes
+
+
+@pytest.fixture(scope="session")
+def app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(user_routes.router)
+    return app
+
+
+@pytest.fixture
+def request_(app) -> Request:
+    """A GET /users/?skip=20&limit=10 request routed through the real user routes."""
+    return Request({
+        "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http",
+        "server": ("testserver", 80), "root_path": "", "path": "/users/", "query_string": b"skip=20&limit=10",
+        "headers": [(b"host", b"testserver")], "app": app, "router": app.router,
+    })
+
+
+@pytest.fixture
+def user() -> User:
+    now = datetime.now(timezone.utc)
+    return User(
+        id=uuid.uuid4(), nickname="clever_fox_42", email="john.doe@example.com", first_name="John",
+        last_name="Doe", bio="Experienced software developer.", role=UserRole.AUTHENTICATED,
+        profile_picture_url="https://example.com/profiles/john.jpg",
+        linkedin_profile_url="https://linkedin.com/in/johndoe", github_profile_url="https://github.com/johndoe",
+        is_professional=False, email_verified=True, is_locked=False, failed_login_attempts=0,
+        created_at=now, updated_at=now,
+    )
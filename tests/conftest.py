@@ -9,12 +9,22 @@ Fixtures:
 - `db_session`: Handles database transactions to ensure a clean database state for each test.
 - User fixtures (`user`, `locked_user`, `verified_user`, etc.): Set up various user states to test different behaviors under diverse conditions.
 - `token`: Generates an authentication token for testing secured endpoints.
-- `initialize_database`: Prepares the database at the session start.
-- `setup_database`: Sets up and tears down the database before and after each test.
+- `database_schema`: Creates the schema once per test session (per worker under pytest-xdist).
+- `initialize_database`: Points the application's engine at the test database.
+- `setup_database`: Resets process-wide caches before each test and cleans up after it.
+
+Each test runs inside a transaction that is rolled back when it ends; commits made by the
+test or the code under test only release a SAVEPOINT, so no rows outlive the test. Tests
+whose data must be visible to other connections (separate sessions, streaming exports)
+are marked `@pytest.mark.committed`: they commit for real and the tables are truncated
+afterwards. Fixture users are hashed at bcrypt's minimum cost, and so is every password
+the services hash during tests.
 """
 
 # Standard library imports
 from builtins import Exception, range, str
+import asyncio
+from functools import partial
 from datetime import timedelta
 from unittest.mock import AsyncMock, patch
 from uuid import uuid4
@@ -24,26 +34,57 @@ import pytest
 import os
 from fastapi.testclient import TestClient
 from httpx import AsyncClient
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.pool import NullPool
 from sqlalchemy.orm import sessionmaker, scoped_session
 from faker import Faker
 
 # Application-specific imports
 from app.main import app
-from app.database import Base, Database
+from app.database import Base, Database, TimedSession
 from app.models.user_model import User, UserRole
-from app.dependencies import get_db, get_settings
+from app.dependencies import get_db, get_login_throttle, get_settings
+from app.utils.query_stats import instrument_engine
 from app.utils.security import hash_password
+from app.services import user_import_service, user_service
 from app.utils.template_manager import TemplateManager
 from app.services.email_service import EmailService
 from app.services.jwt_service import create_access_token
+from app.services.revocation_service import revocation_list
+from app.services.user_cache import user_cache
 
 fake = Faker()
 
 settings = get_settings()
-TEST_DATABASE_URL = settings.database_url.replace("postgresql://", "postgresql+asyncpg://")
+
+def worker_database_url(url: str) -> str:
+    """Under pytest-xdist each worker gets its own database, `<name>_gw0`, `<name>_gw1`, ..."""
+    worker = os.environ.get("PYTEST_XDIST_WORKER")
+    if not worker:
+        return url
+    parsed = make_url(url)
+    return parsed.set(database=f"{parsed.database}_{worker}").render_as_string(hide_password=False)
+
+TEST_DATABASE_URL = worker_database_url(settings.database_url.replace("postgresql://", "postgresql+asyncpg://"))
+# Fixture passwords are hashed at bcrypt's minimum cost; verification reads the cost from the hash.
+TEST_PASSWORD_ROUNDS = 4
 engine = create_async_engine(TEST_DATABASE_URL, echo=settings.debug)
-AsyncTestingSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+instrument_engine(engine)  # charge test queries to requests, as Database.initialize does
+
+if engine.dialect.name == "sqlite":
+    # pysqlite defers BEGIN and so breaks SAVEPOINTs; emit it ourselves so the per-test
+    # rollback also works against a local SQLite file.
+    @event.listens_for(engine.sync_engine, "connect")
+    def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+AsyncTestingSessionLocal = sessionmaker(engine, class_=AsyncSession, sync_session_class=TimedSession, expire_on_commit=False)
 AsyncSessionScoped = scoped_session(AsyncTestingSessionLocal)
 
 
@@ -58,6 +99,7 @@ def email_service():
 # this is what creates the http client for your api tests
 @pytest.fixture(scope="function")
 async def async_client(db_session):
+    await get_login_throttle().clear()
     async with AsyncClient(app=app, base_url="http://testserver") as client:
         app.dependency_overrides[get_db] = lambda: db_session
         try:
@@ -65,31 +107,89 @@ async def async_client(db_session):
         finally:
             app.dependency_overrides.clear()
 
+async def _create_schema():
+    url = make_url(TEST_DATABASE_URL)
+    if url.get_backend_name() == "postgresql" and url.database != make_url(settings.database_url).database:
+        # A worker database is created on first use, from the server's maintenance database.
+        admin = create_async_engine(url.set(database="postgres"), isolation_level="AUTOCOMMIT", poolclass=NullPool)
+        async with admin.connect() as conn:
+            exists = (await conn.execute(text("SELECT 1 FROM pg_database WHERE datname = :name"), {"name": url.database})).first()
+            if not exists:
+                await conn.execute(text(f'CREATE DATABASE "{url.database}"'))
+        await admin.dispose()
+    schema_engine = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+    async with schema_engine.begin() as conn:
+        if url.get_backend_name() == "postgresql":
+            # The trigram search indexes need pg_trgm, which create_all does not install.
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        # Start from an empty schema even if an interrupted run left tables behind.
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    await schema_engine.dispose()
+
+async def _drop_schema():
+    schema_engine = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+    async with schema_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await schema_engine.dispose()
+
+@pytest.fixture(scope="session", autouse=True)
+def database_schema():
+    # Runs before any test's event loop exists, so it gets a loop of its own.
+    asyncio.run(_create_schema())
+    yield
+    asyncio.run(_drop_schema())
+
 @pytest.fixture(scope="session", autouse=True)
-def initialize_database():
+def initialize_database(database_schema):
     try:
-        Database.initialize(settings.database_url)
+        Database.initialize(TEST_DATABASE_URL)
     except Exception as e:
         pytest.fail(f"Failed to initialize the database: {str(e)}")
 
-# this function setup and tears down (drops tales) for each test function, so you have a clean database for each test.
+@pytest.fixture(autouse=True)
+def fast_password_hashing(monkeypatch):
+    """Passwords the services hash during tests use the minimum bcrypt cost too."""
+    cheap_hash = partial(hash_password, rounds=TEST_PASSWORD_ROUNDS)
+    monkeypatch.setattr(user_service, "hash_password", cheap_hash)
+    monkeypatch.setattr(user_import_service, "hash_password", cheap_hash)
+
 @pytest.fixture(scope="function", autouse=True)
-async def setup_database():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+async def setup_database(request):
+    # The deny list and user cache are process-wide; entries from an earlier test refer to rolled back rows.
+    revocation_list.clear()
+    await user_cache.clear()
     yield
-    async with engine.begin() as conn:
-        # you can comment out this line during development if you are debugging a single test
-         await conn.run_sync(Base.metadata.drop_all)
+    if request.node.get_closest_marker("committed"):
+        async with engine.begin() as conn:
+            if engine.dialect.name == "postgresql":
+                tables = ", ".join(f'"{table.name}"' for table in Base.metadata.sorted_tables)
+                await conn.execute(text(f"TRUNCATE {tables} CASCADE"))
+            else:
+                for table in reversed(Base.metadata.sorted_tables):
+                    await conn.execute(table.delete())
+    # Pooled connections belong to this test's event loop, the application's included.
     await engine.dispose()
+    await Database.get_engine().dispose()
 
 @pytest.fixture(scope="function")
-async def db_session(setup_database):
-    async with AsyncSessionScoped() as session:
+async def db_session(request, setup_database):
+    if request.node.get_closest_marker("committed"):
+        async with AsyncSessionScoped() as session:
+            try:
+                yield session
+            finally:
+                await session.close()
+        return
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        session = AsyncSession(bind=conn, sync_session_class=TimedSession, expire_on_commit=False,
+                               join_transaction_mode="create_savepoint")
         try:
             yield session
         finally:
             await session.close()
+            await transaction.rollback()
 
 @pytest.fixture(scope="function")
 async def locked_user(db_session):
@@ -99,7 +199,7 @@ async def locked_user(db_session):
         "first_name": fake.first_name(),
         "last_name": fake.last_name(),
         "email": unique_email,
-        "hashed_password": hash_password("MySuperPassword$1234"),
+        "hashed_password": hash_password("MySuperPassword$1234", rounds=TEST_PASSWORD_ROUNDS),
         "role": UserRole.AUTHENTICATED,
         "email_verified": False,
         "is_locked": True,
@@ -118,7 +218,7 @@ async def user(db_session):
         "first_name": fake.first_name(),
         "last_name": fake.last_name(),
         "email": fake.email(),
-        "hashed_password": hash_password("MySuperPassword$1234"),
+        "hashed_password": hash_password("MySuperPassword$1234", rounds=TEST_PASSWORD_ROUNDS),
         "role": UserRole.AUTHENTICATED,
         "email_verified": False,
         "is_locked": False,
@@ -136,7 +236,7 @@ async def verified_user(db_session):
         "first_name": fake.first_name(),
         "last_name": fake.last_name(),
         "email": fake.email(),
-        "hashed_password": hash_password("MySuperPassword$1234"),
+        "hashed_password": hash_password("MySuperPassword$1234", rounds=TEST_PASSWORD_ROUNDS),
         "role": UserRole.AUTHENTICATED,
         "email_verified": True,
         "is_locked": False,
@@ -154,7 +254,7 @@ async def unverified_user(db_session):
         "first_name": fake.first_name(),
         "last_name": fake.last_name(),
         "email": fake.email(),
-        "hashed_password": hash_password("MySuperPassword$1234"),
+        "hashed_password": hash_password("MySuperPassword$1234", rounds=TEST_PASSWORD_ROUNDS),
         "role": UserRole.AUTHENTICATED,
         "email_verified": False,
         "is_locked": False,
@@ -0,0 +1,25 @@
+import pytest
+from app.main import app, lifespan
+from app.services.warmup_service import WarmupService
+from tests.conftest import engine
+
+@pytest.mark.asyncio
+async def test_liveness(async_client):
+    response = await async_client.get("/health/live")
+    assert response.status_code == 200
+
+@pytest.mark.asyncio
+async def test_ready_only_between_warmup_and_shutdown(async_client):
+    assert (await async_client.get("/health/ready")).status_code == 503
+    async with lifespan(app):
+        response = await async_client.get("/health/ready")
+        assert response.status_code == 200
+        assert response.json() == {"status": "ready"}
+    assert (await async_client.get("/health/ready")).status_code == 503
+
+@pytest.mark.asyncio
+async def test_warmup_opens_and_primes_pool_connections():
+    await engine.dispose()
+    timings = await WarmupService.run(app, engine, connections=3)
+    assert set(timings) == {"pool", "templates", "schemas", "hasher"}
+    assert engine.pool.checkedin() == 3
@@ -0,0 +1,15 @@
+import pytest
+
+@pytest.mark.asyncio
+async def test_metrics_expose_route_latency_and_cache_stats(async_client, verified_user, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    assert (await async_client.get(f"/users/{verified_user.id}", headers=headers)).status_code == 200
+    response = await async_client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'http_requests_total{route="get_user",method="GET",status="200"}' in body
+    assert 'http_request_duration_seconds_bucket{route="get_user",method="GET",le="+Inf"}' in body
+    assert "user_cache_hit_ratio" in body
+    assert 'login_attempts_total{decision="throttled"}' in body
+    assert "password_hash_duration_seconds" in body
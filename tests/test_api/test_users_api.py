@@ -1,12 +1,18 @@
 from builtins import str
+from datetime import datetime, timezone
+import json
+from unittest.mock import AsyncMock, patch
 import pytest
 from httpx import AsyncClient
 from urllib.parse import urlencode
 from app.main import app
 from app.models.user_model import User, UserRole
 from app.utils.nickname_gen import generate_nickname
-from app.utils.security import hash_password
+from app.utils.security import hash_password, verify_password
 from app.services.jwt_service import decode_token
+from app.services.revocation_service import RevocationService
+from app.services.user_service import UserService
+from settings.config import settings
 
 
 # ------------------------ Test: Create User Access Denied (Normal User) ------------------------
@@ -53,6 +59,16 @@ async def test_update_user_email_access_allowed(async_client, admin_user, admin_
     assert response.status_code == 200
     assert response.json()["email"] == updated_data["email"]
 
+@pytest.mark.asyncio
+async def test_role_change_revokes_existing_tokens(async_client, admin_token, manager_user, manager_token):
+    manager_headers = {"Authorization": f"Bearer {manager_token}"}
+    assert (await async_client.get("/users/", headers=manager_headers)).status_code == 200
+    response = await async_client.put(f"/users/{manager_user.id}", json={"role": "AUTHENTICATED"},
+                                      headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 200
+    # The old token still carries the MANAGER permission mask; it must stop working.
+    assert (await async_client.get("/users/", headers=manager_headers)).status_code == 401
+
 
 # ------------------------ Test: Delete User ------------------------
 @pytest.mark.asyncio
@@ -113,6 +129,7 @@ async def test_login_success(async_client, verified_user):
     decoded_token = decode_token(data["access_token"])
     assert decoded_token is not None
     assert decoded_token["role"] == "AUTHENTICATED"
+    assert decoded_token["sub"] == str(verified_user.id)
 
 @pytest.mark.asyncio
 async def test_login_user_not_found(async_client):
@@ -191,3 +208,207 @@ async def test_list_users_unauthorized(async_client, user_token):
     headers = {"Authorization": f"Bearer {user_token}"}
     response = await async_client.get("/users/", headers=headers)
     assert response.status_code == 403
+
+
+# ------------------------ Test: Search Users ------------------------
+@pytest.mark.asyncio
+async def test_search_users_as_admin(async_client, admin_token, verified_user):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get("/users/search", params={"q": verified_user.email, "email_verified": True}, headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 1
+    assert body["items"][0]["id"] == str(verified_user.id)
+
+@pytest.mark.asyncio
+async def test_search_users_unauthorized(async_client, user_token):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    response = await async_client.get("/users/search", params={"q": "john"}, headers=headers)
+    assert response.status_code == 403
+
+
+# ------------------------ Test: Export Users ------------------------
+@pytest.mark.asyncio
+@pytest.mark.committed  # the export streams from its own session
+async def test_export_users_ndjson(async_client, admin_token, users_with_same_role_50_users):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get("/users/export", params={"columns": "email,role"}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 51
+    assert set(rows[0]) == {"id", "email", "role"}
+    assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+
+@pytest.mark.asyncio
+@pytest.mark.committed  # the export streams from its own session
+async def test_export_users_csv_resumes_after_cursor(async_client, admin_token, users_with_same_role_50_users):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    first = await async_client.get("/users/export", params={"columns": "email"}, headers=headers)
+    ids = [json.loads(line)["id"] for line in first.text.splitlines()]
+    response = await async_client.get("/users/export", params={"format": "csv", "columns": "email", "after": ids[9]}, headers=headers)
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert lines[0] == "id,email"
+    assert [line.split(",")[0] for line in lines[1:]] == ids[10:]
+
+@pytest.mark.asyncio
+async def test_export_users_rejects_secret_columns(async_client, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get("/users/export", params={"columns": "hashed_password"}, headers=headers)
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_export_users_requires_admin(async_client, manager_token):
+    headers = {"Authorization": f"Bearer {manager_token}"}
+    response = await async_client.get("/users/export", headers=headers)
+    assert response.status_code == 403
+
+
+# ------------------------ Test: Import Users ------------------------
+@pytest.mark.asyncio
+async def test_import_users_as_admin(async_client, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    body = "email,password\nimported@example.com,Secret123!\nbroken,Secret123!\n"
+    response = await async_client.post("/users/import?format=csv", files={"file": ("users.csv", body, "text/csv")}, headers=headers)
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["created"], report["failed"]) == (1, 1)
+    assert report["errors"][0]["row"] == 2
+
+
+# ------------------------ Test: Batch Update Users ------------------------
+@pytest.mark.asyncio
+async def test_batch_unlock_users(async_client, admin_token, locked_user):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    missing = "00000000-0000-0000-0000-000000000000"
+    payload = {"ids": [str(locked_user.id), missing], "operation": "unlock"}
+    response = await async_client.post("/users/batch", json=payload, headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["succeeded"], body["not_found"]) == (1, 1)
+    assert {r["id"]: r["status"] for r in body["results"]} == {str(locked_user.id): "updated", missing: "not_found"}
+
+@pytest.mark.asyncio
+async def test_batch_set_role_requires_role(async_client, admin_token, user):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.post("/users/batch", json={"ids": [str(user.id)], "operation": "set_role"}, headers=headers)
+    assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_login_throttled_before_password_check(async_client, verified_user):
+    form_data = {"username": verified_user.email, "password": "IncorrectPassword123!"}
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    statuses = [
+        (await async_client.post("/login/", data=urlencode(form_data), headers=headers)).status_code
+        for _ in range(settings.login_email_burst)
+    ]
+    assert 429 not in statuses
+    with patch.object(UserService, "_fetch_user", AsyncMock(wraps=UserService._fetch_user)) as fetch_user, \
+            patch("app.services.user_service.verify_password", wraps=verify_password) as verify:
+        response = await async_client.post("/login/", data=urlencode(form_data), headers=headers)
+    assert response.status_code == 429
+    fetch_user.assert_not_called()
+    verify.assert_not_called()
+
+
+# ------------------------ Test: Refresh Tokens ------------------------
+@pytest.mark.asyncio
+async def test_refresh_token_rotation(async_client, verified_user):
+    form_data = {"username": verified_user.email, "password": "MySuperPassword$1234"}
+    login = await async_client.post("/login/", data=urlencode(form_data), headers={"Content-Type": "application/x-www-form-urlencoded"})
+    refresh_token = login.json()["refresh_token"]
+
+    response = await async_client.post("/token/refresh", json={"refresh_token": refresh_token})
+    assert response.status_code == 200
+    data = response.json()
+    assert decode_token(data["access_token"])["role"] == "AUTHENTICATED"
+    assert data["refresh_token"] != refresh_token
+
+    reused = await async_client.post("/token/refresh", json={"refresh_token": refresh_token})
+    assert reused.status_code == 401
+
+@pytest.mark.asyncio
+async def test_logout_revokes_refresh_token(async_client, verified_user):
+    form_data = {"username": verified_user.email, "password": "MySuperPassword$1234"}
+    login = await async_client.post("/login/", data=urlencode(form_data), headers={"Content-Type": "application/x-www-form-urlencoded"})
+    refresh_token = login.json()["refresh_token"]
+    assert (await async_client.post("/logout/", json={"refresh_token": refresh_token})).status_code == 204
+    assert (await async_client.post("/token/refresh", json={"refresh_token": refresh_token})).status_code == 401
+
+
+# ------------------------ Test: Token Revocation ------------------------
+@pytest.mark.asyncio
+async def test_revoked_token_is_rejected(async_client, db_session, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    assert (await async_client.get("/users/", headers=headers)).status_code == 200
+    payload = decode_token(admin_token)
+    await RevocationService.revoke_token(db_session, payload["jti"], datetime.fromtimestamp(payload["exp"], timezone.utc))
+    assert (await async_client.get("/users/", headers=headers)).status_code == 401
+
+
+# ------------------------ Test: JWKS ------------------------
+@pytest.mark.asyncio
+async def test_jwks_document_is_cacheable(async_client):
+    response = await async_client.get("/.well-known/jwks.json")
+    assert response.status_code == 200
+    assert "keys" in response.json()
+    cached = await async_client.get("/.well-known/jwks.json", headers={"If-None-Match": response.headers["ETag"]})
+    assert cached.status_code == 304
+
+
+# ------------------------ Test: Self-Service Profile ------------------------
+@pytest.mark.asyncio
+async def test_get_me_revalidates_with_etag(async_client, user, user_token):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    response = await async_client.get("/me", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["id"] == str(user.id)
+    etag = response.headers["ETag"]
+    assert etag.startswith('"')
+
+    cached = await async_client.get("/me", headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["ETag"] == etag
+
+    stale = await async_client.get("/me", headers={**headers, "If-None-Match": '"0"'})
+    assert stale.status_code == 200
+
+@pytest.mark.asyncio
+async def test_me_etag_ignores_login_bookkeeping(async_client, verified_user):
+    form_data = {"username": verified_user.email, "password": "MySuperPassword$1234"}
+    login_headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    token = (await async_client.post("/login/", data=urlencode(form_data), headers=login_headers)).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    etag = (await async_client.get("/me", headers=headers)).headers["ETag"]
+    await async_client.post("/login/", data=urlencode(form_data), headers=login_headers)
+    assert (await async_client.get("/me", headers={**headers, "If-None-Match": etag})).status_code == 304
+
+@pytest.mark.asyncio
+async def test_patch_me_with_if_match(async_client, user, user_token):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    etag = (await async_client.get("/me", headers=headers)).headers["ETag"]
+    response = await async_client.patch("/me", json={"bio": "Updated bio"}, headers={**headers, "If-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["bio"] == "Updated bio"
+    assert response.headers["ETag"] != etag
+
+    lost_update = await async_client.patch("/me", json={"bio": "Stale edit"}, headers={**headers, "If-Match": etag})
+    assert lost_update.status_code == 412
+
+    # If-Match uses strong comparison, so a weak tag never satisfies it.
+    current = response.headers["ETag"]
+    weak = await async_client.patch("/me", json={"bio": "Weak"}, headers={**headers, "If-Match": "W/" + current})
+    assert weak.status_code == 412
+
+@pytest.mark.asyncio
+async def test_patch_me_rejects_role_change(async_client, user_token):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    response = await async_client.patch("/me", json={"role": "ADMIN"}, headers=headers)
+    assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_get_me_requires_token(async_client):
+    response = await async_client.get("/me")
+    assert response.status_code == 401
@@ -0,0 +1,138 @@
+import asyncio
+from uuid import uuid4
+import pytest
+from app.models.user_model import User
+from app.services.user_cache import UserCache, dumps_snapshot, loads_snapshot
+from app.utils.cache import CacheBackend, InMemoryLRUCache
+
+class FakeSharedCache(CacheBackend):
+    """
+    Stand-in for a shared backend. Values go through `dumps`/`loads` exactly as they
+    would over the network, and instances created with the same `store` see each other's
+    writes, like workers talking to one server.
+    """
+
+    def __init__(self, dumps, loads, store=None, clock=None):
+        self.dumps = dumps
+        self.loads = loads
+        self.store = store if store is not None else {}
+        self.clock = clock or FakeClock()
+
+    async def get(self, key):
+        entry = self.store.get(key)
+        if entry is None or entry[0] <= self.clock():
+            return None
+        return self.loads(entry[1])
+
+    async def set(self, key, value, ttl):
+        self.store[key] = (self.clock() + ttl, self.dumps(value))
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+    async def clear(self):
+        self.store.clear()
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+async def test_lru_expires_and_evicts():
+    clock = FakeClock()
+    cache = InMemoryLRUCache(max_entries=2, clock=clock)
+    await cache.set("a", 1, ttl=10)
+    await cache.set("b", 2, ttl=10)
+    assert await cache.get("a") == 1  # "b" is now least recently used
+    await cache.set("c", 3, ttl=10)
+    assert await cache.get("b") is None and len(cache) == 2
+    clock.now = 11
+    assert await cache.get("a") is None
+
+async def test_fake_shared_cache_round_trips_snapshots(verified_user):
+    store = {}
+    writer = FakeSharedCache(dumps_snapshot, loads_snapshot, store=store)
+    reader = FakeSharedCache(dumps_snapshot, loads_snapshot, store=store)
+    snapshot = UserCache._snapshot(verified_user)
+    assert "hashed_password" not in snapshot
+    await writer.set("user:1", snapshot, ttl=30)
+    assert await reader.get("user:1") == snapshot
+
+async def test_shared_cache_serves_email_lookups(db_session, verified_user):
+    store = {}
+    writer = UserCache(FakeSharedCache(dumps_snapshot, loads_snapshot, store=store), ttl=30)
+    reader = UserCache(FakeSharedCache(dumps_snapshot, loads_snapshot, store=store), ttl=30)
+    loads = []
+
+    async def load():
+        loads.append(1)
+        return verified_user
+
+    await writer.get_by_email(db_session, verified_user.email, load)
+    db_session.expunge(verified_user)
+    hit = await reader.get_by_email(db_session, verified_user.email, load)
+    assert hit.id == verified_user.id and hit.email == verified_user.email
+    assert len(loads) == 1 and reader.hits == 1
+
+async def test_hit_is_served_without_loading(db_session, verified_user):
+    cache = UserCache(InMemoryLRUCache(), ttl=30)
+    loads = []
+
+    async def load():
+        loads.append(1)
+        return verified_user
+
+    first = await cache.get_by_id(db_session, verified_user.id, load)
+    second = await cache.get_by_id(db_session, verified_user.id, load)
+    by_email = await cache.get_by_email(db_session, verified_user.email, load)
+    assert first.id == second.id == by_email.id == verified_user.id
+    assert len(loads) == 1
+    assert cache.stats()["hits"] == 2 and cache.hit_ratio == pytest.approx(2 / 3)
+
+async def test_hit_keeps_the_instance_already_in_the_session(db_session, verified_user):
+    cache = UserCache(InMemoryLRUCache(), ttl=30)
+
+    async def load():
+        return verified_user
+
+    await cache.get_by_id(db_session, verified_user.id, load)
+    # A pending, fresher change in the caller's session must not be overwritten by the snapshot.
+    verified_user.first_name = "Changed"
+    hit = await cache.get_by_id(db_session, verified_user.id, load)
+    assert hit is verified_user and hit.first_name == "Changed"
+
+async def test_concurrent_misses_share_one_load(db_session, verified_user):
+    cache = UserCache(InMemoryLRUCache(), ttl=30)
+    loads = []
+
+    async def slow_load():
+        loads.append(1)
+        await asyncio.sleep(0.05)
+        return verified_user
+
+    users = await asyncio.gather(*(cache.get_by_id(db_session, verified_user.id, slow_load) for _ in range(10)))
+    assert len(loads) == 1
+    assert cache.coalesced == 9
+    assert all(user.id == verified_user.id for user in users)
+
+async def test_invalidation_during_load_is_not_cached(db_session, verified_user):
+    cache = UserCache(InMemoryLRUCache(), ttl=30)
+
+    async def load_then_invalidate():
+        await cache.invalidate(verified_user.id)
+        return verified_user
+
+    await cache.get_by_id(db_session, verified_user.id, load_then_invalidate)
+    assert await cache.backend.get(f"user:{verified_user.id}") is None
+
+async def test_missing_user_is_not_cached(db_session):
+    cache = UserCache(InMemoryLRUCache(), ttl=30)
+
+    async def load():
+        return None
+
+    assert await cache.get_by_id(db_session, uuid4(), load) is None
+    assert len(cache.backend) == 0
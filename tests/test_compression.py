@@ -0,0 +1,103 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from httpx import ASGITransport, AsyncClient
+from app.utils.compression import CompressionMiddleware, choose_encoding, is_compressible
+
+BIG = {"items": [{"email": f"user{n}@example.com", "first_name": "John"} for n in range(100)]}
+
+@pytest.fixture
+def compressed_client():
+    app = FastAPI(default_response_class=ORJSONResponse)
+    app.add_middleware(CompressionMiddleware, minimum_size=500, brotli_enabled=False)
+
+    @app.get("/big")
+    async def big():
+        return ORJSONResponse(BIG, headers={"ETag": '"abc"'})
+
+    @app.get("/conditional")
+    async def conditional(request: Request):
+        return {"if_match": request.headers.get("if-match"), "if_none_match": request.headers.get("if-none-match")}
+
+    @app.get("/revalidate")
+    async def revalidate(request: Request):
+        if request.headers.get("if-none-match") == '"abc"':
+            return Response(status_code=304, headers={"ETag": '"abc"'})
+        return ORJSONResponse(BIG, headers={"ETag": '"abc"'})
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/image")
+    async def image():
+        return Response(b"\x89PNG" + b"\0" * 2000, media_type="image/png")
+
+    @app.get("/stream")
+    async def stream():
+        async def rows():
+            for n in range(50):
+                yield f'{{"n":{n}}}\n'.encode()
+        return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://testserver")
+
+def test_choose_encoding_respects_q_values():
+    assert choose_encoding("gzip, deflate, br", ("br", "gzip")) == "br"
+    assert choose_encoding("gzip;q=1.0, br;q=0.5", ("br", "gzip")) == "gzip"
+    assert choose_encoding("br;q=0, *", ("br", "gzip")) == "gzip"
+    assert choose_encoding("identity", ("br", "gzip")) is None
+    assert choose_encoding("", ("gzip",)) is None
+
+def test_is_compressible():
+    assert is_compressible("application/json")
+    assert is_compressible("text/csv; charset=utf-8")
+    assert is_compressible("application/problem+json")
+    assert not is_compressible("image/png")
+
+async def test_large_json_is_gzipped_and_etag_tagged_with_coding(compressed_client):
+    async with compressed_client as client:
+        response = await client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.headers["etag"] == '"abc-gzip"'
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert response.json() == BIG
+
+async def test_small_and_binary_bodies_pass_through(compressed_client):
+    async with compressed_client as client:
+        small = await client.get("/small", headers={"Accept-Encoding": "gzip"})
+        image = await client.get("/image", headers={"Accept-Encoding": "gzip"})
+        refused = await client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in small.headers
+    assert "content-encoding" not in image.headers
+    assert "content-encoding" not in refused.headers
+    assert refused.headers["etag"] == '"abc"'
+
+async def test_uncompressed_text_responses_still_vary_on_accept_encoding(compressed_client):
+    async with compressed_client as client:
+        small = await client.get("/small", headers={"Accept-Encoding": "gzip"})
+        refused = await client.get("/big", headers={"Accept-Encoding": "identity"})
+        image = await client.get("/image", headers={"Accept-Encoding": "gzip"})
+    assert small.headers["vary"] == "Accept-Encoding"
+    assert refused.headers["vary"] == "Accept-Encoding"
+    assert "vary" not in image.headers
+
+async def test_streaming_response_is_compressed_incrementally(compressed_client):
+    async with compressed_client as client:
+        response = await client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text.splitlines()[-1] == '{"n":49}'
+
+async def test_coding_suffix_is_stripped_from_conditional_headers(compressed_client):
+    async with compressed_client as client:
+        response = await client.get("/conditional", headers={"If-Match": '"abc-gzip"', "If-None-Match": 'W/"x-br", "y"'})
+    assert response.json() == {"if_match": '"abc"', "if_none_match": 'W/"x", "y"'}
+
+async def test_not_modified_repeats_the_compressed_tag(compressed_client):
+    async with compressed_client as client:
+        etag = (await client.get("/revalidate", headers={"Accept-Encoding": "gzip"})).headers["etag"]
+        response = await client.get("/revalidate", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag == '"abc-gzip"'
@@ -1,3 +1,4 @@
+import threading
 import pytest
 from app.services.email_service import EmailService
 from app.utils.template_manager import TemplateManager
@@ -12,3 +13,14 @@ async def test_send_markdown_email(email_service):
     }
     await email_service.send_user_email(user_data, 'email_verification')
     # Manual verification in Mailtrap
+
+async def test_smtp_send_runs_off_the_event_loop(monkeypatch):
+    email_service = EmailService(template_manager=TemplateManager())
+    threads = []
+    monkeypatch.setattr(email_service.smtp_client, "send_email",
+                        lambda subject, html, recipient: threads.append(threading.current_thread()))
+    await email_service.send_user_email(
+        {"email": "test@example.com", "name": "Test User", "verification_url": "http://example.com/verify"},
+        'email_verification',
+    )
+    assert threads and threads[0] is not threading.main_thread()
@@ -0,0 +1,26 @@
+from app.utils.etag import etag_matches, fields_etag, strong_etag_matches
+
+def test_fields_etag_is_strong_and_tracks_values():
+    first = fields_etag(["john@example.com", "John", None])
+    assert first.startswith('"') and first == fields_etag(["john@example.com", "John", None])
+    assert first != fields_etag(["john@example.com", "Johnny", None])
+    # Field boundaries matter: moving text between fields is a change.
+    assert fields_etag(["ab", "c"]) != fields_etag(["a", "bc"])
+
+def test_etag_matches_weak_lists_and_wildcard():
+    etag = fields_etag(["x"])
+    assert etag_matches(etag, etag)
+    assert etag_matches("W/" + etag, etag)
+    assert etag_matches(f'W/"other", {etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('W/"other"', etag)
+    assert not etag_matches(None, etag)
+
+def test_strong_etag_matches_rejects_weak_tags():
+    etag = fields_etag(["x"])
+    assert strong_etag_matches(etag, etag)
+    assert strong_etag_matches(f'"other", {etag}', etag)
+    assert strong_etag_matches("*", etag)
+    assert not strong_etag_matches("W/" + etag, etag)
+    assert not strong_etag_matches(etag, "W/" + etag)
+    assert not strong_etag_matches(None, etag)
@@ -0,0 +1,37 @@
+"""
+Guards startup cost. Importing the app runs in every uvicorn worker, CLI command and
+Alembic migration, so heavy optional dependencies must stay behind first use.
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# Generous next to a typical ~1s, so only a real regression (not a slow CI box) trips it.
+IMPORT_TIME_BUDGET_SECONDS = 3.0
+MODULE_BUDGET = 750
+DEFERRED_MODULES = ("PIL", "minio", "markdown2")
+
+def import_profile(module: str) -> dict:
+    """Cumulative import time in microseconds of each module loaded by importing `module`, from -X importtime."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True, timeout=60,
+    )
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+def test_app_import_stays_within_budget():
+    profile = import_profile("app.main")
+    assert profile["app.main"] / 1e6 < IMPORT_TIME_BUDGET_SECONDS
+    assert len(profile) < MODULE_BUDGET
+
+def test_heavy_dependencies_load_on_first_use():
+    profile = import_profile("app.main")
+    loaded = [name for name in profile if name.split(".")[0] in DEFERRED_MODULES]
+    assert loaded == []
@@ -0,0 +1,73 @@
+import json
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from app.utils.key_ring import KeyRing
+
+def _write_private(path, kid, key):
+    (path / f"{kid}.pem").write_bytes(key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()))
+
+def _write_public(path, kid, key):
+    (path / f"{kid}.pub.pem").write_bytes(key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo))
+
+@pytest.fixture
+def rsa_keys():
+    return [rsa.generate_private_key(public_exponent=65537, key_size=2048) for _ in range(2)]
+
+def test_rs256_sign_and_verify_with_kid(tmp_path, rsa_keys):
+    _write_private(tmp_path, "2026-01", rsa_keys[0])
+    ring = KeyRing.from_directory(str(tmp_path), "RS256")
+    token = ring.sign({"sub": "john@example.com"})
+    assert jwt.get_unverified_header(token)["kid"] == "2026-01"
+    assert ring.verify(token)["sub"] == "john@example.com"
+
+def test_rotation_keeps_old_tokens_valid(tmp_path, rsa_keys):
+    _write_private(tmp_path, "2026-01", rsa_keys[0])
+    old_token = KeyRing.from_directory(str(tmp_path), "RS256").sign({"sub": "john@example.com"})
+    _write_private(tmp_path, "2026-02", rsa_keys[1])
+    (tmp_path / "2026-01.pem").unlink()
+    _write_public(tmp_path, "2026-01", rsa_keys[0])
+    ring = KeyRing.from_directory(str(tmp_path), "RS256")
+    assert ring.active.kid == "2026-02"
+    assert ring.verify(old_token)["sub"] == "john@example.com"
+    assert jwt.get_unverified_header(ring.sign({"sub": "x"}))["kid"] == "2026-02"
+
+def test_unknown_kid_is_rejected(tmp_path, rsa_keys):
+    _write_private(tmp_path, "a", rsa_keys[0])
+    other = tmp_path / "other"
+    other.mkdir()
+    _write_private(other, "b", rsa_keys[1])
+    token = KeyRing.from_directory(str(other), "RS256").sign({"sub": "x"})
+    with pytest.raises(jwt.PyJWTError):
+        KeyRing.from_directory(str(tmp_path), "RS256").verify(token)
+
+def test_jwks_publishes_only_public_keys(tmp_path, rsa_keys):
+    _write_private(tmp_path, "2026-01", rsa_keys[0])
+    _write_public(tmp_path, "2025-12", rsa_keys[1])
+    jwks = json.loads(KeyRing.from_directory(str(tmp_path), "RS256").jwks)
+    assert sorted(key["kid"] for key in jwks["keys"]) == ["2025-12", "2026-01"]
+    assert all("d" not in key and key["alg"] == "RS256" for key in jwks["keys"])
+    public = jwt.PyJWK(jwks["keys"][1]).key
+    token = KeyRing.from_directory(str(tmp_path), "RS256").sign({"sub": "x"})
+    assert jwt.decode(token, public, algorithms=["RS256"])["sub"] == "x"
+
+def test_eddsa_key_ring(tmp_path):
+    _write_private(tmp_path, "ed", ed25519.Ed25519PrivateKey.generate())
+    ring = KeyRing.from_directory(str(tmp_path), "EdDSA")
+    assert ring.verify(ring.sign({"sub": "x"}))["sub"] == "x"
+    assert json.loads(ring.jwks)["keys"][0]["kty"] == "OKP"
+
+def test_mismatched_key_type_is_rejected(tmp_path):
+    _write_private(tmp_path, "ed", ed25519.Ed25519PrivateKey.generate())
+    with pytest.raises(ValueError):
+        KeyRing.from_directory(str(tmp_path), "RS256")
+
+def test_hs256_fallback_has_no_kid_and_empty_jwks():
+    ring = KeyRing.from_secret("a_very_secret_key")
+    token = ring.sign({"sub": "x"})
+    assert "kid" not in jwt.get_unverified_header(token)
+    assert ring.verify(token)["sub"] == "x"
+    assert json.loads(ring.jwks) == {"keys": []}
@@ -0,0 +1,58 @@
+import json
+import logging
+import queue
+import sys
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from app.utils.common import JsonFormatter, NonBlockingQueueHandler, RequestIdFilter, SamplingFilter
+from app.utils.request_id import RequestIdMiddleware
+
+def _record(name="app.services.user_service", level=logging.INFO, msg="User %s updated", args=("42",), exc_info=None):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, exc_info)
+
+def test_json_formatter_writes_one_object_with_request_id_and_traceback():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = _record(level=logging.ERROR, exc_info=sys.exc_info())
+    record.request_id = "abc123"
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["level"] == "ERROR"
+    assert entry["logger"] == "app.services.user_service"
+    assert entry["message"] == "User 42 updated"
+    assert entry["request_id"] == "abc123"
+    assert entry["exception"].endswith("ValueError: boom")
+
+def test_sampling_applies_only_to_info_from_sampled_loggers():
+    sampler = SamplingFilter(["uvicorn.access"], rate=0.0)
+    assert not sampler.filter(_record(name="uvicorn.access"))
+    assert not sampler.filter(_record(name="uvicorn.access.child"))
+    assert sampler.filter(_record(name="uvicorn.access", level=logging.WARNING))
+    assert sampler.filter(_record(name="uvicorn.error"))
+
+def test_full_queue_drops_and_counts_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(1))
+    handler.handle(_record())
+    handler.handle(_record())
+    assert handler.dropped == 1
+    queued = handler.queue.get_nowait()
+    assert (queued.msg, queued.args) == ("User 42 updated", None)
+
+async def test_request_id_is_echoed_and_stamped_on_log_records():
+    app = FastAPI()
+    app.add_middleware(RequestIdMiddleware)
+    stamped = []
+
+    @app.get("/ping")
+    async def ping():
+        record = _record()
+        RequestIdFilter().filter(record)
+        stamped.append(record.request_id)
+        return {}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://testserver") as client:
+        kept = await client.get("/ping", headers={"X-Request-ID": "from-nginx.1"})
+        replaced = await client.get("/ping", headers={"X-Request-ID": "<script>"})
+    assert kept.headers["x-request-id"] == "from-nginx.1"
+    assert len(replaced.headers["x-request-id"]) == 32
+    assert stamped == ["from-nginx.1", replaced.headers["x-request-id"]]
@@ -0,0 +1,80 @@
+from builtins import range
+import logging
+import pytest
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.utils.metrics import (
+    DB_QUERIES_PER_REQUEST, HTTP_IN_FLIGHT, HTTP_REQUESTS, MetricsMiddleware, MetricsRegistry, _Metric,
+)
+
+def test_histogram_renders_cumulative_buckets_sum_and_count():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        latency.labels("get_user").observe(value)
+    lines = registry.render().splitlines()
+    assert "# TYPE latency_seconds histogram" in lines
+    assert 'latency_seconds_bucket{route="get_user",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="get_user",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{route="get_user",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{route="get_user"} 4.05' in lines
+    assert 'latency_seconds_count{route="get_user"} 4' in lines
+
+def test_metric_without_children_fails_at_creation():
+    class Incomplete(_Metric):
+        kind = "untyped"
+
+    with pytest.raises(TypeError):
+        Incomplete("incomplete", "Missing _new_child.")
+
+def test_label_values_are_escaped_and_collectors_are_read_at_scrape_time():
+    registry = MetricsRegistry()
+    registry.counter("events_total", "Events.", ("name",)).labels('say "hi"\n').inc()
+    hits = {"value": 1}
+    registry.register_collector(lambda: [("hits_total", "counter", "Hits.", [({}, hits["value"])])])
+    hits["value"] = 7
+    lines = registry.render().splitlines()
+    assert 'events_total{name="say \\"hi\\"\\n"} 1' in lines
+    assert "hits_total 7" in lines
+
+@pytest.fixture
+def metrics_client(db_session):
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/things/{thing_id}", name="get_thing")
+    async def get_thing(thing_id: int):
+        assert HTTP_IN_FLIGHT.labels().value >= 1
+        for _ in range(thing_id):
+            await db_session.execute(text("SELECT 1"))
+        return {"id": thing_id}
+
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://testserver")
+
+async def test_middleware_records_route_name_status_and_queries(metrics_client):
+    requests = HTTP_REQUESTS.labels("get_thing", "GET", "200")
+    queries = DB_QUERIES_PER_REQUEST.labels("get_thing")
+    before_requests, before_queries = requests.value, queries.sum
+    async with metrics_client as client:
+        assert (await client.get("/things/3")).status_code == 200
+        assert (await client.get("/things/2")).status_code == 200
+    assert requests.value == before_requests + 2
+    assert queries.sum == before_queries + 5
+    assert HTTP_IN_FLIGHT.labels().value == 0
+
+async def test_repeated_statements_in_one_request_are_logged_as_n_plus_one(db_session, caplog):
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, repeated_query_threshold=3)
+
+    @app.get("/loop")
+    async def loop():
+        for n in range(3):
+            await db_session.execute(text("SELECT :n"), {"n": n})
+        return {}
+
+    caplog.set_level(logging.WARNING, logger="app.utils.metrics")
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://testserver") as client:
+        await client.get("/loop")
+    assert [r.getMessage() for r in caplog.records] == ["GET loop ran one query 3 times, a likely N+1: SELECT ?"]
@@ -0,0 +1,46 @@
+from uuid import uuid4
+import jwt
+import pytest
+from fastapi import HTTPException
+from app.dependencies import get_current_user, require_permission
+from app.models.user_model import UserRole
+from app.services.jwt_service import create_access_token, decode_token, get_key_ring
+from app.utils.permissions import ROLE_PERMISSIONS, Permission, has_permissions, permissions_for
+
+@pytest.mark.parametrize("role, allowed, denied", [
+    (UserRole.ANONYMOUS, Permission.PROFILE_UPDATE, Permission.USERS_READ),
+    (UserRole.AUTHENTICATED, Permission.PROFILE_READ, Permission.USERS_SEARCH),
+    (UserRole.MANAGER, Permission.USERS_DELETE, Permission.USERS_EXPORT),
+    (UserRole.MANAGER, Permission.USERS_CREATE, Permission.USERS_BATCH),
+    (UserRole.ADMIN, Permission.USERS_IMPORT | Permission.USERS_BATCH, Permission.NONE),
+])
+def test_role_policy(role, allowed, denied):
+    mask = permissions_for(role.name)
+    assert has_permissions(mask, allowed)
+    assert denied == Permission.NONE or not has_permissions(mask, denied)
+
+def test_every_role_has_a_policy():
+    assert set(ROLE_PERMISSIONS) == set(UserRole)
+    assert permissions_for("UNKNOWN") == 0
+
+def test_access_token_carries_role_mask():
+    payload = decode_token(create_access_token(data={"sub": "x@example.com", "role": "manager"}))
+    assert payload["perms"] == permissions_for("MANAGER")
+
+def test_require_permission_is_shared_per_mask():
+    assert require_permission(Permission.USERS_READ) is require_permission(Permission.USERS_READ)
+    assert require_permission(Permission.USERS_READ) is not require_permission(Permission.USERS_EXPORT)
+
+def test_permission_checker_rejects_missing_bits():
+    checker = require_permission(Permission.USERS_EXPORT)
+    manager = get_current_user(create_access_token(data={"sub": str(uuid4()), "role": "MANAGER"}))
+    with pytest.raises(HTTPException) as exc:
+        checker(manager)
+    assert exc.value.status_code == 403
+    admin = get_current_user(create_access_token(data={"sub": str(uuid4()), "role": "ADMIN"}))
+    assert checker(admin) is admin
+
+def test_token_without_mask_falls_back_to_role():
+    legacy = get_key_ring().sign({"sub": str(uuid4()), "role": "ADMIN"})
+    assert "perms" not in jwt.decode(legacy, options={"verify_signature": False})
+    assert get_current_user(legacy).perms == permissions_for("ADMIN")
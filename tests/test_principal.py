@@ -0,0 +1,38 @@
+from uuid import uuid4
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+from app.dependencies import get_current_user, get_current_user_record
+from app.services.jwt_service import create_access_token, token_subject
+from app.utils.permissions import Permission, permissions_for
+from app.utils.principal import Principal
+
+def test_principal_from_token_claims():
+    user_id = uuid4()
+    principal = get_current_user(create_access_token(data={"sub": str(user_id), "role": "MANAGER"}))
+    assert isinstance(principal, Principal)
+    assert principal.id == user_id and principal.role == "MANAGER"
+    assert principal.perms == permissions_for("MANAGER")
+    assert principal.can(Permission.USERS_READ) and not principal.can(Permission.USERS_EXPORT)
+    assert principal["user_id"] == str(user_id) and principal["role"] == "MANAGER"
+
+def test_email_subject_is_rejected():
+    # Tokens from before subjects were user ids cannot name a principal.
+    with pytest.raises(HTTPException) as exc:
+        get_current_user(create_access_token(data={"sub": "john@example.com", "role": "ADMIN"}))
+    assert exc.value.status_code == 401
+
+async def test_user_record_is_loaded_once_per_request(db_session, verified_user):
+    request = Request({"type": "http", "headers": []})
+    principal = get_current_user(create_access_token(data={"sub": token_subject(verified_user), "role": "AUTHENTICATED"}))
+    user = await get_current_user_record(request, principal, db_session)
+    assert user.id == verified_user.id
+    # The second lookup is served from request.state without touching the session.
+    assert await get_current_user_record(request, principal, None) is user
+
+async def test_user_record_for_deleted_user_is_unauthorized(db_session):
+    request = Request({"type": "http", "headers": []})
+    principal = Principal(uuid4(), "ADMIN", permissions_for("ADMIN"))
+    with pytest.raises(HTTPException) as exc:
+        await get_current_user_record(request, principal, db_session)
+    assert exc.value.status_code == 401
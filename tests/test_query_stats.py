@@ -0,0 +1,41 @@
+import logging
+import pytest
+from sqlalchemy import text
+from app.utils.query_stats import SlowQueryLog, assert_max_queries, count_queries, fingerprint, normalize
+from tests.conftest import engine
+
+def test_normalize_collapses_literals_placeholders_and_in_lists():
+    statement = "SELECT users.id FROM users\n  WHERE users.id IN ($1, $2, $3) AND users.nickname = 'x' LIMIT $4 OFFSET 10"
+    assert normalize(statement) == "SELECT users.id FROM users WHERE users.id IN (?) AND users.nickname = ? LIMIT ? OFFSET ?"
+    assert fingerprint(statement) == fingerprint("SELECT users.id FROM users WHERE users.id IN ($1) AND users.nickname = 'y' LIMIT $2 OFFSET 0")
+    assert fingerprint(statement) != fingerprint("SELECT users.email FROM users")
+
+async def test_assert_max_queries_lists_the_statements_it_counted(db_session):
+    with count_queries() as outer:
+        with assert_max_queries(2):
+            await db_session.execute(text("SELECT 1"))
+            await db_session.execute(text("SELECT 2"))
+        with pytest.raises(AssertionError, match="expected at most 1 queries, ran 2:\n  SELECT \\?\n  SELECT \\?"):
+            with assert_max_queries(1):
+                await db_session.execute(text("SELECT 1"))
+                await db_session.execute(text("SELECT 2"))
+    assert outer.count == 4
+
+async def test_savepoints_are_not_counted(db_session):
+    with count_queries() as counter:
+        async with db_session.begin_nested():
+            await db_session.execute(text("SELECT 1"))
+    assert counter.statements == ["SELECT 1"]
+
+async def test_slow_query_log_explains_each_select_shape_once(caplog):
+    slow_query_log = SlowQueryLog(threshold=0.1, explain=True)
+    caplog.set_level(logging.WARNING, logger="app.utils.query_stats")
+    async with engine.connect() as conn:
+        def record(sync_conn):
+            slow_query_log.record(sync_conn, "SELECT 1", (), 0.01, False)
+            slow_query_log.record(sync_conn, "SELECT 1", (), 0.2, False)
+            slow_query_log.record(sync_conn, "SELECT 1", (), 0.3, False)
+        await conn.run_sync(record)
+    first, second = [r.getMessage() for r in caplog.records]
+    assert first.startswith(f"Slow query {fingerprint('SELECT 1')} took 200.0 ms: SELECT ?\n")
+    assert second == f"Slow query {fingerprint('SELECT 1')} took 300.0 ms: SELECT ?"
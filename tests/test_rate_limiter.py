@@ -0,0 +1,70 @@
+from builtins import range
+import pytest
+from app.utils.rate_limiter import InMemoryRateLimitBackend, LoginThrottle
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def throttle(clock):
+    return LoginThrottle(InMemoryRateLimitBackend(max_keys=100), ip_burst=5, ip_per_minute=60,
+                         email_burst=3, email_per_minute=6, clock=clock)
+
+
+@pytest.mark.asyncio
+async def test_email_bucket_rejects_after_burst(throttle):
+    for _ in range(3):
+        assert await throttle.check("10.0.0.1", "victim@example.com") == 0
+    retry_after = await throttle.check("10.0.0.2", "Victim@Example.com")
+    assert retry_after == pytest.approx(10.0)
+
+
+@pytest.mark.asyncio
+async def test_ip_bucket_rejects_spraying_many_accounts(throttle):
+    for n in range(5):
+        assert await throttle.check("10.0.0.1", f"user{n}@example.com") == 0
+    assert await throttle.check("10.0.0.1", "user99@example.com") > 0
+    assert await throttle.check("10.0.0.2", "user99@example.com") == 0
+
+
+@pytest.mark.asyncio
+async def test_tokens_refill_over_time(throttle, clock):
+    for _ in range(3):
+        await throttle.check(None, "user@example.com")
+    assert await throttle.check(None, "user@example.com") > 0
+    clock.now += 10
+    assert await throttle.check(None, "user@example.com") == 0
+
+
+@pytest.mark.asyncio
+async def test_success_resets_email_bucket(throttle):
+    for _ in range(3):
+        await throttle.check(None, "user@example.com")
+    await throttle.record_success("user@example.com")
+    assert await throttle.check(None, "user@example.com") == 0
+
+
+@pytest.mark.asyncio
+async def test_memory_is_bounded():
+    backend = InMemoryRateLimitBackend(max_keys=10)
+    for n in range(100):
+        await backend.consume(f"key{n}", 1, 1.0, 0.0)
+    assert len(backend) == 10
+
+
+@pytest.mark.asyncio
+async def test_stats_count_allowed_and_throttled_attempts(throttle):
+    for _ in range(4):
+        await throttle.check(None, "user@example.com")
+    assert throttle.stats() == {"allowed": 3, "throttled": 1}
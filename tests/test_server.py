@@ -0,0 +1,42 @@
+import os
+from unittest.mock import AsyncMock, patch
+import pytest
+from app import server
+from app.main import app, lifespan
+from app.services.email_service import email_outbox
+
+def test_worker_count_defaults_to_available_cpus():
+    with patch.object(server, "available_cpus", return_value=6):
+        assert server.worker_count(0) == 6
+    assert server.worker_count(3) == 3
+
+def test_pool_size_per_worker_splits_the_connection_budget():
+    assert server.pool_size_per_worker(40, 4) == 10
+    assert server.pool_size_per_worker(10, 3) == 3
+    assert server.pool_size_per_worker(2, 8) == 1
+
+def test_main_runs_tuned_workers_with_their_share_of_connections(monkeypatch):
+    settings = server.get_settings()
+    monkeypatch.setattr(settings, "server_workers", 4)
+    monkeypatch.setattr(settings, "database_max_connections", 20)
+    # Registered with monkeypatch so the values main() exports are undone afterwards.
+    monkeypatch.setenv("DATABASE_POOL_SIZE", "")
+    monkeypatch.setenv("DATABASE_MAX_OVERFLOW", "")
+    with patch.object(server, "setup_logging"), patch.object(server.uvicorn, "run") as run:
+        server.main()
+    args, kwargs = run.call_args
+    assert args == ("app.main:app",)
+    assert kwargs["workers"] == 4
+    assert kwargs["timeout_graceful_shutdown"] == settings.server_graceful_shutdown_seconds
+    assert kwargs["limit_concurrency"] == settings.server_limit_concurrency
+    assert kwargs["log_config"] is None
+    assert os.environ["DATABASE_POOL_SIZE"] == "5"
+    assert os.environ["DATABASE_MAX_OVERFLOW"] == "0"
+
+@pytest.mark.asyncio
+async def test_shutdown_drains_the_email_outbox():
+    send = AsyncMock()
+    async with lifespan(app):
+        email_outbox.enqueue(send)
+    send.assert_awaited_once()
+    assert email_outbox.pending == 0
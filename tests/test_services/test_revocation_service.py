@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from app.dependencies import get_current_user
+from app.models.token_revocation_model import TokenRevocation
+from app.schemas.user_schemas import BatchOperation
+from app.services.jwt_service import create_access_token, decode_token, token_subject
+from app.services.revocation_service import RevocationList, RevocationService, revocation_list
+from app.services.user_service import UserService
+
+def _token_for(user):
+    return create_access_token(data={"sub": token_subject(user), "role": user.role.name})
+
+# Test the in-memory list without a database: jti entries match exactly, subject entries by issue time
+def test_revocation_list_matches_jti_and_subject():
+    revoked = RevocationList()
+    assert not revoked.is_revoked({"jti": "a", "sub": "x@example.com", "iat": 100})
+    revoked.add_jti("a")
+    revoked.add_subject("x@example.com", 100_500_000)
+    assert revoked.is_revoked({"jti": "a", "sub": "y@example.com", "iat": 200})
+    assert revoked.is_revoked({"jti": "b", "sub": "x@example.com", "iat": 100, "iat_us": 100_400_000})
+    assert not revoked.is_revoked({"jti": "b", "sub": "x@example.com", "iat": 100, "iat_us": 100_600_000})
+    # Without iat_us the token is assumed to be from the start of its second.
+    assert revoked.is_revoked({"jti": "b", "sub": "x@example.com", "iat": 100})
+    assert not revoked.is_revoked({"jti": "b", "sub": "x@example.com", "iat": 101})
+    assert revoked.is_revoked({"sub": "x@example.com"})
+
+# Test that tokens carry the claims revocation is keyed on
+def test_access_token_has_jti_and_iat():
+    payload = decode_token(create_access_token(data={"sub": "x@example.com", "role": "ADMIN"}))
+    assert payload["jti"] and payload["iat"] <= payload["exp"]
+    assert payload["iat_us"] // 1_000_000 == payload["iat"]
+    assert payload["jti"] != decode_token(create_access_token(data={"sub": "x@example.com", "role": "ADMIN"}))["jti"]
+
+async def test_revoke_token_rejects_only_that_token(db_session, verified_user):
+    token, other = _token_for(verified_user), _token_for(verified_user)
+    await RevocationService.revoke_token(db_session, decode_token(token)["jti"], datetime.now(timezone.utc) + timedelta(minutes=30))
+    with pytest.raises(HTTPException) as exc:
+        get_current_user(token)
+    assert exc.value.status_code == 401
+    assert get_current_user(other).id == verified_user.id
+
+async def test_delete_user_revokes_existing_tokens(db_session, verified_user):
+    token = _token_for(verified_user)
+    assert await UserService.delete(db_session, verified_user.id)
+    with pytest.raises(HTTPException):
+        get_current_user(token)
+
+async def test_batch_lock_revokes_existing_tokens(db_session, verified_user):
+    token = _token_for(verified_user)
+    await UserService.batch_mutate(db_session, [verified_user.id], BatchOperation.LOCK)
+    with pytest.raises(HTTPException):
+        get_current_user(token)
+
+# Test that another worker picks revocations up from the table on refresh
+async def test_refresh_loads_persisted_revocations(db_session, verified_user):
+    token = _token_for(verified_user)
+    await RevocationService.revoke_subjects(db_session, [token_subject(verified_user)])
+    revocation_list.clear()
+    assert await RevocationService.refresh(db_session) == 1
+    assert revocation_list.is_revoked(decode_token(token))
+
+# Test that a token issued right after a subject revocation, even within the same second, is accepted
+async def test_token_issued_after_revocation_is_valid(db_session, verified_user):
+    old = _token_for(verified_user)
+    await RevocationService.revoke_subjects(db_session, [token_subject(verified_user)])
+    new = _token_for(verified_user)
+    assert revocation_list.is_revoked(decode_token(old))
+    assert not revocation_list.is_revoked(decode_token(new))
+
+async def test_purge_expired_revocations(db_session):
+    await RevocationService.revoke_token(db_session, "expired", datetime.now(timezone.utc) - timedelta(minutes=1))
+    await RevocationService.revoke_token(db_session, "live", datetime.now(timezone.utc) + timedelta(minutes=30))
+    assert await RevocationService.purge_expired(db_session) == 1
+    assert (await db_session.execute(select(func.count()).select_from(TokenRevocation))).scalar() == 1
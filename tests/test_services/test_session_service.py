@@ -0,0 +1,35 @@
+import pytest
+from sqlalchemy import select
+from app.models.session_model import UserSession
+from app.services.session_service import SessionService, hash_refresh_token
+
+pytestmark = pytest.mark.asyncio
+
+# Test that only the digest of an issued refresh token is stored
+async def test_issue_stores_token_digest(db_session, verified_user):
+    token = await SessionService.issue(db_session, verified_user)
+    stored = (await db_session.execute(select(UserSession).filter_by(user_id=verified_user.id))).scalars().one()
+    assert stored.token_hash == hash_refresh_token(token)
+    assert stored.revoked_at is None
+
+# Test that rotating a refresh token returns its owner and a new token from the same family
+async def test_rotate_returns_new_token(db_session, verified_user):
+    token = await SessionService.issue(db_session, verified_user)
+    user, new_token = await SessionService.rotate(db_session, token)
+    assert user.id == verified_user.id
+    assert new_token != token
+    rows = (await db_session.execute(select(UserSession).filter_by(user_id=verified_user.id))).scalars().all()
+    assert len({row.family_id for row in rows}) == 1
+
+# Test that reusing a rotated token revokes every token in its family
+async def test_rotate_reuse_revokes_family(db_session, verified_user):
+    token = await SessionService.issue(db_session, verified_user)
+    _, new_token = await SessionService.rotate(db_session, token)
+    assert await SessionService.rotate(db_session, token) is None
+    assert await SessionService.rotate(db_session, new_token) is None
+
+# Test that revoking a user's sessions invalidates their refresh tokens
+async def test_revoke_user(db_session, verified_user):
+    token = await SessionService.issue(db_session, verified_user)
+    await SessionService.revoke_user(db_session, verified_user.id)
+    assert await SessionService.rotate(db_session, token) is None
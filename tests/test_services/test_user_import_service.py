@@ -0,0 +1,76 @@
+from builtins import len, sum
+from io import BytesIO
+from unittest.mock import MagicMock
+import pytest
+from fastapi import UploadFile
+from sqlalchemy import select
+from app.models.user_model import User, UserRole
+from app.services.user_import_service import ImportFormat, UserImportService, read_rows, read_upload_rows
+from app.utils.metrics import PASSWORD_HASH_SECONDS
+
+pytestmark = pytest.mark.asyncio
+
+def _rows(body: str, import_format: ImportFormat = ImportFormat.CSV):
+    return read_rows(BytesIO(body.encode("utf-8")), import_format)
+
+# Test importing valid rows creates unverified users and queues one verification email each
+async def test_import_users_creates_users(db_session, email_service):
+    outbox = MagicMock()
+    body = "email,password,first_name\nann@example.com,Secret123!,Ann\nbob@example.com,Secret123!,Bob\n"
+    report = await UserImportService.import_users(db_session, _rows(body), email_service, outbox, batch_size=1)
+    assert (report.total, report.created, report.failed) == (2, 2, 0)
+    users = (await db_session.execute(select(User).where(User.email.in_(["ann@example.com", "bob@example.com"])))).scalars().all()
+    assert len(users) == 2
+    assert all(u.role == UserRole.ANONYMOUS and not u.email_verified and u.nickname for u in users)
+    assert outbox.enqueue_verification.call_count == 2
+
+# Test that hashing imported passwords is recorded in this process's metrics
+async def test_import_users_records_password_hashing(db_session, email_service):
+    hashing = PASSWORD_HASH_SECONDS.labels("hash")
+    before = sum(hashing.counts)
+    body = "email,password\ncat@example.com,Secret123!\ndan@example.com,Secret123!\n"
+    report = await UserImportService.import_users(db_session, _rows(body), email_service, None)
+    assert report.created == 2
+    assert sum(hashing.counts) - before == 2
+
+# Test that invalid, duplicate and already-registered rows are reported individually
+async def test_import_users_reports_row_errors(db_session, email_service, verified_user):
+    body = (
+        "email,password\n"
+        "new@example.com,Secret123!\n"
+        f"{verified_user.email},Secret123!\n"
+        "not-an-email,Secret123!\n"
+        "new@example.com,Secret123!\n"
+    )
+    report = await UserImportService.import_users(db_session, _rows(body), email_service, None)
+    assert (report.created, report.failed) == (1, 3)
+    assert [error.row for error in report.errors] == [2, 3, 4]
+    assert "already exists" in report.errors[0].errors[0]
+    assert report.errors[1].errors[0].startswith("email:")
+    assert "Duplicate" in report.errors[2].errors[0]
+
+# Test NDJSON parsing errors are reported without aborting the import
+async def test_import_users_ndjson(db_session, email_service):
+    body = '{"email": "nd@example.com", "password": "Secret123!", "nickname": "nd_user"}\nnot json\n'
+    report = await UserImportService.import_users(db_session, _rows(body, ImportFormat.NDJSON), email_service, None)
+    assert (report.total, report.created, report.failed) == (2, 1, 1)
+    assert report.errors[0].row == 2
+    user = (await db_session.execute(select(User).filter_by(email="nd@example.com"))).scalars().one()
+    assert user.nickname == "nd_user"
+
+# Test that a role column is rejected rather than silently replaced with ANONYMOUS
+async def test_import_users_rejects_role_column(db_session, email_service):
+    body = "email,password,role\nboss@example.com,Secret123!,ADMIN\nplain@example.com,Secret123!,\n"
+    report = await UserImportService.import_users(db_session, _rows(body), email_service, None)
+    assert (report.created, report.failed) == (1, 1)
+    assert report.errors[0].errors[0].startswith("role:")
+
+# Test the upload reader parses chunk by chunk, including quoted fields split across chunks
+async def test_read_upload_rows_in_small_chunks():
+    body = 'email,bio\r\nann@example.com,"two\r\nlines"\r\nbob@example.com,x\r\n'.encode("utf-8-sig")
+    upload = UploadFile(BytesIO(body), filename="users.csv")
+    rows = [row async for row in read_upload_rows(upload, ImportFormat.CSV, chunk_size=5)]
+    assert rows == [
+        (1, {"email": "ann@example.com", "bio": "two\r\nlines"}, None),
+        (2, {"email": "bob@example.com", "bio": "x"}, None),
+    ]
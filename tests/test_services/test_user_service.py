@@ -1,9 +1,19 @@
 from builtins import range
+import asyncio
+from uuid import uuid4
 import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
 from app.dependencies import get_settings
 from app.models.user_model import UserRole
-from app.services.user_service import UserService
+from app.schemas.user_schemas import BatchOperation, SearchMode, UserSearchFilters
+from app.services import user_service as user_service_module
+from app.services.user_cache import user_cache
+from app.services.session_service import SessionService
+from app.services.user_service import LoginStatus, UserService
 from app.utils.nickname_gen import generate_nickname
+from app.utils.query_stats import assert_max_queries
+from tests.conftest import AsyncTestingSessionLocal
 
 pytestmark = pytest.mark.asyncio
 
@@ -160,3 +170,120 @@ async def test_unlock_user_account(db_session, locked_user):
     assert unlocked, "The account should be unlocked"
     refreshed_user = await UserService.get_by_id(db_session, locked_user.id)
     assert not refreshed_user.is_locked, "The user should no longer be locked"
+
+# Test searching users by a substring of their email
+async def test_search_users_contains(db_session, users_with_same_role_50_users):
+    target = users_with_same_role_50_users[0]
+    filters = UserSearchFilters(q=target.email.split("@")[0])
+    users = await UserService.search_users(db_session, filters, skip=0, limit=100)
+    assert target.id in [u.id for u in users]
+
+# Test searching users by nickname prefix combined with flag filters
+async def test_search_users_prefix_and_filters(db_session, verified_user, locked_user):
+    filters = UserSearchFilters(q=verified_user.nickname[:3].upper(), match=SearchMode.PREFIX, email_verified=True)
+    users = await UserService.search_users(db_session, filters)
+    assert verified_user.id in [u.id for u in users]
+    assert locked_user.id not in [u.id for u in users]
+    locked = await UserService.search_users(db_session, UserSearchFilters(is_locked=True))
+    assert [u.id for u in locked] == [locked_user.id]
+    assert await UserService.count_search(db_session, UserSearchFilters(is_locked=True)) == 1
+
+# Test that LIKE wildcards in the search term are matched literally
+async def test_search_users_escapes_wildcards(db_session, users_with_same_role_50_users):
+    users = await UserService.search_users(db_session, UserSearchFilters(q="%"), limit=100)
+    assert users == []
+
+async def _explain(db_session, query) -> str:
+    compiled = query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    result = await db_session.execute(text(f"EXPLAIN {compiled}"))
+    return "\n".join(row[0] for row in result)
+
+# Test that each search predicate is served by its index rather than a sequential scan
+async def test_search_users_uses_indexes(db_session, users_with_same_role_50_users):
+    await db_session.execute(text("SET LOCAL enable_seqscan = off"))
+    contains_plan = await _explain(db_session, UserService.build_search_query(UserSearchFilters(q="ample")))
+    assert "ix_users_email_trgm" in contains_plan
+    assert "ix_users_nickname_trgm" in contains_plan
+    prefix_plan = await _explain(db_session, UserService.build_search_query(UserSearchFilters(q="jo", match=SearchMode.PREFIX)))
+    assert "ix_users_email_lower_prefix" in prefix_plan
+    locked_plan = await _explain(db_session, UserService.build_search_query(UserSearchFilters(is_locked=True)))
+    assert "ix_users_locked_created_at" in locked_plan
+    await db_session.rollback()
+
+# Test locking many users with one set-based statement
+async def test_batch_mutate_lock(db_session, users_with_same_role_50_users):
+    ids = [u.id for u in users_with_same_role_50_users[:10]]
+    missing = uuid4()
+    affected = await UserService.batch_mutate(db_session, ids + [missing], BatchOperation.LOCK)
+    assert set(affected) == set(ids)
+    locked = await UserService.search_users(db_session, UserSearchFilters(is_locked=True), limit=100)
+    assert {u.id for u in locked} == set(ids)
+
+# Test changing the role of several users at once
+async def test_batch_mutate_set_role(db_session, users_with_same_role_50_users):
+    ids = [u.id for u in users_with_same_role_50_users[:3]]
+    affected = await UserService.batch_mutate(db_session, ids, BatchOperation.SET_ROLE, UserRole.MANAGER)
+    assert set(affected) == set(ids)
+    assert await UserService.count_search(db_session, UserSearchFilters(role=UserRole.MANAGER)) == 3
+
+# Test deleting many users at once
+async def test_batch_mutate_delete(db_session, users_with_same_role_50_users):
+    ids = [u.id for u in users_with_same_role_50_users[:5]]
+    affected = await UserService.batch_mutate(db_session, ids, BatchOperation.DELETE)
+    assert set(affected) == set(ids)
+    assert await UserService.count(db_session) == 45
+
+# Test that concurrent failed logins racing past the limit lock the account exactly once
+@pytest.mark.committed  # each attempt runs in its own session
+async def test_concurrent_failed_logins_lock_at_limit(db_session, verified_user, monkeypatch):
+    await db_session.commit()  # end the fixture's read transaction; on SQLite it blocks the writers
+    max_attempts = 10
+    monkeypatch.setattr(user_service_module.settings, "max_login_attempts", max_attempts)
+    revoked = []
+    revoke_user = SessionService.revoke_user
+
+    async def counting_revoke_user(session, user_id, commit=True):
+        revoked.append(user_id)
+        return await revoke_user(session, user_id, commit)
+
+    monkeypatch.setattr(SessionService, "revoke_user", counting_revoke_user)
+
+    async def attempt(password="wrongpassword"):
+        async with AsyncTestingSessionLocal() as session:
+            return await UserService.authenticate(session, verified_user.email, password)
+
+    outcomes = await asyncio.gather(*(attempt() for _ in range(max_attempts + 2)))
+    assert all(outcome == LoginStatus.INVALID_CREDENTIALS for outcome, _ in outcomes)
+    async with AsyncTestingSessionLocal() as session:
+        stored = await UserService.get_by_email(session, verified_user.email)
+    assert (stored.failed_login_attempts, stored.is_locked) == (max_attempts, True)
+    assert revoked == [verified_user.id]
+    outcome, user = await attempt("MySuperPassword$1234")
+    assert (outcome, user) == (LoginStatus.LOCKED, None)
+
+# Test that writes through UserService invalidate the read-through user cache
+async def test_update_invalidates_cached_user(db_session, user):
+    assert (await UserService.get_by_id(db_session, user.id)).first_name == user.first_name
+    await UserService.update(db_session, user.id, {"first_name": "Cached"})
+    misses = user_cache.misses
+    assert (await UserService.get_by_id(db_session, user.id)).first_name == "Cached"
+    assert user_cache.misses == misses + 1
+
+async def test_unlock_invalidates_cached_user(db_session, locked_user):
+    assert (await UserService.get_by_id(db_session, locked_user.id)).is_locked
+    assert await UserService.unlock_user_account(db_session, locked_user.id)
+    db_session.expunge_all()
+    assert not (await UserService.get_by_id(db_session, locked_user.id)).is_locked
+
+# Query budgets: the UPDATE returns the row, and create's pre-insert checks share one query
+async def test_update_runs_one_statement(db_session, user):
+    with assert_max_queries(1):
+        updated_user = await UserService.update(db_session, user.id, {"first_name": "Once"})
+    assert updated_user.first_name == "Once"
+
+async def test_create_checks_email_nickname_and_first_user_in_one_query(db_session, email_service, user):
+    user_data = {"email": "budget@example.com", "password": "ValidPassword123!", "role": UserRole.AUTHENTICATED.name}
+    with assert_max_queries(2):
+        created = await UserService.create(db_session, user_data, email_service)
+    assert created.role == UserRole.ANONYMOUS
+    assert await UserService.create(db_session, user_data, email_service) is None
@@ -0,0 +1,82 @@
+import pytest
+from fastapi import Depends, FastAPI, HTTPException
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.dependencies import get_db
+from app.models.user_model import User, UserRole
+from app.utils.session_middleware import ConnectionHoldStats, DatabaseSessionMiddleware
+from tests.conftest import AsyncTestingSessionLocal
+
+# The middleware opens its own sessions, so the rows it writes must really be committed.
+pytestmark = pytest.mark.committed
+
+def _new_user(email: str) -> User:
+    return User(nickname=email.split("@")[0], email=email, hashed_password="x", role=UserRole.AUTHENTICATED)
+
+@pytest.fixture
+def stats():
+    return ConnectionHoldStats()
+
+@pytest.fixture
+def session_client(stats):
+    app = FastAPI()
+    app.add_middleware(DatabaseSessionMiddleware, session_factory=lambda: AsyncTestingSessionLocal, stats=stats)
+
+    @app.get("/ping")
+    async def ping(db: AsyncSession = Depends(get_db)):
+        return {"one": (await db.execute(text("SELECT 1"))).scalar()}
+
+    @app.get("/static")
+    async def static():
+        return {"ok": True}
+
+    @app.post("/users/{nickname}", status_code=201)
+    async def create(nickname: str, db: AsyncSession = Depends(get_db)):
+        db.add(_new_user(f"{nickname}@example.com"))
+        await db.flush()
+        return {"ok": True}
+
+    @app.post("/conflict/{nickname}")
+    async def conflict(nickname: str, db: AsyncSession = Depends(get_db)):
+        db.add(_new_user(f"{nickname}@example.com"))
+        await db.flush()
+        raise HTTPException(status_code=409, detail="conflict")
+
+    @app.post("/boom/{nickname}")
+    async def boom(nickname: str, db: AsyncSession = Depends(get_db)):
+        db.add(_new_user(f"{nickname}@example.com"))
+        await db.flush()
+        raise RuntimeError("secret connection string")
+
+    return AsyncClient(transport=ASGITransport(app=app, raise_app_exceptions=False), base_url="http://testserver")
+
+async def _exists(db_session, email: str) -> bool:
+    return (await db_session.execute(select(User.id).where(User.email == email))).first() is not None
+
+async def test_successful_request_commits_once_at_the_end(session_client, db_session):
+    async with session_client as client:
+        response = await client.post("/users/committed")
+    assert response.status_code == 201
+    assert await _exists(db_session, "committed@example.com")
+
+async def test_error_responses_roll_back(session_client, db_session):
+    async with session_client as client:
+        conflict = await client.post("/conflict/conflicted")
+        boom = await client.post("/boom/exploded")
+    assert conflict.status_code == 409
+    assert boom.status_code == 500
+    assert "secret" not in boom.text
+    assert not await _exists(db_session, "conflicted@example.com")
+    assert not await _exists(db_session, "exploded@example.com")
+
+async def test_connection_hold_time_is_recorded_per_route(session_client, stats):
+    async with session_client as client:
+        await client.get("/ping")
+        await client.get("/ping")
+        await client.get("/static")
+    routes = stats.snapshot()
+    assert routes["GET /ping"]["requests"] == 2
+    assert routes["GET /ping"]["max_seconds"] > 0
+    # No session was opened, so there is nothing to record.
+    assert "GET /static" not in routes
@@ -0,0 +1,118 @@
+import json
+import logging
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.utils.query_stats import instrument_engine
+from app.utils.tracing import SpanExporter, TracingMiddleware, file_exporter, parse_traceparent, traced, tracer
+
+class _Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.spans = []
+
+    def emit(self, record):
+        self.spans.append(json.loads(self.format(record)))
+
+@pytest.fixture
+def spans():
+    handler = _Collect()
+    tracer.configure(SpanExporter(handler), sample_rate=1.0)
+    yield handler.spans
+    tracer.configure(None, 0.0)
+
+def _flush():
+    tracer.exporter.shutdown()
+
+def test_parse_traceparent():
+    header = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+    assert parse_traceparent(header) == (0x4bf92f3577b34da6a3ce929d0e0e4736, 0x00f067aa0ba902b7, True)
+    assert parse_traceparent(header[:-1] + "0")[2] is False
+    assert parse_traceparent("00-" + "0" * 32 + "-00f067aa0ba902b7-01") is None
+    assert parse_traceparent("garbage") is None
+
+def test_disabled_tracer_records_nothing():
+    with tracer.span("noop") as span:
+        assert span is None
+    assert tracer.child_span("SELECT") is None
+
+async def test_nested_spans_share_the_trace_and_link_parents(spans):
+    @traced("outer")
+    async def outer():
+        with tracer.span("inner", answer=42):
+            pass
+
+    await outer()
+    _flush()
+    inner, outer_span = spans
+    assert inner["context"]["trace_id"] == outer_span["context"]["trace_id"]
+    assert inner["parent_id"] == outer_span["context"]["span_id"]
+    assert outer_span["parent_id"] is None
+    assert inner["attributes"] == {"answer": 42}
+
+async def test_exceptions_mark_the_span_as_error(spans):
+    @traced()
+    async def fails():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        await fails()
+    _flush()
+    assert spans[0]["name"].endswith("fails")
+    assert spans[0]["status"] == {"status_code": "ERROR", "description": "ValueError: boom"}
+
+def test_unsampled_root_skips_its_children():
+    handler = _Collect()
+    tracer.configure(SpanExporter(handler), sample_rate=1e-12)
+    try:
+        with tracer.span("root") as root:
+            assert root is None
+            with tracer.span("child") as child:
+                assert child is None
+        _flush()
+    finally:
+        tracer.configure(None, 0.0)
+    assert handler.spans == []
+
+def test_file_exporter_writes_json_lines(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracer.configure(file_exporter(str(path)), sample_rate=1.0)
+    try:
+        with tracer.span("one"):
+            pass
+        with tracer.span("two"):
+            pass
+        _flush()
+    finally:
+        tracer.configure(None, 0.0)
+    names = [json.loads(line)["name"] for line in path.read_text().splitlines()]
+    assert names == ["one", "two"]
+
+async def test_middleware_names_server_span_after_route_and_continues_trace(spans):
+    engine = create_async_engine("sqlite+aiosqlite://")
+    instrument_engine(engine)
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware)
+
+    @app.get("/users/{user_id}")
+    async def get_user(user_id: str):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        return {}
+
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://testserver") as client:
+        await client.get("/users/7", headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"})
+    await engine.dispose()
+    _flush()
+    query = next(span for span in spans if span["kind"] == "SpanKind.CLIENT")
+    server = next(span for span in spans if span["kind"] == "SpanKind.SERVER")
+    assert server["name"] == "GET /users/{user_id}"
+    assert server["attributes"]["http.response.status_code"] == 200
+    assert server["context"]["trace_id"] == f"0x{trace_id}"
+    assert server["parent_id"] == "0x00f067aa0ba902b7"
+    assert query["name"] == "SELECT"
+    assert query["parent_id"] == server["context"]["span_id"]
+    assert query["attributes"]["db.statement"] == "SELECT ?"